@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for claude-docs-server.py
+
+Compares the original four-pass regex HTML stripper with the single-pass
+TextExtractor on doc-sized pages: pages from the server's on-disk cache
+when present, otherwise generated pages shaped like the live docs site
+(large inline framework script, navigation, headed sections, code).
+
+Usage:
+    claude-docs-bench.py [--cache-dir DIR] [--pages N] [--seed N] [--repeat N]
+"""
+
+import argparse
+import importlib.util
+import random
+import re
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+_spec = importlib.util.spec_from_file_location(
+    "claude_docs_server", Path(__file__).with_name("claude-docs-server.py"))
+server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(server)
+
+
+# ============================================================================
+# REGEX REFERENCE
+# ============================================================================
+# The original _extract_text_content, kept here as the comparison baseline.
+
+def regex_extract(html: str) -> str:
+    html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
+    html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
+    html = re.sub(r'<[^>]+>', '', html)
+    html = re.sub(r'\s+', ' ', html).strip()
+    return html
+
+
+# ============================================================================
+# PAGE GENERATOR
+# ============================================================================
+
+WORDS = ("claude code hook settings permission tool model server mcp command slash "
+         "memory file project user cost token bedrock vertex proxy gateway container "
+         "sdk cli configure run install the a to of and with for in").split()
+
+
+def generate_page(rng: random.Random, sections: int = 25) -> str:
+    """One docs page of roughly the live site's size (~250-400KB)."""
+    sentence = lambda n: " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>Docs</title>"]
+    parts.append("<style>" + "".join(f".c{i}{{margin:{i}px;color:#{i:06x}}}" for i in range(2000)) + "</style>")
+    parts.append("<script id='__NEXT_DATA__' type='application/json'>"
+                 + '{"props":{"pageProps":' + ",".join(f'"k{i}":"{sentence(12)}"' for i in range(1500))
+                 + "}}</script></head><body>")
+    parts.append("<nav><ul>" + "".join(f"<li><a href='/p{i}'>{sentence(3)}</a></li>" for i in range(150))
+                 + "</ul></nav><main><article>")
+    parts.append(f"<h1>{sentence(4)}</h1>")
+    for i in range(sections):
+        parts.append(f"<h2 id='s{i}'>{sentence(5)}</h2>")
+        for _ in range(rng.randint(2, 6)):
+            parts.append(f"<p>{' '.join(sentence(rng.randint(8, 25)) for _ in range(4))}</p>")
+        if rng.random() < 0.5:
+            parts.append("<pre><code>" + "\n".join(f"claude --{rng.choice(WORDS)} {i}" for i in range(10))
+                         + "</code></pre>")
+        parts.append("<script>self.__next_f.push([1," + repr(sentence(200)) + "])</script>")
+    parts.append("</article></main><footer>" + sentence(30) + "</footer></body></html>")
+    return "".join(parts)
+
+
+def load_pages(cache_dir: Path, count: int, rng: random.Random) -> Tuple[str, List[str]]:
+    cached = sorted(cache_dir.glob("*.html")) if cache_dir.is_dir() else []
+    if cached:
+        return f"cached pages from {cache_dir}", [path.read_text() for path in cached[:count]]
+    return "generated pages", [generate_page(rng) for _ in range(count)]
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def measure(fn: Callable[[str], object], pages: List[str], repeat: int) -> Tuple[float, int]:
+    """Best-of-repeat seconds per page, and peak traced allocation for one page."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            fn(html)
+        best = min(best, (time.perf_counter() - start) / len(pages))
+
+    peak = 0
+    for html in pages:
+        tracemalloc.start()
+        fn(html)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the docs server HTML extractor")
+    parser.add_argument("--cache-dir", type=Path, default=server.DEFAULT_CACHE_DIR)
+    parser.add_argument("--pages", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source, pages = load_pages(args.cache_dir, args.pages, random.Random(args.seed))
+    avg_kb = sum(len(html) for html in pages) / len(pages) / 1024
+    print(f"{len(pages)} {source}, {avg_kb:.0f}KB average")
+    print(f"{'extractor':>12} | {'per page':>9} {'peak mem':>9}")
+    print("-" * 35)
+    for label, fn in (("regex", regex_extract), ("single-pass", server.extract_sections)):
+        seconds, peak = measure(fn, pages, args.repeat)
+        print(f"{label:>12} | {seconds * 1e3:>7.1f}ms {peak / 2**20:>7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
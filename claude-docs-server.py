@@ -5,18 +5,555 @@ MCP Server for Claude Code Documentation
 Provides access to the most recent Claude Code documentation from docs.anthropic.com
 """
 
+import asyncio
+import concurrent.futures
+import hashlib
+import heapq
 import json
+import math
+import mmap
+import os
+import struct
 import sys
-from typing import Any, Dict, List, Optional
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 import requests
-from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from html.parser import HTMLParser
+from urllib.parse import urljoin
 import re
 
+DEFAULT_BASE_URL = "https://docs.anthropic.com/en/docs/claude-code/"
+DEFAULT_CACHE_DIR = Path.home() / ".claude" / "cache" / "claude-docs"
+DEFAULT_SNAPSHOT = DEFAULT_CACHE_DIR / "docs.snapshot"
+DEFAULT_TTL = 24 * 60 * 60  # seconds before a cached page is revalidated
+FETCH_CONCURRENCY = 8  # parallel page fetches, and pooled connections per host
+FETCH_TIMEOUT = (5, 15)  # (connect, read) seconds for a single page
+FETCH_DEADLINE = 20  # seconds a tool call waits for its pages as a whole
+MAX_IN_FLIGHT = 16  # requests handled at once before stdin reads pause
+
+WORD = re.compile(r"\w+")
+
+
+class PageCache:
+    """On-disk page cache with ETag/Last-Modified revalidation and a TTL"""
+
+    def __init__(self, cache_dir: Path, ttl: float = DEFAULT_TTL, timeout=FETCH_TIMEOUT):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.timeout = timeout
+        # One keep-alive session shared by all fetches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=FETCH_CONCURRENCY, pool_maxsize=FETCH_CONCURRENCY)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY,
+                                                               thread_name_prefix="docs-fetch")
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _meta_path(self, page: str) -> Path:
+        return self.dir / f"{page}.json"
+
+    def _html_path(self, page: str) -> Path:
+        return self.dir / f"{page}.html"
+
+    def meta(self, page: str) -> Optional[Dict[str, Any]]:
+        """Cached metadata for a page (url, etag, last_modified, fetched_at, digest)"""
+        try:
+            return json.loads(self._meta_path(page).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def read(self, page: str) -> Optional[str]:
+        """Cached HTML for a page, however old"""
+        try:
+            return self._html_path(page).read_text()
+        except OSError:
+            return None
+
+    def is_fresh(self, page: str, url: str) -> bool:
+        meta = self.meta(page)
+        return (meta is not None and meta.get("url") == url
+                and time.time() - meta.get("fetched_at", 0) < self.ttl
+                and self._html_path(page).exists())
+
+    def get(self, page: str, url: str) -> str:
+        """
+        Page HTML: from disk while fresh, otherwise revalidated with a
+        conditional GET. A stale copy is served if the network fails.
+        """
+        if self.is_fresh(page, url):
+            return self.read(page)
+
+        meta = self.meta(page) or {}
+        cached = self.read(page) if meta.get("url") == url else None
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached is not None:
+                meta["fetched_at"] = time.time()
+                self._write_meta(page, meta)
+                return cached
+            response.raise_for_status()
+        except requests.RequestException:
+            if cached is not None:
+                return cached
+            raise
+
+        html = response.text
+        self._write(self._html_path(page), html)
+        self._write_meta(page, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "digest": hashlib.sha1(html.encode()).hexdigest(),
+        })
+        return html
+
+    def get_many(self, urls: Dict[str, str], deadline: float = FETCH_DEADLINE) -> Dict[str, str]:
+        """
+        HTML for several pages, fetched concurrently, in the order of urls.
+        Pages that fail or are still in flight at the deadline are left out;
+        in-flight fetches keep running and land in the cache for the next
+        call.
+        """
+        futures = {page: self._submit(page, url) for page, url in urls.items()}
+        done, _ = concurrent.futures.wait(futures.values(), timeout=deadline)
+        return {page: future.result() for page, future in futures.items()
+                if future in done and future.exception() is None}
+
+    def _submit(self, page: str, url: str) -> concurrent.futures.Future:
+        """Start fetching a page, or join the fetch already in flight for it"""
+        with self._inflight_lock:
+            future = self._inflight.get(page)
+            if future is None or future.done():
+                future = self._inflight[page] = self._executor.submit(self.get, page, url)
+            return future
+
+    def _write_meta(self, page: str, meta: Dict[str, Any]):
+        self._write(self._meta_path(page), json.dumps(meta))
+
+    def _write(self, path: Path, text: str):
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text)
+        os.replace(tmp, path)
+
+
+class TextExtractor(HTMLParser):
+    """
+    Single-pass HTML to text, split into sections at headings.
+
+    Text inside script/style/template/noscript is dropped, whitespace is
+    collapsed as it streams in, and block-level tags become word breaks.
+    Only the pieces of the current section are held until it is closed.
+    """
+
+    SKIP = {"script", "style", "template", "noscript", "svg"}
+    HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+    BLOCKS = HEADINGS | {
+        "p", "div", "br", "li", "ul", "ol", "dt", "dd", "tr", "td", "th", "table",
+        "pre", "blockquote", "section", "article", "header", "footer", "nav", "aside",
+        "main", "hr", "figure", "figcaption", "summary", "details", "title", "head", "body",
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.sections: List[List[str]] = []
+        self._heading = ""
+        self._pieces: List[str] = []
+        self._heading_pieces: Optional[List[str]] = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.HEADINGS and not self._skip:
+            self._close_section()
+            self._heading_pieces = []
+        elif tag in self.BLOCKS:
+            self._break()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCKS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skip = max(0, self._skip - 1)
+        elif tag in self.HEADINGS and self._heading_pieces is not None:
+            self._heading = "".join(self._heading_pieces).strip()
+            self._heading_pieces = None
+        elif tag in self.BLOCKS:
+            self._break()
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        target = self._pieces if self._heading_pieces is None else self._heading_pieces
+        words = data.split()
+        if not words:
+            if data and target and target[-1] != " ":
+                target.append(" ")
+            return
+        if data[0].isspace() and target and target[-1] != " ":
+            target.append(" ")
+        target.append(" ".join(words))
+        if data[-1].isspace():
+            target.append(" ")
+
+    def _break(self):
+        target = self._pieces if self._heading_pieces is None else self._heading_pieces
+        if target and target[-1] != " ":
+            target.append(" ")
+
+    def _close_section(self):
+        text = "".join(self._pieces).strip()
+        if self._heading or text:
+            self.sections.append([self._heading, text])
+        self._heading = ""
+        self._pieces = []
+
+    def close(self):
+        super().close()
+        if self._heading_pieces is not None:
+            self._heading = "".join(self._heading_pieces).strip()
+            self._heading_pieces = None
+        self._close_section()
+
+
+def extract_sections(html: str) -> List[List[str]]:
+    """Page text as [heading, text] pairs, one per heading (first may be untitled)"""
+    extractor = TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.sections
+
+
+def sections_text(sections: List[List[str]]) -> str:
+    """Flatten sections back into one page of text"""
+    return " ".join(part for section in sections for part in section if part)
+
+
+class Chunk(NamedTuple):
+    """One indexed section of a page"""
+    page: str
+    heading: str
+    text: str
+
+
+def terms(text: str) -> List[str]:
+    """Lowercase words with a trailing plural 's' dropped ("hooks" -> "hook")"""
+    words = WORD.findall(text.lower())
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in words]
+
+
+class DocsIndex:
+    """
+    BM25 index over page sections, persisted next to the cache.
+
+    Pages are split into chunks at headings (long sections are windowed to
+    CHUNK_WORDS words) when indexed, and re-indexed only when their cached
+    HTML digest changes. Queries only touch the postings of their own terms.
+    The saved file holds the postings too, so loading it tokenizes nothing,
+    and when each page was fetched, so a fresh page is recognized without
+    reading its cache metadata.
+    """
+
+    VERSION = 4
+    CHUNK_WORDS = 200
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, path: Optional[Path]):
+        self.path = Path(path) if path is not None else None
+        self.texts: Dict[str, str] = {}
+        self.digests: Dict[str, str] = {}
+        self.sections: Dict[str, List[List[str]]] = {}
+        self.fetched: Dict[str, List[Any]] = {}     # page -> [url, fetched_at] of the indexed copy
+        self.chunks: Dict[int, Chunk] = {}
+        self.lengths: Dict[int, int] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self._page_chunks: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._total_length = 0
+        # Requests are served from several threads at once
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        if self.path is None:
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.VERSION:
+            return
+        self._restore(data)
+        self.sections = data["sections"]
+        self.fetched = data.get("fetched", {})
+        self.texts = {page: sections_text(sections) for page, sections in self.sections.items()}
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            data = json.dumps({"version": self.VERSION, **self.state(), "sections": self.sections,
+                               "fetched": self.fetched})
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(data)
+            os.replace(tmp, self.path)
+
+    def is_current(self, page: str, digest: Optional[str]) -> bool:
+        return digest is not None and self.digests.get(page) == digest
+
+    def is_fresh(self, page: str, url: str, ttl: float) -> bool:
+        """Is the indexed copy of page one fetched from url less than ttl seconds ago?"""
+        with self._lock:
+            fetched = self.fetched.get(page)
+        return (fetched is not None and page in self.digests and fetched[0] == url
+                and time.time() - fetched[1] < ttl)
+
+    def record_fetch(self, page: str, url: str, fetched_at: float):
+        """Note when the copy of page that the index reflects was fetched or revalidated"""
+        with self._lock:
+            self.fetched[page] = [url, fetched_at]
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Built index as plain data: chunks numbered densely and postings as
+        flat [chunk, tf, chunk, tf, ...] lists. Restored by from_state()
+        without re-tokenizing anything.
+        """
+        with self._lock:
+            renumber = {chunk_id: n for n, chunk_id in enumerate(self.chunks)}
+            return {
+                "digests": self.digests,
+                "chunks": [[chunk.page, chunk.heading, chunk.text, self.lengths[chunk_id]]
+                           for chunk_id, chunk in self.chunks.items()],
+                "postings": {term: [n for chunk_id, tf in postings.items()
+                                    for n in (renumber[chunk_id], tf)]
+                             for term, postings in self.postings.items()},
+            }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "DocsIndex":
+        """Read-only index rebuilt from state(); page texts are not included"""
+        index = cls(None)
+        index._restore(state)
+        return index
+
+    def _restore(self, state: Dict[str, Any]):
+        self.digests = state["digests"]
+        for chunk_id, (page, heading, text, length) in enumerate(state["chunks"]):
+            self.chunks[chunk_id] = Chunk(page, heading, text)
+            self.lengths[chunk_id] = length
+            self._page_chunks.setdefault(page, []).append(chunk_id)
+            self._total_length += length
+        self._next_id = len(self.chunks)
+        self.postings = {term: dict(zip(flat[::2], flat[1::2]))
+                         for term, flat in state["postings"].items()}
+
+    def update(self, page: str, digest: str, sections: List[List[str]]):
+        """Replace a page's entry in the index; sections are [heading, text] pairs"""
+        with self._lock:
+            self._update(page, digest, sections)
+
+    def _update(self, page: str, digest: str, sections: List[List[str]]):
+        self._remove(page)
+        self.texts[page] = sections_text(sections)
+        self.digests[page] = digest
+        self.sections[page] = [list(section) for section in sections]
+        ids = self._page_chunks[page] = []
+        for heading, body in sections:
+            words = body.split()
+            for start in range(0, max(len(words), 1), self.CHUNK_WORDS):
+                chunk = Chunk(page, heading, " ".join(words[start:start + self.CHUNK_WORDS]))
+                self._add_chunk(chunk, ids)
+
+    def _add_chunk(self, chunk: Chunk, ids: List[int]):
+        counts: Dict[str, int] = {}
+        for term in terms(chunk.heading + " " + chunk.text):
+            counts[term] = counts.get(term, 0) + 1
+        if not counts:
+            return
+        chunk_id = self._next_id
+        self._next_id += 1
+        ids.append(chunk_id)
+        self.chunks[chunk_id] = chunk
+        self.lengths[chunk_id] = sum(counts.values())
+        self._total_length += self.lengths[chunk_id]
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[chunk_id] = count
+
+    def _remove(self, page: str):
+        for chunk_id in self._page_chunks.pop(page, ()):
+            chunk = self.chunks.pop(chunk_id)
+            self._total_length -= self.lengths.pop(chunk_id)
+            for term in set(terms(chunk.heading + " " + chunk.text)):
+                postings = self.postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self.postings[term]
+
+    def search(self, query: str, pages: Optional[Set[str]] = None, limit: int = 5) -> List[Chunk]:
+        """Top `limit` chunks for query by BM25, optionally restricted to pages"""
+        with self._lock:
+            return self._search(query, pages, limit)
+
+    def _search(self, query: str, pages: Optional[Set[str]], limit: int) -> List[Chunk]:
+        if not self.chunks:
+            return []
+        count = len(self.chunks)
+        avg_length = self._total_length / count
+        scores: Dict[int, float] = {}
+        for term in set(terms(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                if pages is not None and self.chunks[chunk_id].page not in pages:
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * self.lengths[chunk_id] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+        best = heapq.nsmallest(limit, scores, key=lambda chunk_id: (-scores[chunk_id], chunk_id))
+        return [self.chunks[chunk_id] for chunk_id in best]
+
+
+class Snapshot:
+    """
+    Offline bundle of every docs page plus the built search index.
+
+    Layout: header (magic, version, entry count), an offset table of
+    (name, offset, length) entries, then zlib-compressed JSON blobs:
+    "manifest", "index" (DocsIndex.state()) and "page:<name>" (sections).
+    The file is memory-mapped; a blob is decompressed straight from the
+    mapping the first time it is needed.
+    """
+
+    MAGIC = b"CDOCSNAP"
+    VERSION = 1
+    HEADER = struct.Struct("<8sHI")
+    ENTRY = struct.Struct("<HQQ")
+
+    def __init__(self, path: Path):
+        """Raises OSError if path cannot be read, ValueError if it is not a valid snapshot"""
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < self.HEADER.size:
+                raise ValueError(f"Truncated docs snapshot: {self.path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except (struct.error, KeyError, zlib.error) as e:
+            self._map.close()
+            raise ValueError(f"Corrupt docs snapshot: {self.path} ({e!r})") from e
+        except ValueError:
+            self._map.close()
+            raise
+
+    def _open(self):
+        magic, version, count = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"Not a docs snapshot (or unsupported version): {self.path}")
+        self._entries: Dict[str, Tuple[int, int]] = {}
+        pos = self.HEADER.size
+        for _ in range(count):
+            name_length, offset, length = self.ENTRY.unpack_from(self._map, pos)
+            pos += self.ENTRY.size
+            name = bytes(self._map[pos:pos + name_length]).decode()
+            pos += name_length
+            if pos > len(self._map) or offset + length > len(self._map):
+                raise ValueError(f"Corrupt docs snapshot: {self.path} (entry {name!r} runs past the end)")
+            self._entries[name] = (offset, length)
+        self._sections: Dict[str, List[List[str]]] = {}
+        self.manifest = self._read("manifest")
+
+    def _read(self, name: str) -> Any:
+        offset, length = self._entries[name]
+        with memoryview(self._map)[offset:offset + length] as blob:
+            return json.loads(zlib.decompress(blob))
+
+    def __contains__(self, page: str) -> bool:
+        return f"page:{page}" in self._entries
+
+    def index(self) -> DocsIndex:
+        return DocsIndex.from_state(self._read("index"))
+
+    def sections(self, page: str) -> List[List[str]]:
+        if page not in self._sections:
+            self._sections[page] = self._read(f"page:{page}")
+        return self._sections[page]
+
+    @classmethod
+    def write(cls, path: Path, manifest: Dict[str, Any], index: DocsIndex):
+        """Write a snapshot of index (which must hold every page's sections)"""
+        blobs = {"manifest": manifest, "index": index.state()}
+        for page, sections in index.sections.items():
+            blobs[f"page:{page}"] = sections
+        payloads = {name: zlib.compress(json.dumps(data).encode(), 9) for name, data in blobs.items()}
+
+        names = {name: name.encode() for name in payloads}
+        offset = cls.HEADER.size + sum(cls.ENTRY.size + len(encoded) for encoded in names.values())
+        table = [cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(payloads))]
+        for name, payload in payloads.items():
+            table.append(cls.ENTRY.pack(len(names[name]), offset, len(payload)) + names[name])
+            offset += len(payload)
+
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.writelines(table)
+            f.writelines(payloads.values())
+        os.replace(tmp, path)
+
+
+def open_snapshot(path: Path) -> Tuple[Optional[Snapshot], Optional[DocsIndex]]:
+    """A snapshot and its index, or (None, None) with a warning if it cannot be used"""
+    try:
+        snapshot = Snapshot(path)
+        return snapshot, snapshot.index()
+    except (OSError, ValueError, KeyError, zlib.error) as e:
+        print(f"Ignoring docs snapshot {path}: {e}", file=sys.stderr)
+        return None, None
+
+
 class ClaudeDocsServer:
     """MCP Server for Claude Code Documentation"""
     
-    def __init__(self):
-        self.base_url = "https://docs.anthropic.com/en/docs/claude-code/"
+    def __init__(self, base_url: Optional[str] = None, cache_dir: Optional[Path] = None,
+                 ttl: Optional[float] = None, snapshot: Optional[Path] = None):
+        """snapshot (default $CLAUDE_DOCS_SNAPSHOT) serves the docs offline; "" means none"""
+        self.base_url = base_url or os.environ.get("CLAUDE_DOCS_BASE_URL", DEFAULT_BASE_URL)
+        cache_dir = Path(cache_dir or os.environ.get("CLAUDE_DOCS_CACHE_DIR", DEFAULT_CACHE_DIR))
+        if ttl is None:
+            ttl = float(os.environ.get("CLAUDE_DOCS_TTL", DEFAULT_TTL))
+        self.cache = PageCache(cache_dir, ttl)
+        
+        # With a snapshot the server is offline: pages and index come from it.
+        # Only an explicitly configured one is used, so building a snapshot
+        # at its default path does not freeze the docs.
+        if snapshot is None:
+            snapshot = os.environ.get("CLAUDE_DOCS_SNAPSHOT")
+        self.snapshot = None
+        if snapshot:
+            self.snapshot, self.index = open_snapshot(Path(snapshot))
+        if self.snapshot is None:
+            self.index = DocsIndex(cache_dir / "index.json")
         self.pages = {
             "overview": "overview",
             "quickstart": "quickstart", 
@@ -81,7 +618,7 @@ class ClaudeDocsServer:
                 },
                 {
                     "name": "search_claude_docs",
-                    "description": "Search across all Claude Code documentation",
+                    "description": "Search across all Claude Code documentation, returning the best-matching sections",
                     "inputSchema": {
                         "type": "object",
                         "properties": {
@@ -94,6 +631,11 @@ class ClaudeDocsServer:
                                 "items": {"type": "string", "enum": list(self.pages.keys())},
                                 "description": "Specific pages to search (optional)",
                                 "default": []
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Maximum number of ranked sections to return",
+                                "default": 5
                             }
                         },
                         "required": ["query"]
@@ -123,12 +665,8 @@ class ClaudeDocsServer:
             return {"error": f"Unknown page: {page}"}
         
         try:
-            url = urljoin(self.base_url, self.pages[page])
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Extract text content (simple HTML stripping)
-            content = self._extract_text_content(response.text)
+            url = self._url(page)
+            content = self._page_text(page)
             
             if query:
                 content = self._filter_content(content, query)
@@ -147,28 +685,20 @@ class ClaudeDocsServer:
     def _search_docs(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Search across documentation pages"""
         query = args.get("query")
-        pages_to_search = args.get("pages", list(self.pages.keys()))
+        pages_to_search = args.get("pages") or list(self.pages.keys())
+        limit = int(args.get("limit", 5))
+        
+        pages_to_search = [page for page in pages_to_search if page in self.pages]
+        self._refresh(pages_to_search)
         
         results = []
-        for page in pages_to_search:
-            if page not in self.pages:
-                continue
-                
-            try:
-                url = urljoin(self.base_url, self.pages[page])
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
-                
-                content = self._extract_text_content(response.text)
-                if self._contains_query(content, query):
-                    filtered = self._filter_content(content, query)
-                    results.append({
-                        "page": page,
-                        "url": url,
-                        "content": filtered[:1000] + "..." if len(filtered) > 1000 else filtered
-                    })
-            except Exception as e:
-                continue
+        for chunk in self.index.search(query, set(pages_to_search), limit):
+            results.append({
+                "page": chunk.page,
+                "heading": chunk.heading,
+                "url": self._url(chunk.page),
+                "content": self._snippet(chunk.text, query)
+            })
         
         if not results:
             return {
@@ -182,7 +712,8 @@ class ClaudeDocsServer:
         
         result_text = f"# Search Results for '{query}'\n\n"
         for result in results:
-            result_text += f"## {result['page'].title()}\n"
+            heading = f" > {result['heading']}" if result['heading'] else ""
+            result_text += f"## {result['page'].title()}{heading}\n"
             result_text += f"URL: {result['url']}\n\n"
             result_text += f"{result['content']}\n\n---\n\n"
         
@@ -195,19 +726,54 @@ class ClaudeDocsServer:
             ]
         }
     
-    def _extract_text_content(self, html: str) -> str:
-        """Extract text content from HTML (basic implementation)"""
-        # Remove script and style elements
-        html = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-        html = re.sub(r'<style[^>]*>.*?</style>', '', html, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Remove HTML tags
-        html = re.sub(r'<[^>]+>', '', html)
-        
-        # Clean up whitespace
-        html = re.sub(r'\s+', ' ', html).strip()
+    def _url(self, page: str) -> str:
+        return urljoin(self.base_url, self.pages[page])
+    
+    def _page_text(self, page: str) -> str:
+        """Extracted text of a page, via the snapshot or the page cache and index"""
+        if self.snapshot is not None:
+            if page not in self.snapshot:
+                raise KeyError(f"{page} is not in snapshot {self.snapshot.path}")
+            return sections_text(self.snapshot.sections(page))
+        self._refresh([page])
+        if page not in self.index.texts:
+            # Fetch failed with nothing cached; surface the error
+            self.cache.get(page, self._url(page))
+        return self.index.texts[page]
+    
+    def _refresh(self, pages: List[str]):
+        """Make sure the index reflects the cached copy of each page"""
+        if self.snapshot is not None:
+            return
+        # Fresh pages are known from the index alone, without touching the cache
+        stale = {page: self._url(page) for page in pages
+                 if not self.index.is_fresh(page, self._url(page), self.cache.ttl)}
+        if not stale:
+            return
         
-        return html
+        fetched = self.cache.get_many(stale)
+        for page, url in stale.items():
+            if page not in fetched:
+                continue
+            meta = self.cache.meta(page) or {}
+            digest = meta.get("digest")
+            if not self.index.is_current(page, digest):
+                self.index.update(page, digest, extract_sections(fetched[page]))
+            self.index.record_fetch(page, url, meta.get("fetched_at", 0))
+        if any(page in fetched for page in stale):
+            self.index.save()
+    
+    def _snippet(self, text: str, query: str, width: int = 600) -> str:
+        """Up to `width` characters of text, starting near the first query term"""
+        if len(text) <= width:
+            return text
+        lowered = text.lower()
+        positions = [lowered.find(term) for term in terms(query)]
+        positions = [pos for pos in positions if pos >= 0]
+        start = max(0, min(positions) - width // 4) if positions else 0
+        start = text.rfind(" ", 0, start) + 1 if start else 0
+        snippet = text[start:start + width]
+        return ("..." if start else "") + snippet + ("..." if start + width < len(text) else "")
     
     def _contains_query(self, content: str, query: str) -> bool:
         """Check if content contains the query (case-insensitive)"""
@@ -238,22 +804,169 @@ class ClaudeDocsServer:
         
         return '. '.join(filtered)
 
-def main():
-    """Main MCP server loop"""
-    server = ClaudeDocsServer()
+def envelope(request: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap a handler result as the JSON-RPC response to request"""
+    if "id" not in request:
+        return response
+    if set(response) == {"error"}:
+        return {"jsonrpc": "2.0", "id": request["id"],
+                "error": {"code": -32603, "message": response["error"]}}
+    return {"jsonrpc": "2.0", "id": request["id"], "result": response}
+
+
+def is_request_id(value: Any) -> bool:
+    """JSON-RPC ids are strings, numbers or null"""
+    return value is None or isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def invalid_request(request: Any) -> Dict[str, Any]:
+    """JSON-RPC Invalid Request error for a message that is not a request object"""
+    request_id = request.get("id") if isinstance(request, dict) else None
+    if not is_request_id(request_id):
+        request_id = None
+    return {"jsonrpc": "2.0", "id": request_id,
+            "error": {"code": -32600, "message": "Invalid Request"}}
+
+
+async def serve(server: ClaudeDocsServer, max_in_flight: int = MAX_IN_FLIGHT):
+    """
+    Read requests from stdin and answer them concurrently.
+
+    Each request runs on a worker thread and its response is written as
+    soon as it is ready, tagged with the request's id. At most
+    max_in_flight requests run at once; beyond that stdin is not read
+    until one finishes. A notifications/cancelled message drops the
+    named request's response; its slot is held until its worker thread
+    is done, since the thread cannot be stopped.
+    """
+    loop = asyncio.get_running_loop()
+    workers = concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight,
+                                                    thread_name_prefix="docs-request")
+    slots = asyncio.Semaphore(max_in_flight)
+    running: Set[asyncio.Task] = set()
+    by_id: Dict[Any, asyncio.Task] = {}
     
-    for line in sys.stdin:
+    def send(message: Dict[str, Any]):
+        print(json.dumps(message))
+        sys.stdout.flush()
+    
+    async def handle(request: Dict[str, Any], work: concurrent.futures.Future):
+        try:
+            response = await asyncio.wrap_future(work)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            response = {"error": f"Server error: {str(e)}"}
+        send(envelope(request, response))
+    
+    def worker_done(work: concurrent.futures.Future):
+        # Runs on the worker thread, possibly after input closed and the loop with it
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            pass
+    
+    def finished(task: asyncio.Task, request_id: Any):
+        running.discard(task)
+        if by_id.get(request_id) is task:
+            del by_id[request_id]
+    
+    def dispatch(line: str) -> bool:
+        """Act on one input line; True if it started a request holding a slot"""
         try:
             request = json.loads(line.strip())
-            response = server.handle_request(request)
-            print(json.dumps(response))
-            sys.stdout.flush()
         except json.JSONDecodeError:
-            print(json.dumps({"error": "Invalid JSON"}))
-            sys.stdout.flush()
+            send({"error": "Invalid JSON"})
+            return False
+        
+        if (not isinstance(request, dict) or not isinstance(request.get("method"), str)
+                or not is_request_id(request.get("id"))):
+            send(invalid_request(request))
+            return False
+        method = request["method"]
+        if method.startswith("notifications/"):
+            if method == "notifications/cancelled":
+                params = request.get("params")
+                task = by_id.get(params.get("requestId")) if isinstance(params, dict) else None
+                if task is not None:
+                    task.cancel()
+            return False
+        
+        # The slot is freed when the worker finishes, even if the task is cancelled
+        work = workers.submit(server.handle_request, request)
+        work.add_done_callback(worker_done)
+        task = loop.create_task(handle(request, work))
+        running.add(task)
+        request_id = request.get("id")
+        if request_id is not None:
+            by_id[request_id] = task
+        task.add_done_callback(lambda task, request_id=request_id: finished(task, request_id))
+        return True
+    
+    while True:
+        await slots.acquire()
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            slots.release()
+            break
+        
+        # One bad message must not end the loop and strand in-flight requests
+        try:
+            started = dispatch(line)
         except Exception as e:
-            print(json.dumps({"error": f"Server error: {str(e)}"}))
-            sys.stdout.flush()
+            print(f"Dropped malformed message: {e}", file=sys.stderr)
+            started = False
+        if not started:
+            slots.release()
+    
+    # Input closed: let in-flight requests answer before exiting
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
+    workers.shutdown(wait=False)
+
+
+def build_snapshot(argv: List[str]):
+    """Fetch every page and write them, with the built index, to one snapshot file"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="claude-docs-server.py build-snapshot",
+                                     description=build_snapshot.__doc__)
+    parser.add_argument("--output", "-o", type=Path,
+                        default=Path(os.environ.get("CLAUDE_DOCS_SNAPSHOT", DEFAULT_SNAPSHOT)))
+    args = parser.parse_args(argv)
+    
+    # Build from the network and cache, never from an older snapshot
+    server = ClaudeDocsServer(snapshot="")
+    server._refresh(list(server.pages))
+    missing = [page for page in server.pages if page not in server.index.sections]
+    if missing:
+        print(f"Could not fetch: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    
+    manifest = {"base_url": server.base_url, "built_at": time.time(),
+                "pages": {page: server._url(page) for page in server.pages}}
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    Snapshot.write(args.output, manifest, server.index)
+    print(f"Wrote {len(server.pages)} pages to {args.output} "
+          f"({args.output.stat().st_size // 1024}KB); serve it with "
+          f"CLAUDE_DOCS_SNAPSHOT={args.output}", file=sys.stderr)
+
+
+def main():
+    """Main MCP server loop"""
+    if sys.argv[1:2] == ["build-snapshot"]:
+        build_snapshot(sys.argv[2:])
+        return
+    
+    server = ClaudeDocsServer()
+    
+    if sys.argv[1:] == ["--refresh"]:
+        # Prebuild the cache and index so later searches stay local
+        server._refresh(list(server.pages))
+        print(f"Indexed {len(server.index.texts)} pages in {server.cache.dir}", file=sys.stderr)
+        return
+    
+    asyncio.run(serve(server))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
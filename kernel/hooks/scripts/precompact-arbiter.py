@@ -9,32 +9,382 @@ This hook fires when Claude Code is about to compact the conversation.
 It transforms conversation history into minimal logical facts.
 """
 
+import contextlib
+import importlib.util
 import json
+import os
+import re
 import sys
-import subprocess
 import tempfile
+import time
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
 
-def extract_facts_from_transcript(transcript_path: str) -> str:
+# ============================================================================
+# RULE TABLES
+# ============================================================================
+#
+# Facts are read straight off the transcript records: which tools ran,
+# which files were modified, what the files and commands say about the
+# stack, and decisions stated in plain words. Each table maps a signal to
+# the arbiter fact it produces.
+
+# Tools whose input names a file the session modified
+FILE_WRITE_TOOLS = {'Edit', 'MultiEdit', 'Write', 'NotebookEdit'}
+
+# Tools whose input names a file (read or written), for stack detection
+FILE_PATH_KEYS = ('file_path', 'notebook_path', 'path')
+
+# File extension -> technology
+EXTENSION_TECH = {
+    '.py': 'python', '.pyi': 'python', '.ipynb': 'jupyter',
+    '.ts': 'typescript', '.tsx': 'typescript', '.js': 'javascript', '.jsx': 'javascript',
+    '.mjs': 'javascript', '.cjs': 'javascript', '.vue': 'vue', '.svelte': 'svelte',
+    '.rs': 'rust', '.go': 'go', '.rb': 'ruby', '.java': 'java', '.kt': 'kotlin',
+    '.swift': 'swift', '.c': 'c', '.h': 'c', '.cpp': 'cpp', '.cc': 'cpp', '.hpp': 'cpp',
+    '.cs': 'csharp', '.php': 'php', '.scala': 'scala', '.ex': 'elixir', '.exs': 'elixir',
+    '.sql': 'sql', '.sh': 'shell', '.bash': 'shell', '.tf': 'terraform',
+    '.css': 'css', '.scss': 'sass', '.html': 'html', '.md': 'markdown',
+}
+
+# File name -> technology
+FILENAME_TECH = {
+    'package.json': 'node', 'tsconfig.json': 'typescript', 'pyproject.toml': 'python',
+    'setup.py': 'python', 'requirements.txt': 'python', 'Cargo.toml': 'rust',
+    'go.mod': 'go', 'Gemfile': 'ruby', 'pom.xml': 'maven', 'build.gradle': 'gradle',
+    'Dockerfile': 'docker', 'docker-compose.yml': 'docker_compose',
+    'docker-compose.yaml': 'docker_compose', 'Makefile': 'make',
+    'tailwind.config.js': 'tailwind', 'tailwind.config.ts': 'tailwind',
+    'next.config.js': 'nextjs', 'next.config.mjs': 'nextjs', 'vite.config.ts': 'vite',
+    'pytest.ini': 'pytest', 'conftest.py': 'pytest', 'jest.config.js': 'jest',
+}
+
+# First word of a Bash command -> technology
+COMMAND_TECH = {
+    'python': 'python', 'python3': 'python', 'pip': 'pip', 'pip3': 'pip', 'uv': 'uv',
+    'poetry': 'poetry', 'pytest': 'pytest', 'ruff': 'ruff', 'mypy': 'mypy',
+    'node': 'node', 'npm': 'npm', 'npx': 'npm', 'pnpm': 'pnpm', 'yarn': 'yarn',
+    'bun': 'bun', 'deno': 'deno', 'tsc': 'typescript', 'jest': 'jest', 'vitest': 'vitest',
+    'cargo': 'cargo', 'go': 'go', 'bundle': 'bundler', 'rails': 'rails',
+    'docker': 'docker', 'kubectl': 'kubernetes', 'terraform': 'terraform',
+    'make': 'make', 'gh': 'github_cli',
+}
+
+# Plain-language decisions in user/assistant text -> (fact template, ...)
+DECISION_PATTERNS = [
+    (re.compile(r"\b(?:use|using|switch(?:ed)? to) ([\w.+#-]+) instead of ([\w.+#-]+)", re.I),
+     ('decided_{0}', 'rejected_{1}')),
+    (re.compile(r"\b(?:(?:decided|decide|chose|choose|agreed) (?:to use|on)|going to use) ([\w.+#-]+)", re.I),
+     ('decided_{0}',)),
+    (re.compile(r"\b(?:don't|do not|never|avoid) (?:use|using) ([\w.+#-]+)", re.I),
+     ('rejected_{0}',)),
+]
+
+# Words that follow the decision verbs but are not choices
+DECISION_STOPWORDS = {
+    'a', 'an', 'the', 'this', 'that', 'these', 'those', 'it', 'them', 'one', 'ones',
+    'my', 'your', 'our', 'their', 'his', 'her', 'its', 'i', 'you', 'we', 'they', 'he', 'she',
+    'me', 'us', 'him', 'some', 'any', 'all', 'both', 'either', 'neither', 'each', 'every',
+    'other', 'another', 'same', 'different', 'more', 'less', 'something', 'anything',
+    'nothing', 'what', 'which', 'whatever', 'whichever', 'here', 'there', 'then', 'now',
+    'and', 'or', 'not', 'no', 'to', 'of', 'in', 'on', 'for', 'with', 'as', 'at', 'by',
+}
+
+# Tool names as written in prose -> the name the tech tables above use
+CHOICE_ALIASES = {
+    'c++': 'cpp', 'c#': 'csharp', 'f#': 'fsharp', '.net': 'dotnet', 'golang': 'go',
+    'node.js': 'node', 'nodejs': 'node', 'next.js': 'nextjs', 'vue.js': 'vue',
+    'react.js': 'react', 'reactjs': 'react', 'postgres': 'postgresql',
+}
+
+
+# ============================================================================
+# EXTRACTION
+# ============================================================================
+
+def identifier(text: str) -> str:
+    """Arbiter identifier for arbitrary text: snake_case, [a-z0-9_] only."""
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+
+def choice_identifier(text: str) -> str:
+    """Identifier for a tool named in a decision: aliases first, then `+` and `#` spelled out."""
+    name = text.lower().rstrip('.')
+    name = CHOICE_ALIASES.get(name, name)
+    return identifier(name.replace('+', 'p').replace('#', 'sharp'))
+
+
+class FactExtractor:
     """
-    Read the conversation transcript and extract facts in arbiter syntax.
+    Rule-based fact extraction over transcript records.
+
+    feed() takes one parsed JSONL record at a time; facts() returns the
+    facts found so far in first-seen order, so the same transcript always
+    yields the same output.
+    """
+
+    def __init__(self, cwd: Optional[str] = None, facts: Iterable[str] = ()):
+        self.cwd = cwd
+        self._facts: Dict[str, None] = dict.fromkeys(facts)
+
+    def add(self, fact: str):
+        if fact and not fact.endswith('_'):
+            self._facts.setdefault(fact, None)
+
+    def facts(self) -> List[str]:
+        return list(self._facts)
+
+    def feed(self, record: dict):
+        message = record.get('message')
+        if not isinstance(message, dict):
+            return
+        cwd = record.get('cwd') or self.cwd
+        content = message.get('content')
+        if isinstance(content, str):
+            self._text(content)
+            return
+        for block in content if isinstance(content, list) else ():
+            if not isinstance(block, dict):
+                continue
+            if block.get('type') == 'text':
+                self._text(block.get('text', ''))
+            elif block.get('type') == 'tool_use':
+                self._tool_use(block.get('name', ''), block.get('input') or {}, cwd)
+
+    def _tool_use(self, name: str, tool_input: dict, cwd: Optional[str]):
+        self.add(f'used_{identifier(name)}')
+
+        for key in FILE_PATH_KEYS:
+            path = tool_input.get(key)
+            if isinstance(path, str) and path:
+                self._file(path, cwd, modified=name in FILE_WRITE_TOOLS)
+                break
+
+        if name == 'Bash':
+            self._command(tool_input.get('command', ''))
+
+    def _file(self, path: str, cwd: Optional[str], modified: bool):
+        p = Path(path)
+        tech = FILENAME_TECH.get(p.name) or EXTENSION_TECH.get(p.suffix.lower())
+        if tech:
+            self.add(f'use_{tech}')
+        if modified:
+            if cwd and p.is_absolute():
+                try:
+                    p = p.relative_to(cwd)
+                except ValueError:
+                    pass
+            self.add(f'touched_{identifier(str(p))}')
+
+    def _command(self, command: str):
+        # Every simple command in a pipeline/list counts
+        for part in re.split(r'&&|\|\||[;|\n]', command):
+            words = part.split()
+            while words and '=' in words[0]:
+                words.pop(0)        # leading VAR=value assignments
+            if words:
+                tech = COMMAND_TECH.get(os.path.basename(words[0]))
+                if tech:
+                    self.add(f'use_{tech}')
+
+    def _text(self, text: str):
+        for pattern, templates in DECISION_PATTERNS:
+            for match in pattern.finditer(text):
+                choices = [choice_identifier(group) for group in match.groups()]
+                if any(not c or c in DECISION_STOPWORDS for c in choices):
+                    continue
+                for template in templates:
+                    self.add(template.format(*choices))
+
+
+def iter_records(lines: Iterable[bytes]) -> Iterable[dict]:
+    """Parsed JSONL records, skipping blank and malformed lines."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def scan_transcript(transcript_path: str, offset: int) -> Tuple[List[bytes], int]:
+    """
+    The complete lines after byte `offset`, and the offset just past them.
+
+    A line still being written is left for the next scan.
+    """
+    with open(transcript_path, 'rb') as f:
+        f.seek(offset)
+        complete = []
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            complete.append(line)
+            offset += len(line)
+    return complete, offset
+
+
+# ============================================================================
+# CHECKPOINTS
+# ============================================================================
+#
+# Per session, the hook remembers how far into the transcript it has read
+# and the facts found so far, so each run only scans appended bytes.
+
+def checkpoint_path(log_dir: Path, session_id: str) -> Path:
+    return log_dir / f'{session_id}.checkpoint.json'
+
+
+def load_checkpoint(path: Path, transcript_path: str) -> dict:
+    """Stored checkpoint, or an empty one if missing or for another transcript."""
+    try:
+        checkpoint = json.loads(path.read_text())
+    except (OSError, ValueError):
+        checkpoint = {}
+    if checkpoint.get('transcript_path') != transcript_path:
+        checkpoint = {}
+    try:
+        size = os.path.getsize(transcript_path)
+    except OSError:
+        size = 0
+    if checkpoint.get('offset', 0) > size:
+        # Transcript was truncated or replaced: start over
+        checkpoint = {}
+    return {'transcript_path': transcript_path,
+            'offset': checkpoint.get('offset', 0),
+            'facts': checkpoint.get('facts', [])}
+
+
+def save_checkpoint(path: Path, checkpoint: dict):
+    write_atomic(path, json.dumps(checkpoint))
 
-    This is a simplified v0 implementation that outputs a prompt for Claude
-    to extract facts. In future versions, this could parse the transcript
-    directly.
+
+def write_atomic(path: Path, text: str):
+    """Write text to path atomically (temp file in the same directory, then rename)."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# ============================================================================
+# ARBITER
+# ============================================================================
+#
+# When an arbiter daemon (`arbiter.py serve`) is running, requests go to it
+# through arbiter_client.py and arbiter itself is never imported. Otherwise
+# (or when the daemon does not answer within the time budget) arbiter.py is
+# imported and called in-process rather than run as a subprocess: no
+# interpreter startup, no temp files on the critical path.
+
+def load_tool(name: str, cwd: str = '.'):
+    """
+    The module in <name>.py, or None if it cannot be found.
+
+    Looks next to this hook first (kernel/tools in the repo, .claude/tools
+    once installed), then in the project's .claude/tools.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    for tools_dir in (Path(__file__).resolve().parents[2] / 'tools', Path(cwd) / '.claude' / 'tools'):
+        path = tools_dir / f'{name}.py'
+        if not path.is_file():
+            continue
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            del sys.modules[name]
+            continue
+        return module
+    return None
+
+
+def load_arbiter(cwd: str = '.'):
+    return load_tool('arbiter', cwd)
+
+
+# Default time budget for one hook run; ARBITER_BUDGET_MS (arbiter_runtime.BUDGET_ENV)
+# overrides it
+BUDGET_ENV = 'ARBITER_BUDGET_MS'
+DEFAULT_BUDGET_MS = 2000
+
+# Slack over the remaining budget for a daemon reply, which the daemon's
+# own budget checks need to finish
+DAEMON_GRACE_S = 0.5
+
+
+def budget_ms() -> float:
+    """ARBITER_BUDGET_MS, or DEFAULT_BUDGET_MS when it is unset, empty or not a number."""
+    try:
+        return float(os.environ.get(BUDGET_ENV) or DEFAULT_BUDGET_MS)
+    except ValueError:
+        print(f"Warning: ignoring {BUDGET_ENV}={os.environ[BUDGET_ENV]!r}", file=sys.stderr)
+        return float(DEFAULT_BUDGET_MS)
+
+
+def seed_path(log_dir: Path, session_id: str) -> Path:
+    return log_dir / f'{session_id}.seed'
+
+
+def stage(spans, name: str):
+    """spans.stage(name), or a no-op when arbiter (and so timing) is unavailable."""
+    return spans.stage(name) if spans is not None else contextlib.nullcontext()
+
+
+def extract_facts_from_transcript(transcript_path: str, checkpoint_file: Optional[Path] = None,
+                                  spans=None) -> str:
     """
-    # For v0, we rely on Claude Code's prompt-based hook system
-    # This script can be called as a command hook or prompt hook
+    Read the conversation transcript and extract facts in arbiter syntax.
 
-    # The transcript file contains the full conversation
+    The JSONL transcript is streamed record by record through the rule
+    tables above; one fact per line, in first-seen order. With a
+    checkpoint file, only bytes appended since the last run are read and
+    the new facts are merged into the stored ones. The scan and extract
+    stages are timed into spans when given.
+    """
     if not Path(transcript_path).exists():
         print(f"Warning: Transcript not found at {transcript_path}", file=sys.stderr)
         return ""
 
-    # Read transcript (optional - for logging/debugging)
-    # For v0, we'll return a prompt that asks Claude to do the extraction
-    return ""
+    if checkpoint_file is None:
+        checkpoint = {'offset': 0, 'facts': []}
+    else:
+        checkpoint = load_checkpoint(checkpoint_file, transcript_path)
+
+    with stage(spans, 'scan'):
+        lines, offset = scan_transcript(transcript_path, checkpoint['offset'])
+    with stage(spans, 'extract'):
+        extractor = FactExtractor(facts=checkpoint['facts'])
+        for record in iter_records(lines):
+            extractor.feed(record)
+
+    if checkpoint_file is not None and offset != checkpoint['offset']:
+        checkpoint.update(offset=offset, facts=extractor.facts())
+        save_checkpoint(checkpoint_file, checkpoint)
+    return '\n'.join(extractor.facts())
+
+
+def finish(spans, cwd: str):
+    """Append the run's timing spans to the project's metrics log, never failing the hook."""
+    if spans is None:
+        return
+    runtime = load_tool('arbiter_runtime', cwd)
+    try:
+        spans.write(runtime.metrics_path(cwd))
+    except OSError as e:
+        print(f"Warning: could not write metrics: {e}", file=sys.stderr)
 
 
 def main():
@@ -52,12 +402,34 @@ def main():
     """
     try:
         # Read input from stdin
+        started = time.perf_counter()
         input_data = json.load(sys.stdin)
+        read_done = time.perf_counter()
 
         session_id = input_data.get('session_id', 'unknown')
         transcript_path = input_data.get('transcript_path', '')
         cwd = input_data.get('cwd', '.')
 
+        # A running daemon does the arbiter work and returns its timings,
+        # which join this run's spans (arbiter_runtime.Spans, so arbiter is
+        # not imported). Otherwise arbiter is imported and timed in-process.
+        budget = budget_ms()
+
+        def daemon_timeout() -> float:
+            return max(0.0, budget / 1000 - (time.perf_counter() - started)) + DAEMON_GRACE_S
+
+        client = load_tool('arbiter_client', cwd)
+        daemon = (client is not None
+                  and client.daemon_request({'op': 'ping'}, timeout=daemon_timeout()) is not None)
+        arbiter = None if daemon else load_arbiter(cwd)
+        runtime = load_tool('arbiter_runtime', cwd)
+        spans = None
+        if runtime is not None:
+            spans = runtime.Spans('precompact-arbiter', budget_ms=budget, origin=started,
+                                  session_id=session_id)
+            spans.add('read_stdin', started, read_done)
+            spans.add('load_arbiter', read_done, time.perf_counter())
+
         # Log the PreCompact event (for debugging)
         log_dir = Path.home() / '.claude' / 'logs' / 'arbiter'
         log_dir.mkdir(parents=True, exist_ok=True)
@@ -68,9 +440,79 @@ def main():
             f.write(f"Transcript: {transcript_path}\n")
             f.write(f"CWD: {cwd}\n")
 
-        # For v0: Output a system message prompting Claude to extract facts
-        # This leverages Claude's ability to read the transcript
+        facts = ""
+        if transcript_path:
+            facts = extract_facts_from_transcript(
+                transcript_path, checkpoint_path(log_dir, session_id), spans)
+
+        with open(log_file, 'a') as f:
+            f.write(f"Extracted {len(facts.splitlines())} facts\n")
+
+        if facts and (daemon or arbiter is not None):
+            # A seed that already says the same thing is reused as is
+            seed_file = seed_path(log_dir, session_id)
+            request = {'op': 'compress', 'project': cwd, 'text': facts, 'minimal': True,
+                       'previous': seed_file.read_text().rstrip('\n') if seed_file.exists() else ''}
+            result = None
+            if daemon:
+                sent = time.perf_counter()
+                result = client.daemon_request(
+                    dict(request, budget_ms=budget - spans.elapsed_ms(), timings=True),
+                    timeout=daemon_timeout())
+                if result is not None:
+                    spans.merge(result.pop('timings', {}), sent)
+                elif arbiter is None:
+                    # Daemon busy or gone: answer in-process after all
+                    with stage(spans, 'load_arbiter'):
+                        arbiter = load_arbiter(cwd)
+            if result is None and arbiter is not None:
+                result = arbiter.handle_request(request, spans)
+            if result is None:
+                result = {'error': "arbiter is unavailable"}
+
+            if 'error' in result:
+                # The extracted facts are still worth keeping, uncompressed
+                print(f"Warning: compression failed, keeping facts as extracted: {result['error']}",
+                      file=sys.stderr)
+                with open(log_file, 'a') as f:
+                    f.write(f"Compression failed, facts kept as extracted: {result['error']}\n")
+            elif result['reused']:
+                facts = result['text']
+                with open(log_file, 'a') as f:
+                    f.write("Facts unchanged since the last seed, reusing it\n")
+            else:
+                facts = result['text']
+                with stage(spans, 'write_seed'):
+                    write_atomic(seed_file, facts + '\n')
+                with open(log_file, 'a') as f:
+                    f.write(f"Compressed {result['original']} -> {result['kept']} facts\n")
+                    if not result['semantic']:
+                        f.write(f"Time budget ({budget:g}ms) exceeded, semantic checks skipped\n")
+                    for finding in result['contradictions']:
+                        f.write(f"Contradiction: {finding['statement']}\n")
+
+        if facts:
+            output = {
+                "systemMessage": f"""
+🔬 ARBITER PRECOMPACT ACTIVATED
+
+Facts extracted from the transcript (arbiter syntax):
+
+```
+{facts}
+```
+
+Keep these as the context seed. Add only decisions, conventions or business
+logic the list above misses, in the same syntax (see .claude/rules/arbiter-syntax.md).
+"""
+            }
+            with stage(spans, 'emit'):
+                print(json.dumps(output, indent=2))
+                sys.stdout.flush()
+            finish(spans, cwd)
+            sys.exit(0)
 
+        # Nothing extracted: prompt Claude to extract facts itself
         output = {
             "systemMessage": """
 🔬 ARBITER PRECOMPACT ACTIVATED
@@ -103,7 +545,10 @@ After extraction, the facts will be compressed via arbiter.py and become the new
         }
 
         # Output JSON to stdout
-        print(json.dumps(output, indent=2))
+        with stage(spans, 'emit'):
+            print(json.dumps(output, indent=2))
+            sys.stdout.flush()
+        finish(spans, cwd)
         sys.exit(0)
 
     except Exception as e:
@@ -17,86 +17,189 @@ One statement per line
 Comments: lines starting with #
 """
 
-from dataclasses import dataclass
-from typing import List, Set, Optional, Union
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Optional, Tuple, Union
+import array
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import heapq
+import itertools
+import json
+import mmap
+import os
 import re
+import sqlite3
+import struct
+import sys
+import time
+import weakref
+
+# arbiter_runtime.py sits next to this file, which the PreCompact hook
+# loads by path without putting its directory on sys.path
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+from arbiter_runtime import BUDGET_ENV, DEFAULT_SOCKET, SOCKET_ENV, Spans, metrics_path, socket_path
 
 
 # ============================================================================
 # AST NODES
 # ============================================================================
+#
+# Nodes are hash-consed: constructing a node that is structurally equal to a
+# live one returns the existing object. Equality is therefore identity, the
+# hash is computed once at construction, and identical subtrees are stored
+# once no matter how many statements contain them. Every node also carries a
+# unique integer `id`.
 
-@dataclass(frozen=True, eq=True)
-class Var:
-    """Propositional variable (fact)."""
-    name: str
+class _NodeRef(weakref.ref):
+    """Weak reference that remembers its intern-table key."""
+
+    __slots__ = ('key',)
+
+
+def _forget(ref: _NodeRef):
+    """Drop a dead node from the intern table."""
+    if _NODES.get(ref.key) is ref:
+        del _NODES[ref.key]
+
+
+_NODES: Dict[tuple, _NodeRef] = {}
+_NODE_IDS = itertools.count(1)
+
+
+def _intern(cls, key: tuple, values: tuple) -> 'Node':
+    """Return the live node for key, creating it if needed."""
+    ref = _NODES.get(key)
+    if ref is not None:
+        node = ref()
+        if node is not None:
+            return node
+    # Nodes refuse attribute assignment, so fields are set through the
+    # slot descriptors directly.
+    node = object.__new__(cls)
+    for set_field, value in zip(cls._field_setters, values):
+        set_field(node, value)
+    _set_id(node, next(_NODE_IDS))
+    _set_hash(node, hash(key))
+    ref = _NodeRef(node, _forget)
+    ref.key = key
+    _NODES[key] = ref
+    return node
+
+
+class Node:
+    """Base class for interned, immutable expression nodes."""
+
+    __slots__ = ('id', '_hash', '__weakref__')
 
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_set_id = Node.id.__set__
+_set_hash = Node._hash.__set__
+
+
+class Var(Node):
+    """Propositional variable (fact)."""
+
+    __slots__ = ('name',)
+
+    def __new__(cls, name: str):
+        return _intern(cls, ('var', name), (name,))
+
+    def __reduce__(self):
+        return (Var, (self.name,))
 
     def __repr__(self):
         return self.name
 
 
-@dataclass(frozen=True, eq=True)
-class Not:
+class Not(Node):
     """Negation."""
-    expr: 'Expr'
 
-    def __hash__(self):
-        return hash(('not', self.expr))
+    __slots__ = ('expr',)
+
+    def __new__(cls, expr: 'Expr'):
+        return _intern(cls, ('not', expr.id), (expr,))
+
+    def __reduce__(self):
+        return (Not, (self.expr,))
 
     def __repr__(self):
         return f"!{self.expr}"
 
 
-@dataclass(frozen=True, eq=True)
-class And:
+class And(Node):
     """Conjunction."""
-    left: 'Expr'
-    right: 'Expr'
 
-    def __hash__(self):
-        return hash(('and', self.left, self.right))
+    __slots__ = ('left', 'right')
+
+    def __new__(cls, left: 'Expr', right: 'Expr'):
+        return _intern(cls, ('and', left.id, right.id), (left, right))
+
+    def __reduce__(self):
+        return (And, (self.left, self.right))
 
     def __repr__(self):
         return f"({self.left} & {self.right})"
 
 
-@dataclass(frozen=True, eq=True)
-class Or:
+class Or(Node):
     """Disjunction."""
-    left: 'Expr'
-    right: 'Expr'
 
-    def __hash__(self):
-        return hash(('or', self.left, self.right))
+    __slots__ = ('left', 'right')
+
+    def __new__(cls, left: 'Expr', right: 'Expr'):
+        return _intern(cls, ('or', left.id, right.id), (left, right))
+
+    def __reduce__(self):
+        return (Or, (self.left, self.right))
 
     def __repr__(self):
         return f"({self.left} | {self.right})"
 
 
-@dataclass(frozen=True, eq=True)
-class Implies:
+class Implies(Node):
     """Implication."""
-    antecedent: 'Expr'
-    consequent: 'Expr'
 
-    def __hash__(self):
-        return hash(('implies', self.antecedent, self.consequent))
+    __slots__ = ('antecedent', 'consequent')
+
+    def __new__(cls, antecedent: 'Expr', consequent: 'Expr'):
+        return _intern(cls, ('implies', antecedent.id, consequent.id),
+                       (antecedent, consequent))
+
+    def __reduce__(self):
+        return (Implies, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"({self.antecedent} -> {self.consequent})"
 
 
-@dataclass(frozen=True, eq=True)
-class Iff:
+class Iff(Node):
     """Equivalence (if and only if)."""
-    left: 'Expr'
-    right: 'Expr'
 
-    def __hash__(self):
-        return hash(('iff', self.left, self.right))
+    __slots__ = ('left', 'right')
+
+    def __new__(cls, left: 'Expr', right: 'Expr'):
+        return _intern(cls, ('iff', left.id, right.id), (left, right))
+
+    def __reduce__(self):
+        return (Iff, (self.left, self.right))
 
     def __repr__(self):
         return f"({self.left} <-> {self.right})"
@@ -104,6 +207,9 @@ class Iff:
 
 Expr = Union[Var, Not, And, Or, Implies, Iff]
 
+for _cls in (Var, Not, And, Or, Implies, Iff):
+    _cls._field_setters = tuple(getattr(_cls, name).__set__ for name in _cls.__slots__)
+
 
 # ============================================================================
 # PARSER
@@ -115,132 +221,105 @@ class ParseError(Exception):
 
 
 class Parser:
-    """Recursive descent parser for arbiter syntax."""
+    """
+    Recursive descent parser for arbiter syntax.
+
+    The statement is tokenized in a single regex pass up front; parsing
+    then walks the token list.
+    """
 
     IDENTIFIER = re.compile(r'^[a-z][a-z0-9_]*$')
+    TOKEN = re.compile(r'<->|->|[!&|()]|[A-Za-z0-9_]+|\S')
 
     def __init__(self, text: str):
         self.text = text.strip()
-        self.pos = 0
-
-    def peek(self, length: int = 1) -> str:
-        """Look ahead without consuming."""
-        return self.text[self.pos:self.pos + length]
+        self.tokens: List[str] = self.TOKEN.findall(self.text)
+        self.tokens.append('')              # end marker
+        self.index = 0
 
-    def consume(self, length: int = 1) -> str:
-        """Consume and return characters."""
-        result = self.text[self.pos:self.pos + length]
-        self.pos += length
-        return result
-
-    def skip_whitespace(self):
-        """Skip whitespace characters."""
-        while self.pos < len(self.text) and self.text[self.pos] in ' \t':
-            self.pos += 1
-
-    def at_end(self) -> bool:
-        """Check if at end of input."""
-        return self.pos >= len(self.text)
+    def error_position(self) -> int:
+        """Character position of the current token (only needed for errors)."""
+        matches = list(self.TOKEN.finditer(self.text))
+        return matches[self.index].start() if self.index < len(matches) else len(self.text)
 
     def parse_identifier(self) -> str:
         """Parse an identifier."""
-        self.skip_whitespace()
-        start = self.pos
-        while self.pos < len(self.text) and (self.text[self.pos].isalnum() or self.text[self.pos] == '_'):
-            self.pos += 1
-
-        if start == self.pos:
-            raise ParseError(f"Expected identifier at position {self.pos}")
-
-        identifier = self.text[start:self.pos]
-        if not self.IDENTIFIER.match(identifier):
-            raise ParseError(f"Invalid identifier '{identifier}' - must be snake_case")
-
-        return identifier
+        token = self.tokens[self.index]
+        if not (token[:1].isalnum() or token[:1] == '_'):
+            raise ParseError(f"Expected identifier at position {self.error_position()}")
+        if not self.IDENTIFIER.match(token):
+            raise ParseError(f"Invalid identifier '{token}' - must be snake_case")
+        self.index += 1
+        return token
 
     def parse_primary(self) -> Expr:
         """Parse primary expression (variable, negation, or parenthesized)."""
-        self.skip_whitespace()
+        token = self.tokens[self.index]
 
-        if self.at_end():
+        if not token:
             raise ParseError("Unexpected end of input")
 
         # Negation
-        if self.peek() == '!':
-            self.consume()
+        if token == '!':
+            self.index += 1
             return Not(self.parse_primary())
 
         # Parenthesized expression
-        if self.peek() == '(':
-            self.consume()
+        if token == '(':
+            self.index += 1
             expr = self.parse_expr()
-            self.skip_whitespace()
-            if self.peek() != ')':
-                raise ParseError(f"Expected ')' at position {self.pos}")
-            self.consume()
+            if self.tokens[self.index] != ')':
+                raise ParseError(f"Expected ')' at position {self.error_position()}")
+            self.index += 1
             return expr
 
         # Variable
-        identifier = self.parse_identifier()
-        return Var(identifier)
+        return Var(self.parse_identifier())
 
     def parse_conjunction(self) -> Expr:
         """Parse conjunction (& operator)."""
         left = self.parse_primary()
-
-        while True:
-            self.skip_whitespace()
-            if self.peek() == '&':
-                self.consume()
-                right = self.parse_primary()
-                left = And(left, right)
-            else:
-                break
-
+        while self.tokens[self.index] == '&':
+            self.index += 1
+            left = And(left, self.parse_primary())
         return left
 
     def parse_disjunction(self) -> Expr:
         """Parse disjunction (| operator)."""
         left = self.parse_conjunction()
-
-        while True:
-            self.skip_whitespace()
-            if self.peek() == '|':
-                self.consume()
-                right = self.parse_conjunction()
-                left = Or(left, right)
-            else:
-                break
-
+        while self.tokens[self.index] == '|':
+            self.index += 1
+            left = Or(left, self.parse_conjunction())
         return left
 
     def parse_expr(self) -> Expr:
         """Parse full expression (including implications and equivalences)."""
         left = self.parse_disjunction()
 
-        self.skip_whitespace()
-
         # Check for implication or equivalence
-        if self.peek(3) == '<->':
-            self.consume(3)
-            right = self.parse_disjunction()
-            return Iff(left, right)
-        elif self.peek(2) == '->':
-            self.consume(2)
-            right = self.parse_disjunction()
-            return Implies(left, right)
+        token = self.tokens[self.index]
+        if token == '<->':
+            self.index += 1
+            return Iff(left, self.parse_disjunction())
+        elif token == '->':
+            self.index += 1
+            return Implies(left, self.parse_disjunction())
 
         return left
 
     def parse(self) -> Expr:
         """Parse complete expression."""
         expr = self.parse_expr()
-        self.skip_whitespace()
-        if not self.at_end():
-            raise ParseError(f"Unexpected characters at position {self.pos}: '{self.text[self.pos:]}'")
+        if self.tokens[self.index]:
+            pos = self.error_position()
+            raise ParseError(f"Unexpected characters at position {pos}: '{self.text[pos:]}'")
         return expr
 
 
+# Distinct lines remembered by iter_statements before its cache is reset.
+LINE_CACHE_SIZE = 4096
+
+
 def parse(text: str) -> Expr:
     """Parse a single arbiter statement."""
     if not text or text.strip().startswith('#'):
@@ -248,18 +327,1015 @@ def parse(text: str) -> Expr:
     return Parser(text).parse()
 
 
-def parse_all(text: str) -> List[Expr]:
-    """Parse multiple statements (one per line)."""
-    statements = []
-    for line_num, line in enumerate(text.split('\n'), 1):
+def iter_statements(source: Iterable) -> Iterator[Tuple[int, Expr]]:
+    """
+    Stream (line_number, statement) pairs.
+
+    source is anything that yields lines: a text or binary file object, an
+    mmap, or a list of strings. Lines are parsed one at a time, so memory
+    does not grow with input size. Repeated lines, common in merged fact
+    logs, are parsed once.
+    """
+    if isinstance(source, mmap.mmap):
+        source = iter(source.readline, b'')
+
+    cache: Dict[str, Expr] = {}
+    for line_num, line in enumerate(source, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
         line = line.strip()
         if not line or line.startswith('#'):
             continue
-        try:
-            statements.append(parse(line))
-        except ParseError as e:
-            raise ParseError(f"Line {line_num}: {e}")
-    return statements
+        expr = cache.get(line)
+        if expr is None:
+            try:
+                expr = Parser(line).parse()
+            except ParseError as e:
+                raise ParseError(f"Line {line_num}: {e}")
+            if len(cache) >= LINE_CACHE_SIZE:
+                cache.clear()
+            cache[line] = expr
+        yield line_num, expr
+
+
+def iter_parse(source: Iterable) -> Iterator[Expr]:
+    """Stream statements from a file object, mmap or iterable of lines."""
+    for _, expr in iter_statements(source):
+        yield expr
+
+
+def parse_all(text: str) -> List[Expr]:
+    """Parse multiple statements (one per line)."""
+    return list(iter_parse(text.split('\n')))
+
+
+# ============================================================================
+# COMPILED EVALUATOR
+# ============================================================================
+#
+# For small variable counts, enumerating assignments is cheaper than setting
+# up a solver. Expressions are compiled once into a tree of Python closures
+# that read variables from integer slots, so evaluation does no isinstance
+# dispatch and no dict lookups. The bit-parallel form evaluates 64
+# assignments per call: each variable is a 64-bit word whose bit i is the
+# variable's value in assignment i.
+
+ENUMERATION_MAX_VARS = 10
+LANES = 64
+
+# Lane patterns for the low six variables: bit i of _LANE_WORDS[k] is bit k of i.
+_LANE_WORDS = [sum(1 << i for i in range(LANES) if (i >> k) & 1) for k in range(6)]
+
+
+def _row_op(expr: Expr, f, g):
+    """Closure evaluating one node on a single assignment."""
+    if isinstance(expr, Not):
+        return lambda v: not f(v)
+    if isinstance(expr, And):
+        return lambda v: f(v) and g(v)
+    if isinstance(expr, Or):
+        return lambda v: f(v) or g(v)
+    if isinstance(expr, Implies):
+        return lambda v: not f(v) or g(v)
+    return lambda v: f(v) == g(v)
+
+
+def _block_op(expr: Expr, f, g):
+    """Closure evaluating one node on a word of assignments (m = lane mask)."""
+    if isinstance(expr, Not):
+        return lambda v, m: f(v, m) ^ m
+    if isinstance(expr, And):
+        return lambda v, m: f(v, m) & g(v, m)
+    if isinstance(expr, Or):
+        return lambda v, m: f(v, m) | g(v, m)
+    if isinstance(expr, Implies):
+        return lambda v, m: (f(v, m) ^ m) | g(v, m)
+    return lambda v, m: f(v, m) ^ g(v, m) ^ m
+
+
+class CompiledExpr:
+    """
+    An expression compiled over a fixed variable order.
+
+    row(values) evaluates one assignment given as a sequence indexed by
+    variable slot; block(words, m) evaluates up to 64 assignments at once,
+    with words[k] holding the lanes of variable k and m the lane mask.
+    """
+
+    def __init__(self, expr: Expr, variables: Optional[List[str]] = None):
+        self.expr = expr
+        self.variables = sorted(get_variables(expr)) if variables is None else list(variables)
+        self.slots = {name: i for i, name in enumerate(self.variables)}
+        self._row = None
+        self._block = None
+
+    @property
+    def row(self):
+        if self._row is None:
+            self._row = self._build(lambda k: lambda v: v[k], _row_op)
+        return self._row
+
+    @property
+    def block(self):
+        if self._block is None:
+            self._block = self._build(lambda k: lambda v, m: v[k], _block_op)
+        return self._block
+
+    def __call__(self, assignment: dict) -> bool:
+        return self.row([assignment.get(name, False) for name in self.variables])
+
+    def _build(self, leaf, op):
+        """Build closures bottom-up, one per distinct subexpression."""
+        built: Dict[Expr, object] = {}
+        stack = [(self.expr, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in built:
+                continue
+            if isinstance(node, Var):
+                built[node] = leaf(self.slots[node.name])
+                continue
+            children = _children(node)
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+            fns = [built[c] for c in children] + [None]
+            built[node] = op(node, fns[0], fns[1])
+        return built[self.expr]
+
+
+def _children(expr: Expr) -> tuple:
+    """Direct subexpressions, left to right."""
+    if isinstance(expr, Not):
+        return (expr.expr,)
+    if isinstance(expr, Implies):
+        return (expr.antecedent, expr.consequent)
+    if isinstance(expr, Var):
+        return ()
+    return (expr.left, expr.right)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expr(expr: Expr, variables: Optional[tuple] = None) -> CompiledExpr:
+    """Compile expr, reusing earlier compilations of the same expression."""
+    return CompiledExpr(expr, variables)
+
+
+def enumerate_satisfiable(exprs: List[Expr]) -> bool:
+    """
+    Decide satisfiability by bit-parallel enumeration of all assignments.
+
+    Each conjunct is compiled on its own over a shared variable order and
+    their lane words are ANDed, so the closures nest no deeper than one
+    statement however many statements there are.
+    """
+    conjuncts = list(dict.fromkeys(c for expr in exprs for c in _flatten(expr, And)))
+    variables = tuple(sorted(set().union(*(_variables(c) for c in conjuncts))))
+    blocks = [compile_expr(c, variables).block for c in conjuncts]
+
+    n = len(variables)
+    lanes = min(LANES, 1 << n)
+    mask = (1 << lanes) - 1
+    words = [_LANE_WORDS[k] & mask for k in range(min(n, 6))] + [0] * max(0, n - 6)
+    for high in range(1 << max(0, n - 6)):
+        for k in range(6, n):
+            words[k] = mask if (high >> (k - 6)) & 1 else 0
+        alive = mask
+        for block in blocks:
+            alive &= block(words, mask)
+            if not alive:
+                break
+        else:
+            return True
+    return False
+
+
+# ============================================================================
+# SAT ENGINE
+# ============================================================================
+#
+# Literals are encoded as integers: variable v (1-based) has positive literal
+# 2*v and negative literal 2*v + 1, so negation is `lit ^ 1` and the variable
+# is `lit >> 1`.
+
+def _luby(i: int) -> int:
+    """Return the i-th element (0-based) of the Luby restart sequence."""
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i = i % size
+    return 1 << seq
+
+
+class SATSolver:
+    """
+    CDCL SAT solver.
+
+    Two-watched-literal unit propagation, first-UIP clause learning with
+    non-chronological backjumping, VSIDS branching with phase saving,
+    Luby restarts and learnt clause database reduction.
+
+    Clauses can be added between calls to solve(), and solve() accepts
+    assumption literals, so one solver instance can answer a sequence of
+    related queries while keeping everything it has learnt. When a solve
+    fails because of its assumptions, `failed` holds the ones that were
+    actually involved.
+    """
+
+    RESTART_BASE = 100
+    VAR_DECAY = 0.95
+
+    def __init__(self):
+        self.num_vars = 0
+        self.ok = True
+        self.clauses: List[List[int]] = []
+        self.learnts: List[List[int]] = []
+        self.model: List[bool] = []
+        self.failed: List[int] = []
+        self.conflicts = 0
+        self.max_learnts = 2000
+
+        # Indexed by literal
+        self._watches: List[List[List[int]]] = [[], []]
+        self._values: List[int] = [0, 0]   # 1 true, -1 false, 0 unassigned
+        # Indexed by variable
+        self._level: List[int] = [0]
+        self._reason: List[Optional[List[int]]] = [None]
+        self._activity: List[float] = [0.0]
+        self._phase: List[int] = [1]
+        self._seen: List[int] = [0]
+
+        self._trail: List[int] = []
+        self._trail_lim: List[int] = []
+        self._qhead = 0
+        self._order: List[tuple] = []
+        self._var_inc = 1.0
+
+    # ------------------------------------------------------------------
+    # Problem construction
+    # ------------------------------------------------------------------
+
+    def new_var(self) -> int:
+        """Allocate a fresh variable and return its index."""
+        self.num_vars += 1
+        v = self.num_vars
+        self._watches.extend(([], []))
+        self._values.extend((0, 0))
+        self._level.append(0)
+        self._reason.append(None)
+        self._activity.append(0.0)
+        self._phase.append(1)
+        self._seen.append(0)
+        heapq.heappush(self._order, (0.0, v))
+        return v
+
+    def add_clause(self, lits: Iterable[int]) -> bool:
+        """
+        Add a clause (list of literals). Returns False once the clause
+        database is known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self._cancel_until(0)
+
+        values = self._values
+        clause = []
+        for lit in sorted(set(lits)):
+            if lit ^ 1 in clause or values[lit] == 1:
+                return True                 # tautology or already satisfied
+            if values[lit] == 0:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self.clauses.append(clause)
+            self._attach(clause)
+        return self.ok
+
+    def value(self, lit: int) -> bool:
+        """Value of a literal in the last model found."""
+        v = self.model[lit >> 1]
+        return v if not lit & 1 else not v
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def solve(self, assumptions: Iterable[int] = ()) -> bool:
+        """
+        Decide satisfiability under the given assumption literals.
+
+        On success the model is available in `self.model` (indexed by
+        variable). Unsatisfiability under assumptions leaves the solver
+        usable, with the subset of assumptions it needed in `self.failed`;
+        unsatisfiability without them is permanent (and `failed` empty).
+        """
+        assumptions = list(assumptions)
+        self.failed = []
+        if not self.ok:
+            return False
+        self._cancel_until(0)
+        if self._propagate() is not None:
+            self.ok = False
+            return False
+
+        restarts = 0
+        while True:
+            budget = _luby(restarts) * self.RESTART_BASE
+            status = self._search(budget, assumptions)
+            if status is not None:
+                self._cancel_until(0)
+                return status
+            restarts += 1
+
+    def _search(self, budget: int, assumptions: List[int]) -> Optional[bool]:
+        conflicts = 0
+        while True:
+            confl = self._propagate()
+            if confl is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self._trail_lim:
+                    self.ok = False
+                    return False
+                learnt, backjump = self._analyze(confl)
+                self._cancel_until(backjump)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self._attach(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self._var_inc /= self.VAR_DECAY
+                continue
+
+            if conflicts >= budget:
+                self._cancel_until(0)
+                return None
+            if len(self.learnts) - len(self._trail) >= self.max_learnts:
+                self._reduce_db()
+
+            decision = None
+            while len(self._trail_lim) < len(assumptions):
+                p = assumptions[len(self._trail_lim)]
+                if self._values[p] == 1:
+                    self._trail_lim.append(len(self._trail))   # dummy level
+                elif self._values[p] == -1:
+                    self.failed = self._analyze_final(p)
+                    return False
+                else:
+                    decision = p
+                    break
+
+            if decision is None:
+                decision = self._pick_branch()
+                if decision is None:
+                    values = self._values
+                    self.model = [False] + [values[2 * v] == 1 for v in range(1, self.num_vars + 1)]
+                    return True
+
+            self._trail_lim.append(len(self._trail))
+            self._enqueue(decision, None)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _attach(self, clause: List[int]):
+        self._watches[clause[0] ^ 1].append(clause)
+        self._watches[clause[1] ^ 1].append(clause)
+
+    def _enqueue(self, lit: int, reason: Optional[List[int]]):
+        v = lit >> 1
+        self._values[lit] = 1
+        self._values[lit ^ 1] = -1
+        self._level[v] = len(self._trail_lim)
+        self._reason[v] = reason
+        self._trail.append(lit)
+
+    def _propagate(self) -> Optional[List[int]]:
+        """Unit propagation over watched literals. Returns a conflict clause or None."""
+        values = self._values
+        watches = self._watches
+        trail = self._trail
+        level = self._level
+        reason = self._reason
+        decision_level = len(self._trail_lim)
+
+        while self._qhead < len(trail):
+            p = trail[self._qhead]
+            self._qhead += 1
+            false_lit = p ^ 1
+            ws = watches[p]
+            n = len(ws)
+            i = j = 0
+            while i < n:
+                c = ws[i]
+                i += 1
+                if not c:                       # removed by _reduce_db
+                    continue
+                if c[0] == false_lit:
+                    c[0] = c[1]
+                    c[1] = false_lit
+                first = c[0]
+                if values[first] == 1:
+                    ws[j] = c
+                    j += 1
+                    continue
+                for k in range(2, len(c)):
+                    lit = c[k]
+                    if values[lit] != -1:
+                        c[1] = lit
+                        c[k] = false_lit
+                        watches[lit ^ 1].append(c)
+                        break
+                else:
+                    ws[j] = c
+                    j += 1
+                    if values[first] == -1:
+                        ws[j:] = ws[i:]
+                        self._qhead = len(trail)
+                        return c
+                    values[first] = 1
+                    values[first ^ 1] = -1
+                    level[first >> 1] = decision_level
+                    reason[first >> 1] = c
+                    trail.append(first)
+            del ws[j:]
+        return None
+
+    def _analyze_final(self, p: int) -> List[int]:
+        """The assumptions (p among them) whose propagation made assumption p false."""
+        seen = self._seen
+        level = self._level
+        failed = [p]
+        if level[p >> 1] == 0:
+            return failed       # false regardless of the other assumptions
+        seen[p >> 1] = 1
+        for lit in reversed(self._trail[self._trail_lim[0]:]):
+            v = lit >> 1
+            if not seen[v]:
+                continue
+            reason = self._reason[v]
+            if reason is None:
+                failed.append(lit)
+            else:
+                for q in reason[1:]:
+                    if level[q >> 1] > 0:
+                        seen[q >> 1] = 1
+            seen[v] = 0
+        return failed
+
+    def _analyze(self, confl: List[int]):
+        """First-UIP conflict analysis. Returns (learnt clause, backjump level)."""
+        seen = self._seen
+        level = self._level
+        trail = self._trail
+        current = len(self._trail_lim)
+
+        learnt = [0]
+        pending = 0
+        index = len(trail) - 1
+        p = None
+        while True:
+            for q in (confl if p is None else confl[1:]):
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    seen[v] = 1
+                    self._bump(v)
+                    if level[v] >= current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            p = trail[index]
+            index -= 1
+            confl = self._reason[p >> 1]
+            seen[p >> 1] = 0
+            pending -= 1
+            if pending == 0:
+                break
+        learnt[0] = p ^ 1
+
+        # Drop literals implied by the rest of the clause (local minimization)
+        kept = [learnt[0]]
+        for q in learnt[1:]:
+            r = self._reason[q >> 1]
+            if r is None or any(not seen[x >> 1] and level[x >> 1] > 0 for x in r[1:]):
+                kept.append(q)
+        for q in learnt:
+            seen[q >> 1] = 0
+        learnt = kept
+
+        backjump = 0
+        if len(learnt) > 1:
+            best = max(range(1, len(learnt)), key=lambda k: level[learnt[k] >> 1])
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            backjump = level[learnt[1] >> 1]
+        return learnt, backjump
+
+    def _bump(self, v: int):
+        act = self._activity[v] + self._var_inc
+        self._activity[v] = act
+        if act > 1e100:
+            self._activity = [a * 1e-100 for a in self._activity]
+            self._var_inc *= 1e-100
+            self._order = [(-self._activity[u], u) for u in range(1, self.num_vars + 1)
+                           if self._values[2 * u] == 0]
+            heapq.heapify(self._order)
+        elif self._values[2 * v] == 0:
+            heapq.heappush(self._order, (-act, v))
+
+    def _pick_branch(self) -> Optional[int]:
+        order = self._order
+        values = self._values
+        activity = self._activity
+        while order:
+            neg_act, v = heapq.heappop(order)
+            if values[2 * v] == 0 and -neg_act == activity[v]:
+                return 2 * v + self._phase[v]
+        # Stale heap entries may hide unassigned variables; rebuild once.
+        free = [v for v in range(1, self.num_vars + 1) if values[2 * v] == 0]
+        if not free:
+            return None
+        v = max(free, key=lambda u: activity[u])
+        for u in free:
+            if u != v:
+                heapq.heappush(order, (-activity[u], u))
+        return 2 * v + self._phase[v]
+
+    def _cancel_until(self, target: int):
+        if len(self._trail_lim) <= target:
+            return
+        values = self._values
+        activity = self._activity
+        order = self._order
+        stop = self._trail_lim[target]
+        for lit in reversed(self._trail[stop:]):
+            v = lit >> 1
+            values[lit] = values[lit ^ 1] = 0
+            self._reason[v] = None
+            self._phase[v] = lit & 1
+            heapq.heappush(order, (-activity[v], v))
+        del self._trail[stop:]
+        del self._trail_lim[target:]
+        self._qhead = min(self._qhead, stop)
+
+    def _reduce_db(self):
+        """Forget the longer half of the learnt clauses that are not reasons."""
+        self.learnts.sort(key=len)
+        keep = len(self.learnts) // 2
+        survivors = self.learnts[:keep]
+        for c in self.learnts[keep:]:
+            v = c[0] >> 1
+            if len(c) <= 2 or (self._reason[v] is c and self._values[c[0]] == 1):
+                survivors.append(c)
+            else:
+                c.clear()                       # watch lists drop it lazily
+        self.learnts = survivors
+        self.max_learnts = int(self.max_learnts * 1.1)
+
+
+class CNFEncoder:
+    """
+    Tseitin encoding of arbiter expressions into a SATSolver.
+
+    Every distinct subexpression gets one solver literal that is constrained
+    to be equivalent to it, so encoding is linear in expression size and
+    shared subexpressions are encoded once.
+    """
+
+    def __init__(self, solver: Optional[SATSolver] = None):
+        self.solver = solver or SATSolver()
+        self.var_ids: Dict[str, int] = {}
+        self._lits: Dict[Expr, int] = {}
+
+    def var(self, name: str) -> int:
+        """Solver variable for a fact name."""
+        v = self.var_ids.get(name)
+        if v is None:
+            v = self.var_ids[name] = self.solver.new_var()
+        return v
+
+    def literal(self, expr: Expr) -> int:
+        """Return a literal equivalent to expr, encoding it if needed."""
+        if isinstance(expr, Var):
+            return 2 * self.var(expr.name)
+        if isinstance(expr, Not):
+            return self.literal(expr.expr) ^ 1
+
+        lit = self._lits.get(expr)
+        if lit is not None:
+            return lit
+
+        add = self.solver.add_clause
+        x = 2 * self.solver.new_var()
+        if isinstance(expr, (And, Or)):
+            ops = [self.literal(e) for e in _flatten(expr, type(expr))]
+            if isinstance(expr, Or):
+                # x <-> (a | b | ...)  ==  !x <-> (!a & !b & ...)
+                x ^= 1
+                ops = [op ^ 1 for op in ops]
+            for op in ops:
+                add([x ^ 1, op])
+            add([x] + [op ^ 1 for op in ops])
+            if isinstance(expr, Or):
+                x ^= 1
+        elif isinstance(expr, Implies):
+            a = self.literal(expr.antecedent)
+            b = self.literal(expr.consequent)
+            add([x ^ 1, a ^ 1, b])
+            add([x, a])
+            add([x, b ^ 1])
+        elif isinstance(expr, Iff):
+            a = self.literal(expr.left)
+            b = self.literal(expr.right)
+            add([x ^ 1, a ^ 1, b])
+            add([x ^ 1, a, b ^ 1])
+            add([x, a, b])
+            add([x, a ^ 1, b ^ 1])
+        else:
+            raise TypeError(f"Cannot encode {expr!r}")
+
+        self._lits[expr] = x
+        return x
+
+    def assert_expr(self, expr: Expr, guard: Optional[int] = None) -> bool:
+        """
+        Constrain expr to be true. Returns False if the solver became UNSAT.
+
+        With a guard literal the constraint only applies when the guard is
+        true, which lets callers switch statements on and off through
+        solve() assumptions.
+        """
+        extra = [] if guard is None else [guard ^ 1]
+        if isinstance(expr, And):
+            return all([self.assert_expr(e, guard) for e in _flatten(expr, And)])
+        if isinstance(expr, Or):
+            return self.solver.add_clause([self.literal(e) for e in _flatten(expr, Or)] + extra)
+        if isinstance(expr, Implies):
+            premises = [self.literal(e) ^ 1 for e in _flatten(expr.antecedent, And)]
+            conclusions = [self.literal(e) for e in _flatten(expr.consequent, Or)]
+            return self.solver.add_clause(premises + conclusions + extra)
+        return self.solver.add_clause([self.literal(expr)] + extra)
+
+
+def _flatten(expr: Expr, op: type) -> List[Expr]:
+    """Operands of a chain of the same binary operator, left to right."""
+    operands = []
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, op):
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            operands.append(node)
+    return operands
+
+
+def satisfiable(exprs: Iterable[Expr]) -> bool:
+    """
+    Check whether the conjunction of exprs has a model.
+
+    Horn sets are decided by forward chaining, small variable counts are
+    enumerated with the compiled evaluator, anything else goes to the SAT
+    solver.
+    """
+    exprs = list(exprs)
+    if not exprs:
+        return True
+    program = horn_program(exprs)
+    if program is not None:
+        return program.consistent
+    variables = set()
+    for expr in exprs:
+        variables |= _variables(expr)
+    if len(variables) <= ENUMERATION_MAX_VARS:
+        return enumerate_satisfiable(exprs)
+
+    encoder = CNFEncoder()
+    for expr in exprs:
+        if not encoder.assert_expr(expr):
+            return False
+    return encoder.solver.solve()
+
+
+# ============================================================================
+# HORN FAST PATH
+# ============================================================================
+#
+# Most extracted facts are atoms, negated atoms and rules like `a & b -> c`:
+# Horn clauses (at most one positive literal). A Horn set is consistent iff
+# forward chaining from its facts never fires a clause with no head, and
+# the atoms it derives form its minimal model. Chaining is linear in the
+# size of the clauses (each clause keeps a count of body atoms not yet
+# derived), so Horn sets skip the SAT solver entirely. Anything else falls
+# back to the general path.
+
+Clause = frozenset      # of (name, polarity) literals, as in as_clause()
+
+
+def clauses_of(expr: Expr) -> Optional[List[Clause]]:
+    """
+    Statement as a list of clauses when it is syntactically a conjunction
+    of clauses (including `premises -> l1 & l2`), else None.
+    """
+    clauses = []
+    for part in _flatten(expr, And):
+        if isinstance(part, Implies):
+            premises = as_clause_literals(_flatten(part.antecedent, And))
+            conclusions = _flatten(part.consequent, And)
+            if premises is not None and len(conclusions) > 1:
+                body = frozenset((name, not positive) for name, positive in premises)
+                for conclusion in conclusions:
+                    literal = as_clause_literals([conclusion])
+                    if literal is None:
+                        return None
+                    clauses.append(body | literal)
+                continue
+        clause = as_clause(part)
+        if clause is None:
+            return None
+        clauses.append(clause)
+    return clauses
+
+
+def is_tautological(clause: Clause) -> bool:
+    return any((name, not positive) in clause for name, positive in clause)
+
+
+@functools.lru_cache(maxsize=65536)
+def horn_clauses(expr: Expr) -> Optional[Tuple[Clause, ...]]:
+    """Non-tautological clauses of a Horn statement, or None if it is not Horn."""
+    clauses = clauses_of(expr)
+    if clauses is None:
+        return None
+    clauses = [clause for clause in clauses if not is_tautological(clause)]
+    if any(sum(positive for _, positive in clause) > 1 for clause in clauses):
+        return None
+    return tuple(clauses)
+
+
+class HornProgram:
+    """
+    Forward chaining over Horn clauses.
+
+    The minimal model is computed once, at construction. Queries extend it
+    with extra atoms through an overlay, leaving the base state untouched,
+    so each query only pays for what it newly derives.
+    """
+
+    def __init__(self, clauses: Iterable[Clause]):
+        self.heads: List[Optional[str]] = []
+        self.remaining: List[int] = []
+        self.watches: Dict[str, List[int]] = {}
+        start = []
+        for clause in clauses:
+            body = [name for name, positive in clause if not positive]
+            head = next((name for name, positive in clause if positive), None)
+            index = len(self.heads)
+            self.heads.append(head)
+            self.remaining.append(len(body))
+            for name in body:
+                self.watches.setdefault(name, []).append(index)
+            if not body:
+                start.append(index)
+
+        self.model: Set[str] = set()
+        self.consistent = True
+        for index in start:
+            head = self.heads[index]
+            if head is None:
+                self.consistent = False
+                return
+            self.model.add(head)
+        overlay = {}
+        derived = self._chain(list(self.model), set(), overlay)
+        if derived is None:
+            self.consistent = False
+            return
+        self.model |= derived
+        for index, left in overlay.items():
+            self.remaining[index] = left
+
+    def _chain(self, queue: List[str], derived: Set[str], overlay: Dict[int, int]) -> Optional[Set[str]]:
+        """Atoms derived from queue beyond the model, or None on a conflict."""
+        model, heads, remaining, watches = self.model, self.heads, self.remaining, self.watches
+        while queue:
+            for index in watches.get(queue.pop(), ()):
+                left = overlay.get(index, remaining[index]) - 1
+                overlay[index] = left
+                if left == 0:
+                    head = heads[index]
+                    if head is None:
+                        return None
+                    if head not in model and head not in derived:
+                        derived.add(head)
+                        queue.append(head)
+        return derived
+
+    def entails_clause(self, clause: Clause) -> bool:
+        """
+        Does the program entail clause? Refutation: assume every negative
+        literal's atom, then look for a conflict or a positive literal.
+        """
+        if not self.consistent or is_tautological(clause):
+            return True
+        assumed = {name for name, positive in clause if not positive}
+        fresh = [name for name in assumed if name not in self.model]
+        derived = self._chain(fresh, set(fresh), {})
+        if derived is None:
+            return True
+        return any(positive and (name in self.model or name in derived)
+                   for name, positive in clause)
+
+    def entails(self, expr: Expr) -> Optional[bool]:
+        """Does the program entail expr? None if expr is not a conjunction of clauses."""
+        clauses = clauses_of(expr)
+        if clauses is None:
+            return None
+        return all(self.entails_clause(clause) for clause in clauses)
+
+
+def horn_program(statements: Iterable[Expr]) -> Optional[HornProgram]:
+    """HornProgram for the statements, or None if any is not Horn."""
+    clauses = []
+    for stmt in statements:
+        stmt_clauses = horn_clauses(stmt)
+        if stmt_clauses is None:
+            return None
+        clauses.extend(stmt_clauses)
+    return HornProgram(clauses)
+
+
+class HornSupport:
+    """
+    Least model of a Horn clause set that stays fixed while clauses are
+    switched off, for redundancy elimination.
+
+    Every atom of the model keeps a supporting clause, and atoms are
+    ranked in derivation order, so a support's body always ranks below
+    its head. Switching off clauses that support nothing leaves the model
+    as it is; otherwise their heads look for another support: first a
+    clause whose body ranks lower, else by rederiving every atom whose
+    support depends on them from the rest of the model. Removals that
+    would shrink the model are refused, which keeps each check
+    proportional to what it touches rather than to the program.
+    """
+
+    def __init__(self, clauses: Iterable[Clause]):
+        self.clauses: List[Clause] = list(clauses)
+        self.heads: List[Optional[str]] = []
+        self.bodies: List[List[str]] = []
+        self.by_head: Dict[str, List[int]] = {}
+        self.watches: Dict[str, List[int]] = {}
+        for index, clause in enumerate(self.clauses):
+            head = next((name for name, positive in clause if positive), None)
+            body = [name for name, positive in clause if not positive]
+            self.heads.append(head)
+            self.bodies.append(body)
+            if head is not None:
+                self.by_head.setdefault(head, []).append(index)
+            for name in body:
+                self.watches.setdefault(name, []).append(index)
+        self.active = [True] * len(self.clauses)
+
+        # Body atoms outside the model, per clause (fixed, as the model is)
+        self.missing = [len(body) for body in self.bodies]
+        self.support: Dict[str, int] = {}
+        self.rank: Dict[str, int] = {}
+        self.consistent = True
+        queue = [index for index, left in enumerate(self.missing) if left == 0]
+        while queue:
+            index = queue.pop()
+            head = self.heads[index]
+            if head is None:
+                self.consistent = False
+                return
+            if head in self.support:
+                continue
+            self.support[head] = index
+            self.rank[head] = len(self.rank)
+            for watcher in self.watches.get(head, ()):
+                self.missing[watcher] -= 1
+                if self.missing[watcher] == 0:
+                    queue.append(watcher)
+        self._next_rank = len(self.rank)
+
+    def remove(self, indices: Iterable[int]) -> bool:
+        """
+        Switch off the clauses at indices if the model stays the same
+        without them; otherwise leave them on and return False.
+        """
+        indices = list(indices)
+        for index in indices:
+            self.active[index] = False
+        support, rank, active, missing = self.support, self.rank, self.active, self.missing
+        lost = []
+        for index in indices:
+            head = self.heads[index]
+            if head is None or support.get(head) != index:
+                continue
+            alternatives = [other for other in self.by_head[head] if active[other] and missing[other] == 0]
+            if not alternatives:
+                self.restore(indices)
+                return False
+            head_rank = rank[head]
+            lower = next((other for other in alternatives
+                          if all(rank[name] < head_rank for name in self.bodies[other])), None)
+            if lower is None:
+                lost.append(head)
+            else:
+                support[head] = lower
+        if lost and not self._resupport(lost):
+            self.restore(indices)
+            return False
+        return True
+
+    def _resupport(self, lost: List[str]) -> bool:
+        """Rederive lost atoms and everything their supports feed from the rest of the model."""
+        support, active, missing, heads = self.support, self.active, self.missing, self.heads
+        affected, queue = set(lost), list(lost)
+        while queue:
+            for index in self.watches.get(queue.pop(), ()):
+                head = heads[index]
+                if head is not None and head not in affected and support.get(head) == index:
+                    affected.add(head)
+                    queue.append(head)
+
+        pending: Dict[int, int] = {}     # clause -> affected body atoms not yet rederived
+        ready = []
+        for name in affected:
+            for index in self.by_head[name]:
+                if active[index] and missing[index] == 0:
+                    pending[index] = sum(atom in affected for atom in self.bodies[index])
+                    if pending[index] == 0:
+                        ready.append(index)
+        order = []
+        derived: Set[str] = set()
+        while ready:
+            index = ready.pop()
+            head = heads[index]
+            if head in derived:
+                continue
+            derived.add(head)
+            order.append((head, index))
+            for watcher in self.watches.get(head, ()):
+                if watcher in pending:
+                    pending[watcher] -= 1
+                    if pending[watcher] == 0:
+                        ready.append(watcher)
+        if len(derived) < len(affected):
+            return False
+        for head, index in order:
+            support[head] = index
+            self.rank[head] = self._next_rank
+            self._next_rank += 1
+        return True
+
+    def restore(self, indices: Iterable[int]):
+        """Switch the clauses at indices back on."""
+        for index in indices:
+            self.active[index] = True
+
+    def entails_clause(self, clause: Clause) -> bool:
+        """
+        Do the clauses switched on entail clause? Their least model is the
+        model, so this is HornProgram.entails_clause() over it.
+        """
+        if is_tautological(clause):
+            return True
+        model = self.support
+        if any(positive and name in model for name, positive in clause):
+            return True
+        fresh = [name for name, positive in clause if not positive and name not in model]
+        derived, queue, overlay = set(fresh), list(fresh), {}
+        active, missing, heads = self.active, self.missing, self.heads
+        while queue:
+            for index in self.watches.get(queue.pop(), ()):
+                if not active[index]:
+                    continue
+                left = overlay.get(index, missing[index]) - 1
+                overlay[index] = left
+                if left == 0:
+                    head = heads[index]
+                    if head is None or (head, True) in clause:
+                        return True
+                    if head not in model and head not in derived:
+                        derived.add(head)
+                        queue.append(head)
+        return False
 
 
 # ============================================================================
@@ -268,43 +1344,36 @@ def parse_all(text: str) -> List[Expr]:
 
 def get_variables(expr: Expr) -> Set[str]:
     """Extract all variable names from an expression."""
-    if isinstance(expr, Var):
-        return {expr.name}
-    elif isinstance(expr, Not):
-        return get_variables(expr.expr)
-    elif isinstance(expr, Implies):
-        return get_variables(expr.antecedent) | get_variables(expr.consequent)
-    elif isinstance(expr, (And, Or, Iff)):
-        return get_variables(expr.left) | get_variables(expr.right)
-    return set()
+    return set(_variables(expr))
+
+
+@functools.lru_cache(maxsize=65536)
+def _variables(expr: Expr) -> frozenset:
+    """Variable names of an expression, cached per (interned) node."""
+    variables = set()
+    visited = set()
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Var):
+            variables.add(node.name)
+        elif node not in visited:
+            visited.add(node)
+            stack.extend(_children(node))
+    return frozenset(variables)
 
 
 def is_tautology(expr: Expr) -> bool:
     """Check if expression is a tautology (always true)."""
-    variables = sorted(get_variables(expr))
-    if not variables:
-        return True
-
-    # Truth table evaluation
-    for i in range(2 ** len(variables)):
-        assignment = {var: bool((i >> j) & 1) for j, var in enumerate(variables)}
-        if not evaluate(expr, assignment):
-            return False
-    return True
+    clauses = clauses_of(expr)
+    if clauses is not None:
+        return all(map(is_tautological, clauses))
+    return not satisfiable([Not(expr)])
 
 
 def is_contradiction(expr: Expr) -> bool:
     """Check if expression is a contradiction (always false)."""
-    variables = sorted(get_variables(expr))
-    if not variables:
-        return False
-
-    # Truth table evaluation
-    for i in range(2 ** len(variables)):
-        assignment = {var: bool((i >> j) & 1) for j, var in enumerate(variables)}
-        if evaluate(expr, assignment):
-            return False
-    return True
+    return not consistent(_flatten(expr, And))
 
 
 def evaluate(expr: Expr, assignment: dict) -> bool:
@@ -326,49 +1395,1120 @@ def evaluate(expr: Expr, assignment: dict) -> bool:
 
 def implies_semantically(facts: List[Expr], expr: Expr) -> bool:
     """Check if facts semantically imply expr."""
-    all_vars = set()
-    for fact in facts:
-        all_vars |= get_variables(fact)
-    all_vars |= get_variables(expr)
+    # facts |= expr  iff  facts & !expr has no model. Only the components
+    # sharing variables with expr take part in that check; the rest only
+    # matter if they are inconsistent on their own. The partition of the
+    # facts is cached, so repeated queries against the same facts do not
+    # partition them again.
+    facts = tuple(facts)
+    owner, components = _fact_components(facts)
+    touched = {owner[name] for name in _variables(expr) if name in owner}
+    relevant = []
+    for k, (indices, component) in enumerate(components):
+        if k in touched:
+            relevant.extend(indices)
+        elif not _component_consistent(component):
+            return True
+    relevant = [facts[i] for i in sorted(relevant)]
+
+    program = _horn_program(frozenset(relevant))
+    if program is not None:
+        entailed = program.entails(expr)
+        if entailed is not None:
+            return entailed
+    return not satisfiable(relevant + [Not(expr)])
+
+
+def consistent(statements: List[Expr]) -> bool:
+    """Check whether the statements have a common model, one component at a time."""
+    statements = list(statements)
+    return all(_component_consistent(frozenset(statements[i] for i in component))
+               for component in partition(statements))
+
+
+# ============================================================================
+# PARTITIONING
+# ============================================================================
+#
+# Statements that share no variables (directly or through other statements)
+# cannot affect each other's satisfiability or redundancy, so every check can
+# run per component. That makes the cost exponential in the largest
+# component rather than in the whole fact base, and lets results be cached
+# per component: a component is a tuple or frozenset of interned nodes, so it
+# hashes cheaply and equal components hit the same cache entry.
+
+COMPONENT_CACHE_SIZE = 4096
+
+
+def partition(statements: List[Expr]) -> List[List[int]]:
+    """
+    Split statement indices into variable-connected components (union-find).
+
+    Components are returned in order of their first statement, and indices
+    within a component are ascending.
+    """
+    parent: Dict[str, str] = {}
+
+    def find(name: str) -> str:
+        root = name
+        while parent[root] != root:
+            root = parent[root]
+        while parent[name] != root:           # path compression
+            parent[name], name = root, parent[name]
+        return root
+
+    anchors = []
+    for stmt in statements:
+        names = iter(_variables(stmt))
+        anchor = next(names)
+        parent.setdefault(anchor, anchor)
+        root = find(anchor)
+        for name in names:
+            other = find(parent.setdefault(name, name))
+            if other != root:
+                parent[other] = root
+        anchors.append(anchor)
+
+    components: Dict[str, List[int]] = {}
+    for i, anchor in enumerate(anchors):
+        components.setdefault(find(anchor), []).append(i)
+    return list(components.values())
+
+
+@functools.lru_cache(maxsize=COMPONENT_CACHE_SIZE)
+def _component_consistent(component: frozenset) -> bool:
+    return satisfiable(component)
+
+
+@functools.lru_cache(maxsize=32)
+def _fact_components(facts: Tuple[Expr, ...]) -> Tuple[Dict[str, int], List[Tuple[List[int], frozenset]]]:
+    """
+    partition() of facts as (indices, statements) pairs, with the
+    component each variable belongs to.
+    """
+    components = [(indices, frozenset(facts[i] for i in indices)) for indices in partition(list(facts))]
+    owner: Dict[str, int] = {}
+    for k, (indices, _) in enumerate(components):
+        for i in indices:
+            owner.update(dict.fromkeys(_variables(facts[i]), k))
+    return owner, components
 
-    if not all_vars:
-        return True
 
-    variables = sorted(all_vars)
+@functools.lru_cache(maxsize=COMPONENT_CACHE_SIZE)
+def _horn_program(component: frozenset) -> Optional[HornProgram]:
+    return horn_program(component)
 
-    # Check: for all assignments where facts are true, expr must be true
-    for i in range(2 ** len(variables)):
-        assignment = {var: bool((i >> j) & 1) for j, var in enumerate(variables)}
 
-        # Check if all facts are satisfied
-        all_facts_true = all(evaluate(fact, assignment) for fact in facts)
+def unsat_core(statements: List[Expr]) -> Optional[List[int]]:
+    """
+    Indices of a minimal inconsistent subset of statements, or None if
+    they are consistent. Only the first inconsistent component is
+    searched, since every minimal core lies within a single component.
+    """
+    for component in sorted(partition(statements)):
+        if not _component_consistent(frozenset(statements[i] for i in component)):
+            core = FactSolver([statements[i] for i in component]).core(range(len(component)))
+            return [component[i] for i in core]
+    return None
+
+
+_COMPRESSED: 'collections.OrderedDict[Tuple[Expr, ...], Tuple[Expr, ...]]' = collections.OrderedDict()
+
+
+def _compress_component(component: Tuple[Expr, ...], deadline: Optional[float] = None) -> Tuple[Expr, ...]:
+    result = _compress_component_cached(component)
+    if result is None:
+        result = tuple(compress_component(list(component), deadline))
+        # A pass cut short by the deadline may have kept redundant statements
+        if deadline is None or time.perf_counter() <= deadline:
+            _remember_compressed(component, result)
+    return result
+
+
+def _compress_component_cached(component: Tuple[Expr, ...]) -> Optional[Tuple[Expr, ...]]:
+    result = _COMPRESSED.get(component)
+    if result is not None:
+        _COMPRESSED.move_to_end(component)
+    return result
+
+
+def _remember_compressed(component: Tuple[Expr, ...], result: Tuple[Expr, ...]):
+    _COMPRESSED[component] = result
+    if len(_COMPRESSED) > COMPONENT_CACHE_SIZE:
+        _COMPRESSED.popitem(last=False)
+
+
+class FactSolver:
+    """
+    Incremental solver over a fixed list of statements.
+
+    Each statement is guarded by a selector literal, so any subset of the
+    statements can be switched on through assumptions. All queries share
+    one SATSolver and therefore everything it learns along the way.
+    """
+
+    def __init__(self, statements: List[Expr]):
+        self.statements = statements
+        self.encoder = CNFEncoder()
+        self.solver = self.encoder.solver
+        self.selectors: List[int] = []
+        for stmt in statements:
+            selector = 2 * self.solver.new_var()
+            self.selectors.append(selector)
+            self.encoder.assert_expr(stmt, guard=selector)
+
+    def consistent(self, active: Iterable[int]) -> bool:
+        """Do the active statements have a common model?"""
+        return self.solver.solve([self.selectors[i] for i in active])
+
+    def entailed(self, index: int, active: Iterable[int]) -> bool:
+        """Do the active statements entail statement `index`?"""
+        negated = self.encoder.literal(self.statements[index]) ^ 1
+        assumptions = [self.selectors[i] for i in active if i != index]
+        return not self.solver.solve(assumptions + [negated])
+
+    def fix(self, index: int, enabled: bool):
+        """Permanently switch a statement on or off."""
+        selector = self.selectors[index]
+        self.solver.add_clause([selector if enabled else selector ^ 1])
+
+    def assignment(self) -> Dict[str, bool]:
+        """The last model found, over the statements' variables."""
+        model = self.solver.model
+        return {name: model[v] for name, v in self.encoder.var_ids.items()}
+
+    def core(self, active: Iterable[int]) -> Optional[List[int]]:
+        """
+        A minimal inconsistent subset of the active statements (indices in
+        order), or None if they are consistent.
+
+        Deletion-based: each statement is dropped in turn and stays dropped
+        if the rest are still inconsistent. Every inconsistent answer also
+        narrows the candidates to the selectors the solver actually used,
+        and every consistent one is extended by model rotation: flipping a
+        variable of the needed statement in the model often falsifies
+        exactly one other candidate, which is then needed too, with no
+        further solve. The number of solves follows the size of the core
+        rather than of the input, and is often far smaller than either.
+        """
+        owner = {selector: i for i, selector in enumerate(self.selectors)}
+        core = sorted(active)
+        by_var = _occurrences(self.statements, core)
+
+        def inconsistent(candidates: List[int]) -> Optional[List[int]]:
+            if self.solver.solve([self.selectors[i] for i in candidates]):
+                return None
+            used = {owner[lit] for lit in self.solver.failed}
+            return [i for i in candidates if i in used] if used else candidates
+
+        def rotate(start: int):
+            """Mark what model rotation proves needed, starting from needed statement start."""
+            stack = [(start, self.assignment())]
+            while stack:
+                i, assignment = stack.pop()
+                for name in _variables(self.statements[i]):
+                    assignment[name] = not assignment[name]
+                    falsified = [j for j in by_var[name]
+                                 if j in members and not evaluate(self.statements[j], assignment)]
+                    if len(falsified) == 1 and falsified[0] not in needed:
+                        needed.add(falsified[0])
+                        stack.append((falsified[0], dict(assignment)))
+                    assignment[name] = not assignment[name]
+
+        core = inconsistent(core)
+        if core is None:
+            return None
+        members, needed = set(core), set()
+        # Every inconsistent subset keeps the needed statements, so
+        # narrowing never removes one and core[:k] (all needed) is stable.
+        k = 0
+        while k < len(core):
+            if core[k] in needed:
+                k += 1
+                continue
+            narrowed = inconsistent(core[:k] + core[k + 1:])
+            if narrowed is None:
+                needed.add(core[k])
+                rotate(core[k])
+                k += 1
+            else:
+                core, members = narrowed, set(narrowed)
+        return core
+
+
+def _occurrences(statements: List[Expr], indices: Iterable[int]) -> Dict[str, List[int]]:
+    """Indices (from indices) of the statements each variable occurs in."""
+    by_var: Dict[str, List[int]] = {}
+    for i in indices:
+        for name in _variables(statements[i]):
+            by_var.setdefault(name, []).append(i)
+    return by_var
+
+
+# Statements with more variables than this are left to the solver
+COUNTERMODEL_MAX_VARS = 8
+# Variable flips allowed to repair the statements a countermodel breaks
+COUNTERMODEL_REPAIRS = 16
+
+
+class Countermodels:
+    """
+    Cheap proofs that a statement is not entailed by the others.
+
+    Holds models of all the statements not dropped yet: the first the
+    solver found, and the latest solver countermodel once repaired to
+    satisfy the statement it refuted. A candidate is falsified in one of
+    them by changing only its own variables; the live statements that
+    breaks are then repaired greedily, each by flipping one of its other
+    variables, for a bounded number of flips. If everything but the
+    candidate ends up true, that is a countermodel and no solve is
+    needed. Dropping statements only removes constraints, so the models
+    stay valid for the whole pass.
+    """
 
-        if all_facts_true:
-            # If facts are true but expr is false, facts don't imply expr
-            if not evaluate(expr, assignment):
+    def __init__(self, statements: List[Expr], model: Dict[str, bool]):
+        self.statements = statements
+        self.models = [model]
+        self.by_var = _occurrences(statements, range(len(statements)))
+        self.dropped: Set[int] = set()
+
+    def drop(self, index: int):
+        self.dropped.add(index)
+
+    def adopt(self, model: Dict[str, bool], index: int):
+        """Take the solver's countermodel to statement index, now kept, as a model to search from."""
+        if self._repair(model, None, set(), {}, {index}):
+            self.models[1:] = [model]
+
+    def refutes(self, index: int) -> bool:
+        """Is there a countermodel to the others entailing statement index?"""
+        stmt = self.statements[index]
+        names = sorted(_variables(stmt))
+        if len(names) > COUNTERMODEL_MAX_VARS:
+            return False
+        for model in reversed(self.models):
+            saved: Dict[str, bool] = {}
+            try:
+                for values in itertools.product((False, True), repeat=len(names)):
+                    for name, value in zip(names, values):
+                        saved.setdefault(name, model[name])
+                        model[name] = value
+                    if not evaluate(stmt, model) and self._repair(model, index, set(names), saved):
+                        return True
+                    model.update(saved)
+                    saved.clear()
+            finally:
+                model.update(saved)
+        return False
+
+    def _broken(self, model: Dict[str, bool], index: Optional[int], name: str) -> Set[int]:
+        """Live statements other than index over name that model falsifies."""
+        return {j for j in self.by_var[name]
+                if j != index and j not in self.dropped and not evaluate(self.statements[j], model)}
+
+    def _repair(self, model: Dict[str, bool], index: Optional[int], frozen: Set[str],
+                saved: Dict[str, bool], broken: Iterable[int] = ()) -> bool:
+        """
+        Flip unfrozen variables of model until every live statement but
+        index holds, starting from broken plus whatever the frozen
+        variables falsify. Original values of flipped variables go to saved.
+        """
+        broken = set(broken)
+        for name in frozen:
+            broken |= self._broken(model, index, name)
+        for _ in range(COUNTERMODEL_REPAIRS):
+            if not broken:
+                return True
+            target = min(broken)
+            best = None
+            for name in sorted(_variables(self.statements[target]) - frozen):
+                model[name] = not model[name]
+                if evaluate(self.statements[target], model):
+                    breaks = self._broken(model, index, name)
+                    if best is None or len(breaks) < len(best[1]):
+                        best = (name, breaks)
+                model[name] = not model[name]
+            if best is None:
                 return False
+            name, breaks = best
+            saved.setdefault(name, model[name])
+            model[name] = not model[name]
+            frozen.add(name)
+            broken = {j for j in broken if not evaluate(self.statements[j], model)} | breaks
+        return not broken
 
-    return True
 
+def as_clause(expr: Expr) -> Optional[frozenset]:
+    """
+    Literal set of a statement that is syntactically a clause, or None.
 
-def compress(statements: List[Expr]) -> List[Expr]:
+    Literals are (name, polarity) pairs. Disjunctions of literals and
+    implications from a conjunction of literals to a disjunction of
+    literals both qualify.
+    """
+    if isinstance(expr, Implies):
+        premises = as_clause_literals(_flatten(expr.antecedent, And))
+        conclusions = as_clause_literals(_flatten(expr.consequent, Or))
+        if premises is None or conclusions is None:
+            return None
+        return frozenset((name, not positive) for name, positive in premises) | conclusions
+    return as_clause_literals(_flatten(expr, Or))
+
+
+def as_clause_literals(operands: List[Expr]) -> Optional[frozenset]:
+    """Literal set of a list of operands, or None if any is not a literal."""
+    literals = set()
+    for operand in operands:
+        if isinstance(operand, Var):
+            literals.add((operand.name, True))
+        elif isinstance(operand, Not) and isinstance(operand.expr, Var):
+            literals.add((operand.expr.name, False))
+        else:
+            return None
+    return frozenset(literals)
+
+
+def drop_subsumed(statements: List[Expr], indices: List[int]) -> List[int]:
+    """
+    Drop clause statements whose literals are a superset of another kept
+    clause (A subsumes A | B). Among equal clauses the first one wins.
+    """
+    clauses = {}
+    occurs: Dict[tuple, List[int]] = {}
+    for i in indices:
+        clause = as_clause(statements[i])
+        if clause:
+            clauses[i] = clause
+            for lit in clause:
+                occurs.setdefault(lit, []).append(i)
+
+    removed = set()
+    for i in sorted(clauses, key=lambda k: (len(clauses[k]), k)):
+        if i in removed:
+            continue
+        clause = clauses[i]
+        rarest = min(clause, key=lambda lit: len(occurs[lit]))
+        for j in occurs[rarest]:
+            if j != i and j not in removed and clause <= clauses[j] \
+                    and (len(clause) < len(clauses[j]) or i < j):
+                removed.add(j)
+
+    return [i for i in indices if i not in removed]
+
+
+def compress(statements: List[Expr], jobs: int = 1, semantic: bool = True,
+             deadline: Optional[float] = None) -> List[Expr]:
     """
     Compress statements by removing redundancies.
 
-    v0: Simple deduplication only.
-    Future: Add tautology removal and semantic redundancy checking
-    with more efficient algorithms (SAT solvers).
+    Duplicates are dropped first (first occurrence wins), then each
+    variable-connected component is compressed independently with
+    compress_component(), using the per-component cache. Survivors keep
+    their original order. With jobs > 1, components are spread over a
+    process pool.
+
+    semantic=False is the cheap mode for tight time budgets: only
+    duplicates and syntactically subsumed clauses are removed, with no
+    solver calls. A deadline (a time.perf_counter() value) is handed to
+    every compress_component() call, so a spent budget leaves the
+    remaining components as they are instead of running on.
     """
     # Remove exact duplicates while preserving order
     seen = set()
-    compressed = []
+    unique = []
 
     for stmt in statements:
         if stmt not in seen:
             seen.add(stmt)
-            compressed.append(stmt)
+            unique.append(stmt)
+
+    if not semantic:
+        return [unique[i] for i in drop_subsumed(unique, list(range(len(unique))))]
+
+    components = [tuple(unique[i] for i in component) for component in partition(unique)]
+    if jobs > 1 and len(components) > 1 and len(unique) >= PARALLEL_MIN_STATEMENTS:
+        compressed = _compress_components_parallel(components, jobs, deadline)
+        if deadline is None or time.perf_counter() <= deadline:
+            for component, result in zip(components, compressed):
+                _remember_compressed(component, result)
+    else:
+        compressed = [_compress_component(component, deadline) for component in components]
+
+    survivors = set()
+    for result in compressed:
+        survivors.update(result)
+    return [stmt for stmt in unique if stmt in survivors]
+
+
+def compress_component(statements: List[Expr], deadline: Optional[float] = None) -> List[Expr]:
+    """
+    Remove redundant statements from a duplicate-free list.
+
+    Passes, in order:
+    1. Tautologies
+    2. Clauses subsumed by a shorter clause
+    3. Statements entailed by the remaining ones, checked from the last
+       statement to the first so earlier statements are preferred
+
+    The entailment checks all run on one incremental FactSolver, or by
+    forward chaining when every statement is Horn. Before each solve,
+    Countermodels tries to show the candidate is not entailed without
+    one, which is the common case and keeps the pass close to linear
+    rather than one full solve per statement. Step 3 is skipped for
+    inconsistent sets, where every statement is entailed. With a deadline
+    (a time.perf_counter() value), step 3 stops once it passes and keeps
+    the statements it has not examined yet.
+    """
+    kept = [i for i, stmt in enumerate(statements) if not is_tautology(stmt)]
+    kept = drop_subsumed(statements, kept)
+    if all(horn_clauses(statements[i]) is not None for i in kept):
+        return compress_horn([statements[i] for i in kept], deadline)
+
+    solver = FactSolver([statements[i] for i in kept])
+    if not solver.consistent(range(len(kept))):
+        return solver.statements
+    countermodels = Countermodels(solver.statements, solver.assignment())
+
+    # Statements after the candidate are already decided and fixed in the
+    # solver, so only the undecided ones before it need to be assumed.
+    kept = []
+    for i in reversed(range(len(solver.statements))):
+        if deadline is not None and time.perf_counter() > deadline:
+            kept.extend(reversed(range(i + 1)))
+            break
+        if countermodels.refutes(i):
+            solver.fix(i, True)
+            kept.append(i)
+        elif solver.entailed(i, range(i)):
+            solver.fix(i, False)
+            countermodels.drop(i)
+        else:
+            solver.fix(i, True)
+            kept.append(i)
+            countermodels.adopt(solver.assignment(), i)
+
+    return [solver.statements[i] for i in reversed(kept)]
+
+
+def compress_horn(statements: List[Expr], deadline: Optional[float] = None) -> List[Expr]:
+    """
+    Step 3 of compress_component() for Horn statements: the same
+    last-to-first entailment pass, on one HornSupport over all of them.
+
+    Dropping an entailed statement never changes the least model, so a
+    candidate whose removal does (HornSupport.remove) is kept, and
+    otherwise each of its clauses is checked against that same model.
+    """
+    clauses = [horn_clauses(stmt) for stmt in statements]
+    support = HornSupport(itertools.chain.from_iterable(clauses))
+    if not support.consistent:
+        return statements
+    owners, start = [], 0
+    for stmt_clauses in clauses:
+        owners.append(range(start, start + len(stmt_clauses)))
+        start += len(stmt_clauses)
+
+    kept: List[int] = []
+    for i in reversed(range(len(statements))):
+        if deadline is not None and time.perf_counter() > deadline:
+            kept.extend(reversed(range(i + 1)))
+            break
+        if not support.remove(owners[i]):
+            kept.append(i)
+        elif not all(support.entails_clause(clause) for clause in clauses[i]):
+            support.restore(owners[i])
+            kept.append(i)
+    return [statements[i] for i in reversed(kept)]
+
+
+# ============================================================================
+# BDD ENGINE
+# ============================================================================
+#
+# Reduced ordered binary decision diagrams. A compiled fact set is a single
+# node; equal functions get the same node (canonicity), so equivalence is an
+# integer comparison and entailment and model counting are single graph
+# passes. Nodes are kept in per-variable unique tables with reference
+# counts, ITE results are memoized, and the variable order is improved by
+# sifting (in-place swaps of adjacent levels), run automatically when the
+# diagram grows. Everything is iterative, so deep diagrams cannot exhaust
+# the Python stack.
+
+class BDDTimeout(Exception):
+    """Raised by a BDD operation once the manager's deadline has passed."""
+
+
+class BDD:
+    """
+    ROBDD manager.
+
+    Nodes are ints: 0 and 1 are the FALSE and TRUE terminals. Node n tests
+    variable _var[n] and continues at _lo[n] when it is false and _hi[n]
+    when it is true. Callers hold on to results with ref()/deref(); nodes
+    nobody references stay usable until collect() or reorder() reclaims
+    them (which also empties the ITE cache, so it never names a freed id).
+    """
+
+    FALSE, TRUE = 0, 1
+    # Automatic reordering starts at this many live nodes and re-arms at
+    # REORDER_GROWTH times the size left by the previous reordering.
+    REORDER_MIN_NODES = 2000
+    REORDER_GROWTH = 2.0
+    # Sifting stops moving a variable once the diagram grows past this
+    # factor of the best size seen, and only the SIFT_MAX_VARS variables
+    # with the most nodes are moved in one reordering.
+    SIFT_MAX_GROWTH = 1.2
+    SIFT_MAX_VARS = 64
+
+    # ITE steps between deadline checks
+    DEADLINE_STRIDE = 1024
+
+    def __init__(self, variables: Iterable[str] = (), auto_reorder: bool = True,
+                 deadline: Optional[float] = None):
+        """deadline (a time.perf_counter() value) bounds every operation; see BDDTimeout."""
+        self.names: List[str] = []          # variable index -> name
+        self.index: Dict[str, int] = {}     # name -> variable index
+        self.order: List[int] = []          # level -> variable index
+        self.level: List[int] = []          # variable index -> level
+        self._var = [-1, -1]
+        self._lo = [0, 1]
+        self._hi = [0, 1]
+        self._ref = [1, 1]
+        self._unique: List[Dict[Tuple[int, int], int]] = []
+        self._free: List[int] = []
+        self._cache: Dict[Tuple[int, int, int], int] = {}
+        self.live = 0
+        self.auto_reorder = auto_reorder
+        self._reorder_at = self.REORDER_MIN_NODES
+        self.deadline = deadline
+        for name in variables:
+            self.declare(name)
+
+    # -- variables and nodes -------------------------------------------------
+
+    def declare(self, name: str) -> int:
+        """Variable index for name, adding it below all others if new."""
+        v = self.index.get(name)
+        if v is None:
+            v = self.index[name] = len(self.names)
+            self.names.append(name)
+            self.level.append(len(self.order))
+            self.order.append(v)
+            self._unique.append({})
+        return v
+
+    def var(self, name: str) -> int:
+        return self._mk(self.declare(name), self.FALSE, self.TRUE)
+
+    def _level(self, n: int) -> int:
+        return self.level[self._var[n]] if n > 1 else len(self.order)
+
+    def _mk(self, v: int, lo: int, hi: int) -> int:
+        if lo == hi:
+            return lo
+        table = self._unique[v]
+        n = table.get((lo, hi))
+        if n is None:
+            if self._free:
+                n = self._free.pop()
+                self._var[n], self._lo[n], self._hi[n], self._ref[n] = v, lo, hi, 0
+            else:
+                n = len(self._var)
+                self._var.append(v)
+                self._lo.append(lo)
+                self._hi.append(hi)
+                self._ref.append(0)
+            table[(lo, hi)] = n
+            self._ref[lo] += 1
+            self._ref[hi] += 1
+            self.live += 1
+        return n
+
+    def ref(self, n: int) -> int:
+        self._ref[n] += 1
+        return n
+
+    def deref(self, n: int):
+        """Drop a reference; the node is reclaimed by the next collect()."""
+        if n > 1:
+            self._ref[n] -= 1
+
+    def _release(self, n: int):
+        """Drop a reference and free whatever becomes unreferenced."""
+        stack = [n]
+        while stack:
+            n = stack.pop()
+            if n <= 1:
+                continue
+            self._ref[n] -= 1
+            if self._ref[n] == 0:
+                del self._unique[self._var[n]][(self._lo[n], self._hi[n])]
+                stack.append(self._lo[n])
+                stack.append(self._hi[n])
+                self._var[n] = -1
+                self._free.append(n)
+                self.live -= 1
+
+    def collect(self):
+        """Free every node that is not reachable from a referenced node."""
+        for n in range(2, len(self._var)):
+            if self._var[n] >= 0 and self._ref[n] == 0:
+                self._ref[n] = 1
+                self._release(n)
+        self._cache.clear()
+
+    # -- operations ----------------------------------------------------------
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        """if f then g else h."""
+        cache, results = self._cache, []
+        stack = [(f, g, h, -1)]
+        steps = 0
+        while stack:
+            steps += 1
+            if steps % self.DEADLINE_STRIDE == 0:
+                self._check_deadline()
+            f, g, h, v = stack.pop()
+            if v >= 0:
+                hi = results.pop()
+                lo = results.pop()
+                r = self._mk(v, lo, hi)
+                cache[(f, g, h)] = r
+                results.append(r)
+                continue
+
+            if f == 1 or g == h:
+                results.append(g)
+                continue
+            if f == 0:
+                results.append(h)
+                continue
+            if g == 1 and h == 0:
+                results.append(f)
+                continue
+            r = cache.get((f, g, h))
+            if r is not None:
+                results.append(r)
+                continue
+
+            top = min(self._level(f), self._level(g), self._level(h))
+            v = self.order[top]
+            (f0, f1), (g0, g1), (h0, h1) = (self._cofactors(x, v) for x in (f, g, h))
+            stack.append((f, g, h, v))
+            stack.append((f1, g1, h1, -1))
+            stack.append((f0, g0, h0, -1))
+        return results[0]
+
+    def _cofactors(self, n: int, v: int) -> Tuple[int, int]:
+        if n > 1 and self._var[n] == v:
+            return self._lo[n], self._hi[n]
+        return n, n
+
+    def neg(self, f: int) -> int:
+        return self.ite(f, self.FALSE, self.TRUE)
+
+    def conj(self, f: int, g: int) -> int:
+        return self.ite(f, g, self.FALSE)
+
+    def compile(self, expr: Expr) -> int:
+        """Node for expr (unreferenced)."""
+        built: Dict[Expr, int] = {}
+        stack = [(expr, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in built:
+                continue
+            if isinstance(node, Var):
+                built[node] = self.var(node.name)
+                continue
+            children = _children(node)
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children)
+                continue
+            a = built[children[0]]
+            if isinstance(node, Not):
+                built[node] = self.neg(a)
+                continue
+            b = built[children[1]]
+            if isinstance(node, And):
+                built[node] = self.ite(a, b, self.FALSE)
+            elif isinstance(node, Or):
+                built[node] = self.ite(a, self.TRUE, b)
+            elif isinstance(node, Implies):
+                built[node] = self.ite(a, b, self.TRUE)
+            else:
+                built[node] = self.ite(a, b, self.neg(b))
+        return built[expr]
+
+    def compile_facts(self, statements: Iterable[Expr]) -> int:
+        """
+        Referenced node for the conjunction of statements, combined
+        pairwise so each conjunction is between diagrams of similar size.
+        """
+        nodes = [self.ref(self.compile(stmt)) for stmt in statements] or [self.TRUE]
+        while len(nodes) > 1:
+            if self.FALSE in nodes:
+                for n in nodes:
+                    self.deref(n)
+                return self.FALSE
+            merged = []
+            for f, g in zip(nodes[::2], nodes[1::2]):
+                merged.append(self.ref(self.conj(f, g)))
+                self.deref(f)
+                self.deref(g)
+                if self.auto_reorder and self.live >= self._reorder_at:
+                    self.collect()
+                    if self.live >= self._reorder_at:
+                        self.reorder()
+            nodes = merged + nodes[len(merged) * 2:]
+        return nodes[0]
+
+    def evaluate(self, f: int, assignment: Dict[str, bool]) -> bool:
+        while f > 1:
+            f = self._hi[f] if assignment[self.names[self._var[f]]] else self._lo[f]
+        return f == self.TRUE
+
+    def false_clauses(self, f: int, limit: int) -> Optional[List[Clause]]:
+        """
+        Each path from f to FALSE negated into a clause, so that their
+        conjunction is f; None if there are more than limit.
+        """
+        found, stack = [], [(f, frozenset())]
+        while stack:
+            n, clause = stack.pop()
+            if n == self.FALSE:
+                found.append(clause)
+                if len(found) > limit:
+                    return None
+            elif n != self.TRUE:
+                name = self.names[self._var[n]]
+                stack.append((self._lo[n], clause | {(name, True)}))
+                stack.append((self._hi[n], clause | {(name, False)}))
+        return found
+
+    def implies(self, f: int, g: int) -> bool:
+        """Does f entail g?"""
+        return self.ite(f, g, self.TRUE) == self.TRUE
+
+    def count(self, f: int) -> int:
+        """Models of f over all declared variables."""
+        counts = {0: 0, 1: 1}
+        stack = [f]
+        while stack:
+            n = stack[-1]
+            if n in counts:
+                stack.pop()
+                continue
+            lo, hi = self._lo[n], self._hi[n]
+            pending = [child for child in (lo, hi) if child not in counts]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            level = self._level(n)
+            counts[n] = (counts[lo] << (self._level(lo) - level - 1)) + \
+                        (counts[hi] << (self._level(hi) - level - 1))
+        return counts[f] << self._level(f)
+
+    # -- reordering ----------------------------------------------------------
+
+    def reorder(self):
+        """Sift every variable to its best level, largest levels first."""
+        self.collect()
+        by_size = sorted(range(len(self.names)), key=lambda v: -len(self._unique[v]))
+        for v in by_size[:self.SIFT_MAX_VARS]:
+            self._sift(v)
+        self._cache.clear()
+        self._reorder_at = max(self.REORDER_MIN_NODES, int(self.live * self.REORDER_GROWTH))
+
+    def _sift(self, v: int):
+        last = len(self.order) - 1
+        best_size, best = self.live, self.level[v]
+        limit = best_size * self.SIFT_MAX_GROWTH
+
+        pos = self.level[v]
+        while pos < last and self.live <= limit:
+            self._swap(pos)
+            pos += 1
+            if self.live < best_size:
+                best_size, best, limit = self.live, pos, self.live * self.SIFT_MAX_GROWTH
+        while pos > 0 and (self.live <= limit or pos > best):
+            self._swap(pos - 1)
+            pos -= 1
+            if self.live < best_size:
+                best_size, best, limit = self.live, pos, self.live * self.SIFT_MAX_GROWTH
+        while pos < best:
+            self._swap(pos)
+            pos += 1
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BDDTimeout()
+
+    def _swap(self, i: int):
+        """
+        Exchange the variables at levels i and i + 1 in place.
+
+        Node ids keep their functions: x nodes that depend on y are
+        rewritten into y nodes over new x nodes, everything else only
+        changes level. Requires every live node to be referenced.
+        """
+        self._check_deadline()
+        x, y = self.order[i], self.order[i + 1]
+        self.order[i], self.order[i + 1] = y, x
+        self.level[x], self.level[y] = i + 1, i
+        x_table, y_table = self._unique[x], self._unique[y]
+        var, lo_of, hi_of, ref = self._var, self._lo, self._hi, self._ref
+
+        for (lo, hi), n in list(x_table.items()):
+            lo_y, hi_y = var[lo] == y if lo > 1 else False, var[hi] == y if hi > 1 else False
+            if not (lo_y or hi_y):
+                continue
+            f00, f01 = (lo_of[lo], hi_of[lo]) if lo_y else (lo, lo)
+            f10, f11 = (lo_of[hi], hi_of[hi]) if hi_y else (hi, hi)
+            del x_table[(lo, hi)]
+            new_lo = self._mk(x, f00, f10)
+            ref[new_lo] += 1
+            new_hi = self._mk(x, f01, f11)
+            ref[new_hi] += 1
+            var[n], lo_of[n], hi_of[n] = y, new_lo, new_hi
+            y_table[(new_lo, new_hi)] = n
+            self._release(lo)
+            self._release(hi)
+
+
+def _bdd_components(*fact_sets: List[Expr]) -> List[List[List[Expr]]]:
+    """
+    Split several fact sets along the variable components of their union;
+    one entry per component, holding each set's statements in it.
+    """
+    combined = [stmt for facts in fact_sets for stmt in facts]
+    owner = [k for k, facts in enumerate(fact_sets) for _ in facts]
+    groups = []
+    for component in partition(combined):
+        parts: List[List[Expr]] = [[] for _ in fact_sets]
+        for i in component:
+            parts[owner[i]].append(combined[i])
+        groups.append(parts)
+    return groups
+
+
+def bdd_equivalent(a: List[Expr], b: List[Expr]) -> bool:
+    """
+    Do two fact sets have the same models? Compared one variable component
+    at a time (with a shared BDD each, so the test is node identity); two
+    inconsistent sets are equivalent.
+    """
+    differs = False
+    consistent_a = consistent_b = True
+    for part_a, part_b in _bdd_components(a, b):
+        bdd = BDD()
+        f, g = bdd.compile_facts(part_a), bdd.compile_facts(part_b)
+        consistent_a &= f != BDD.FALSE
+        consistent_b &= g != BDD.FALSE
+        differs |= f != g
+    if not (consistent_a or consistent_b):
+        return True
+    return not differs and consistent_a == consistent_b
+
+
+def count_models(statements: List[Expr]) -> int:
+    """Number of assignments to the statements' variables satisfying all of them."""
+    total = 1
+    for (part,) in _bdd_components(statements):
+        bdd = BDD()
+        total *= bdd.count(bdd.compile_facts(part))
+    return total
+
+
+# ============================================================================
+# MINIMIZATION
+# ============================================================================
+#
+# Minimal-cover output. Each variable component is rewritten as a small set
+# of prime implicates (entailed clauses none of whose literals can be
+# dropped) that together are equivalent to it. Components of up to
+# QM_MAX_VARS variables are solved exactly: Quine-McCluskey over the
+# component's falsifying assignments gives every prime, and a branch and
+# bound picks the cheapest cover. Larger components start from their own
+# clauses (or the BDD's paths to FALSE) and are improved Espresso style,
+# expanding each clause to a prime and then dropping clauses the others
+# entail, with entailment answered by the component's BDD. A component
+# keeps its original statements when those print shorter, and components
+# not reached before the deadline are left as they are.
+
+QM_MAX_VARS = 8
+MINIMIZE_BUDGET_MS = 500.0
+MAX_INITIAL_CLAUSES = 4096
+
+Cube = Tuple[int, int]      # (mask, value): the variables in mask are fixed to value
+
+
+def clause_expr(clause: Clause) -> Expr:
+    """Clause as an arbiter statement, written as a rule where it has a body."""
+    negative = sorted(name for name, positive in clause if not positive)
+    positive = sorted(name for name, positive in clause if positive)
+    chain = lambda op, names: functools.reduce(op, map(Var, names))
+    if negative and positive:
+        return Implies(chain(And, negative), chain(Or, positive))
+    if positive:
+        return chain(Or, positive)
+    if len(negative) == 1:
+        return Not(Var(negative[0]))
+    return Implies(chain(And, negative[:-1]), Not(Var(negative[-1])))
+
+
+def _prime_cubes(minterms: Iterable[int], width: int) -> List[Cube]:
+    """Quine-McCluskey: all prime cubes of a set of minterms."""
+    level = {((1 << width) - 1, m) for m in minterms}
+    primes = []
+    while level:
+        merged, nxt = set(), set()
+        for mask, value in level:
+            bits = mask
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                partner = (mask, value ^ bit)
+                if partner in level:
+                    nxt.add((mask ^ bit, value & ~bit))
+                    merged.add((mask, value))
+                    merged.add(partner)
+        primes.extend(level - merged)
+        level = nxt
+    return primes
+
+
+def _cheapest_cover(rows: List[int], cubes: List[Cube], deadline: float) -> List[Cube]:
+    """
+    Cheapest set of cubes covering every row (cost: literals + 1 per cube).
+    Greedy first, then branch and bound until the deadline.
+    """
+    covers = [frozenset(r for r, m in enumerate(rows) if m & mask == value)
+              for mask, value in cubes]
+    cost = [bin(mask).count('1') + 1 for mask, _ in cubes]
+    by_row: List[List[int]] = [[] for _ in rows]
+    for c, covered in enumerate(covers):
+        for r in covered:
+            by_row[r].append(c)
+    for options in by_row:
+        options.sort(key=lambda c: (cost[c], -len(covers[c])))
+
+    uncovered, best = set(range(len(rows))), []
+    while uncovered:
+        c = max(range(len(cubes)), key=lambda c: len(covers[c] & uncovered) / cost[c])
+        best.append(c)
+        uncovered -= covers[c]
+    best_cost = sum(cost[c] for c in best)
+
+    def search(uncovered: frozenset, chosen: List[int], spent: int):
+        nonlocal best, best_cost
+        if spent >= best_cost or time.perf_counter() > deadline:
+            return
+        if not uncovered:
+            best, best_cost = list(chosen), spent
+            return
+        row = min(uncovered, key=lambda r: len(by_row[r]))
+        for c in by_row[row]:
+            chosen.append(c)
+            search(uncovered - covers[c], chosen, spent + cost[c])
+            chosen.pop()
+
+    search(frozenset(range(len(rows))), [], 0)
+    return [cubes[c] for c in best]
+
+
+def _qm_cover(bdd: BDD, f: int, deadline: float) -> List[Clause]:
+    names = bdd.names
+    zeros = [m for m in range(1 << len(names))
+             if not bdd.evaluate(f, {name: bool(m >> k & 1) for k, name in enumerate(names)})]
+    cover = _cheapest_cover(zeros, _prime_cubes(zeros, len(names)), deadline)
+    # A cube of falsifying assignments is the negation of a clause
+    return [frozenset((name, not value >> k & 1) for k, name in enumerate(names) if mask >> k & 1)
+            for mask, value in cover]
+
+
+def _espresso_cover(statements: List[Expr], clauses: List[Clause],
+                    deadline: float) -> Optional[List[Expr]]:
+    """
+    Expand each clause to a prime implicate of statements, then drop the
+    clauses the others entail. The set stays equivalent at every step, so
+    stopping at the deadline is safe. None for inconsistent statements.
+    """
+    program = horn_program(statements)
+    if program is not None:
+        if not program.consistent:
+            return None
+        entails = program.entails_clause
+    else:
+        encoder = CNFEncoder()
+        for stmt in statements:
+            encoder.assert_expr(stmt)
+        if not encoder.solver.solve():
+            return None
+        literal = lambda name, positive: 2 * encoder.var(name) ^ (not positive)
+        # statements entail a clause iff they cannot falsify it
+        entails = lambda clause: not encoder.solver.solve([literal(*lit) ^ 1 for lit in clause])
+
+    expanded = set()
+    for clause in clauses:
+        for lit in sorted(clause):
+            if time.perf_counter() > deadline:
+                break
+            smaller = clause - {lit}
+            if smaller and entails(smaller):
+                clause = smaller
+        expanded.add(clause)
+    cover = sorted(expanded, key=lambda clause: (len(clause), sorted(clause)))
+    return compress_component([clause_expr(clause) for clause in cover], deadline)
+
 
-    return compressed
+def _minimize_component(statements: List[Expr], deadline: float) -> Optional[List[Expr]]:
+    """Equivalent clause cover for one component, or None to keep it as is."""
+    variables = set().union(*map(_variables, statements))
+    try:
+        if len(variables) <= QM_MAX_VARS:
+            bdd = BDD(sorted(variables), deadline=deadline)
+            f = bdd.compile_facts(statements)
+            if f == BDD.FALSE:
+                return None     # keep contradictions visible as written
+            cover = _qm_cover(bdd, f, deadline)
+            return [clause_expr(clause) for clause in sorted(cover, key=lambda c: (len(c), sorted(c)))]
+
+        clauses = []
+        for stmt in statements:
+            parts = clauses_of(stmt)
+            if parts is None:
+                if time.perf_counter() > deadline:
+                    return None
+                bdd = BDD(deadline=deadline)
+                clauses = bdd.false_clauses(bdd.compile_facts(statements), MAX_INITIAL_CLAUSES)
+                if clauses is None:
+                    return None
+                break
+            clauses.extend(parts)
+    except BDDTimeout:
+        return None
+    return _espresso_cover(statements, [clause for clause in clauses if not is_tautological(clause)],
+                           deadline)
+
+
+def minimal_cover(statements: List[Expr], budget_ms: float = MINIMIZE_BUDGET_MS) -> List[Expr]:
+    """
+    Equivalent statements as a minimal set of prime implicates per
+    component, where that is shorter than the original.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    result = []
+    for component in sorted(partition(statements)):
+        original = [statements[i] for i in component]
+        if time.perf_counter() < deadline:
+            cover = _minimize_component(original, deadline)
+            if cover is not None and len(format_facts(cover)) < len(format_facts(original)):
+                original = cover
+        result.extend(original)
+    return result
 
 
 # ============================================================================
@@ -393,55 +2533,1031 @@ def format_expr(expr: Expr, parent_precedence: int = 0) -> str:
         result = f"{left} | {right}"
         return f"({result})" if parent_precedence > 1 else result
     elif isinstance(expr, Implies):
-        left = format_expr(expr.antecedent, 0)
-        right = format_expr(expr.consequent, 0)
-        return f"{left} -> {right}"
+        left = format_expr(expr.antecedent, 1)
+        right = format_expr(expr.consequent, 1)
+        result = f"{left} -> {right}"
+        return f"({result})" if parent_precedence > 0 else result
     elif isinstance(expr, Iff):
-        left = format_expr(expr.left, 0)
-        right = format_expr(expr.right, 0)
-        return f"{left} <-> {right}"
+        left = format_expr(expr.left, 1)
+        right = format_expr(expr.right, 1)
+        result = f"{left} <-> {right}"
+        return f"({result})" if parent_precedence > 0 else result
     return str(expr)
 
 
-def format_facts(statements: List[Expr]) -> str:
-    """Format list of statements as arbiter syntax."""
+def format_facts(statements: List[Expr], minimal: bool = False,
+                 budget_ms: float = MINIMIZE_BUDGET_MS) -> str:
+    """Format list of statements as arbiter syntax, optionally as a minimal cover."""
+    if minimal:
+        statements = minimal_cover(statements, budget_ms)
     return '\n'.join(format_expr(stmt) for stmt in statements)
 
 
+# ============================================================================
+# SERIALIZATION
+# ============================================================================
+#
+# Compact, pickle-friendly form of a statement list: a string table of
+# variable names, a postorder array of distinct nodes (three ints each:
+# opcode, operand, operand) and the node index of every statement. Shared
+# subtrees are written once, and unpacking goes through the constructors so
+# the result is interned again. FactFile stores the same arrays on disk
+# (.arbc) and reads them back through mmap, with no parsing.
+
+OP_VAR, OP_NOT, OP_AND, OP_OR, OP_IMPLIES, OP_IFF = range(6)
+
+_OPCODES = {Var: OP_VAR, Not: OP_NOT, And: OP_AND, Or: OP_OR, Implies: OP_IMPLIES, Iff: OP_IFF}
+_BINARY = {OP_AND: And, OP_OR: Or, OP_IMPLIES: Implies, OP_IFF: Iff}
+
+
+class PackedFacts(NamedTuple):
+    """Flat encoding of a statement list (see pack_statements)."""
+    names: List[str]
+    nodes: array.array      # 'I', three entries per node
+    roots: array.array      # 'I', one node index per statement
+
+
+def pack_statements(statements: List[Expr]) -> PackedFacts:
+    """Encode statements as a string table plus postorder node array."""
+    names: Dict[str, int] = {}
+    index: Dict[Expr, int] = {}
+    nodes = array.array('I')
+    roots = array.array('I')
+
+    for stmt in statements:
+        stack = [(stmt, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in index:
+                continue
+            if isinstance(node, Var):
+                entry = (OP_VAR, names.setdefault(node.name, len(names)), 0)
+            else:
+                children = _children(node)
+                if not expanded:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in children)
+                    continue
+                operands = [index[child] for child in children] + [0]
+                entry = (_OPCODES[type(node)], operands[0], operands[1])
+            index[node] = len(nodes) // 3
+            nodes.extend(entry)
+        roots.append(index[stmt])
+
+    return PackedFacts(list(names), nodes, roots)
+
+
+def unpack_statements(packed: PackedFacts) -> List[Expr]:
+    """
+    Rebuild the statements encoded by pack_statements. Raises ValueError
+    on malformed data: a child may only refer to an earlier node, so a
+    bad index or opcode shows up as a failed lookup.
+    """
+    names, nodes, roots = packed
+    built: List[Expr] = []
+    try:
+        for k in range(0, len(nodes), 3):
+            op, a, b = nodes[k], nodes[k + 1], nodes[k + 2]
+            if op == OP_VAR:
+                built.append(Var(names[a]))
+            elif op == OP_NOT:
+                built.append(Not(built[a]))
+            else:
+                built.append(_BINARY[op](built[a], built[b]))
+        return [built[root] for root in roots]
+    except (IndexError, KeyError):
+        raise ValueError(f"Malformed fact data at node {len(built)}") from None
+
+
+def _uint32s(buffer: memoryview) -> Union[memoryview, array.array]:
+    """Little-endian uint32 data as an indexable sequence, in place where possible."""
+    import sys
+
+    if sys.byteorder == 'little':
+        return buffer.cast('I')
+    values = array.array('I')
+    values.frombytes(buffer)
+    values.byteswap()
+    return values
+
+
+class FactFile:
+    """
+    A fact set in the binary .arbc format, memory-mapped.
+
+    Layout: header (magic, version, counts), the string table as end
+    offsets plus UTF-8 name bytes (padded to 4 bytes), then the
+    PackedFacts node array and statement roots, all little-endian uint32.
+    Opening reads only the header: the arrays are used in place, names
+    are decoded on first use and statement(i) rebuilds a single statement.
+    The data is checked as it is read, and anything malformed raises
+    ValueError.
+    """
+
+    MAGIC = b'ARBC'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHHIIII')    # magic, version, reserved, names, name bytes, nodes, roots
+    SUFFIX = '.arbc'
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            header = f.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                header = bytes(self.HEADER.size)
+            magic, version, _, names, name_bytes, nodes, roots = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"Not an arbiter fact file (or unsupported version): {self.path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        sizes = [4 * (names + 1), -name_bytes // 4 * -4, 12 * nodes, 4 * roots]
+        if len(self._map) < self.HEADER.size + sum(sizes):
+            self._map.close()
+            raise ValueError(f"Truncated arbiter fact file: {self.path}")
+        # Every view is kept so close() can release them before the map
+        self._views = [memoryview(self._map)]
+        pos = self.HEADER.size
+        for size in sizes:
+            self._views.append(self._views[0][pos:pos + size])
+            pos += size
+        self._ends, self.nodes, self.roots = (_uint32s(self._views[k]) for k in (1, 3, 4))
+        self._views.extend(view for view in (self._ends, self.nodes, self.roots)
+                           if isinstance(view, memoryview))
+        self._name_bytes = self._views[2]
+        self._names: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.roots)
+
+    def __enter__(self) -> 'FactFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._map.close()
+
+    def _corrupt(self, detail: str) -> ValueError:
+        return ValueError(f"Corrupt arbiter fact file: {self.path} ({detail})")
+
+    def name(self, index: int) -> str:
+        name = self._names.get(index)
+        if name is None:
+            if index + 1 >= len(self._ends):
+                raise self._corrupt(f"no name {index}")
+            start, end = self._ends[index], self._ends[index + 1]
+            if not start <= end <= len(self._name_bytes):
+                raise self._corrupt(f"name {index} out of bounds")
+            try:
+                name = self._names[index] = bytes(self._name_bytes[start:end]).decode()
+            except UnicodeDecodeError:
+                raise self._corrupt(f"name {index} is not UTF-8") from None
+        return name
+
+    def packed(self) -> PackedFacts:
+        return PackedFacts([self.name(i) for i in range(len(self._ends) - 1)], self.nodes, self.roots)
+
+    def statements(self) -> List[Expr]:
+        try:
+            return unpack_statements(self.packed())
+        except ValueError as e:
+            raise self._corrupt(str(e)) from None
+
+    def statement(self, i: int) -> Expr:
+        """Rebuild statement i from the nodes it reaches."""
+        nodes, built = self.nodes, {}
+        if self.roots[i] >= len(nodes) // 3:
+            raise self._corrupt(f"statement {i} has no node")
+        stack = [self.roots[i]]
+        while stack:
+            k = stack[-1]
+            if k in built:
+                stack.pop()
+                continue
+            op, a, b = nodes[3 * k], nodes[3 * k + 1], nodes[3 * k + 2]
+            if op == OP_VAR:
+                built[k] = Var(self.name(a))
+                continue
+            # Children come before their parent, which also rules out cycles
+            if op not in _BINARY and op != OP_NOT:
+                raise self._corrupt(f"node {k} has opcode {op}")
+            if a >= k or (op != OP_NOT and b >= k):
+                raise self._corrupt(f"node {k} refers forward")
+            pending = [child for child in ((a,) if op == OP_NOT else (a, b)) if child not in built]
+            if pending:
+                stack.extend(pending)
+                continue
+            built[k] = Not(built[a]) if op == OP_NOT else _BINARY[op](built[a], built[b])
+        return built[self.roots[i]]
+
+    @classmethod
+    def write(cls, path: Union[str, Path], statements: List[Expr]):
+        """Write statements as an .arbc file (atomically)."""
+        import sys
+
+        names, nodes, roots = pack_statements(statements)
+        encoded = [name.encode() for name in names]
+        ends = array.array('I', itertools.accumulate(map(len, encoded), initial=0))
+        blob = b''.join(encoded)
+        blob += bytes(-len(blob) % 4)
+        if sys.byteorder != 'little':
+            for values in (ends, nodes, roots):
+                values.byteswap()
+
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, len(names), len(blob),
+                                    len(nodes) // 3, len(roots)))
+            f.write(ends.tobytes())
+            f.write(blob)
+            f.write(nodes.tobytes())
+            f.write(roots.tobytes())
+        os.replace(tmp, path)
+
+
+# ============================================================================
+# PARALLEL EXECUTION
+# ============================================================================
+#
+# Opt-in fan-out of independent work (per-statement contradiction checks,
+# per-component compression) to a process pool. Work travels as
+# PackedFacts, results come back as plain lists and are reassembled in
+# input order, so output is identical to the serial path.
+
+# Below this many statements a pool costs more than it saves.
+PARALLEL_MIN_STATEMENTS = 256
+
+_EXECUTORS: Dict[int, concurrent.futures.ProcessPoolExecutor] = {}
+
+
+def _executor(jobs: int) -> concurrent.futures.ProcessPoolExecutor:
+    """Process pool with `jobs` workers, created once per process."""
+    executor = _EXECUTORS.get(jobs)
+    if executor is None:
+        executor = _EXECUTORS[jobs] = concurrent.futures.ProcessPoolExecutor(max_workers=jobs)
+    return executor
+
+
+def _balanced_batches(sizes: List[int], count: int) -> List[List[int]]:
+    """Assign item indices to `count` batches, largest first, to even out total size."""
+    batches: List[List[int]] = [[] for _ in range(count)]
+    loads = [(0, b) for b in range(count)]
+    for i in sorted(range(len(sizes)), key=lambda k: -sizes[k]):
+        load, b = heapq.heappop(loads)
+        batches[b].append(i)
+        heapq.heappush(loads, (load + sizes[i], b))
+    return [sorted(batch) for batch in batches if batch]
+
+
+def _contradiction_worker(packed: PackedFacts) -> List[bool]:
+    return [is_contradiction(stmt) for stmt in unpack_statements(packed)]
+
+
+def _compress_worker(packed: PackedFacts, bounds: List[int],
+                     wall_deadline: Optional[float] = None) -> List[List[int]]:
+    """
+    Compress each statements[bounds[k]:bounds[k+1]] slice; return kept
+    positions. wall_deadline is a time.time() value, since
+    time.perf_counter() values do not carry across processes.
+    """
+    statements = unpack_statements(packed)
+    deadline = None
+    if wall_deadline is not None:
+        deadline = time.perf_counter() + (wall_deadline - time.time())
+    results = []
+    for start, end in zip(bounds, bounds[1:]):
+        component = statements[start:end]
+        kept = set(compress_component(component, deadline))
+        results.append([i for i, stmt in enumerate(component) if stmt in kept])
+    return results
+
+
+def check_contradictions(statements: List[Expr], jobs: int = 1) -> List[bool]:
+    """is_contradiction() for every statement, optionally across `jobs` processes."""
+    unique = list(dict.fromkeys(statements))
+    if jobs <= 1 or len(unique) < PARALLEL_MIN_STATEMENTS:
+        results = dict(zip(unique, map(is_contradiction, unique)))
+    else:
+        chunk = -(-len(unique) // (jobs * 4))
+        chunks = [unique[k:k + chunk] for k in range(0, len(unique), chunk)]
+        packed = [pack_statements(c) for c in chunks]
+        results = {}
+        for part, flags in zip(chunks, _executor(jobs).map(_contradiction_worker, packed)):
+            results.update(zip(part, flags))
+    return [results[stmt] for stmt in statements]
+
+
+def _compress_components_parallel(components: List[Tuple[Expr, ...]], jobs: int,
+                                  deadline: Optional[float] = None) -> List[Tuple[Expr, ...]]:
+    """compress_component() over many components using a process pool."""
+    results: List[Optional[Tuple[Expr, ...]]] = [None] * len(components)
+    pending = []
+    for k, component in enumerate(components):
+        key = _compress_component_cached(component)
+        if key is not None:
+            results[k] = key
+        else:
+            pending.append(k)
+
+    batches = _balanced_batches([len(components[k]) for k in pending], jobs * 4)
+    wall_deadline = None
+    if deadline is not None:
+        wall_deadline = time.time() + (deadline - time.perf_counter())
+    futures = []
+    for batch in batches:
+        members = [pending[b] for b in batch]
+        statements: List[Expr] = []
+        bounds = [0]
+        for k in members:
+            statements.extend(components[k])
+            bounds.append(len(statements))
+        futures.append((members, _executor(jobs).submit(
+            _compress_worker, pack_statements(statements), bounds, wall_deadline)))
+
+    for members, future in futures:
+        for k, kept in zip(members, future.result()):
+            results[k] = tuple(components[k][i] for i in kept)
+    return results
+
+
+# ============================================================================
+# FACT STORE
+# ============================================================================
+
+def store_path(cwd: Union[str, Path] = '.') -> Path:
+    """The project's fact store: _meta/arbiter.db under cwd."""
+    return Path(cwd) / '_meta' / 'arbiter.db'
+
+
+class FactStore:
+    """
+    Persistent fact base with incremental compression (SQLite).
+
+    Statements are stored once, in canonical arbiter syntax, together with
+    the variables they mention and a cached `kept` flag holding the last
+    compression result. New statements are marked dirty; compact() only
+    recompresses the statements connected to dirty ones through shared
+    variables, since statements over disjoint variables cannot make each
+    other redundant. Everything else keeps its cached flag, so the cost of
+    a compaction follows the new facts, not the size of the history.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS facts (
+            id    INTEGER PRIMARY KEY,
+            text  TEXT NOT NULL UNIQUE,
+            kept  INTEGER NOT NULL DEFAULT 1,
+            dirty INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE TABLE IF NOT EXISTS fact_vars (
+            var     TEXT NOT NULL,
+            fact_id INTEGER NOT NULL REFERENCES facts(id),
+            PRIMARY KEY (var, fact_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS fact_vars_by_fact ON fact_vars(fact_id);
+        CREATE INDEX IF NOT EXISTS facts_dirty ON facts(dirty) WHERE dirty;
+    """
+
+    # SQLite's default limit on host parameters per statement
+    BATCH = 900
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """path defaults to store_path() of the current directory, created if needed."""
+        self.path = Path(path) if path is not None else store_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, statements: Iterable[Expr]) -> int:
+        """Store statements, skipping ones already present. Returns the number added."""
+        added = 0
+        with self.db:
+            for stmt in statements:
+                cursor = self.db.execute("INSERT OR IGNORE INTO facts (text) VALUES (?)",
+                                         (format_expr(stmt),))
+                if cursor.rowcount:
+                    added += 1
+                    self.db.executemany("INSERT INTO fact_vars (var, fact_id) VALUES (?, ?)",
+                                        [(var, cursor.lastrowid) for var in get_variables(stmt)])
+        return added
+
+    def compact(self, jobs: int = 1) -> Tuple[int, int]:
+        """
+        Recompress the part of the fact base affected by new statements,
+        optionally across `jobs` processes.
+
+        Returns (statements recompressed, statements kept among them).
+        """
+        dirty = [row[0] for row in self.db.execute("SELECT id FROM facts WHERE dirty")]
+        if not dirty:
+            return 0, 0
+
+        ids = sorted(self._connected(dirty))
+        texts = dict(self._select("SELECT id, text FROM facts WHERE id IN ({})", ids))
+        statements = {fact_id: parse(texts[fact_id]) for fact_id in ids}
+        survivors = set(compress([statements[fact_id] for fact_id in ids], jobs))
+
+        with self.db:
+            self.db.executemany("UPDATE facts SET kept = ?, dirty = 0 WHERE id = ?",
+                                [(statements[fact_id] in survivors, fact_id) for fact_id in ids])
+        return len(ids), len(survivors)
+
+    def export(self) -> List[Expr]:
+        """The compressed fact base, in insertion order."""
+        self.compact()
+        return [parse(text) for text, in
+                self.db.execute("SELECT text FROM facts WHERE kept ORDER BY id")]
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+
+    def _connected(self, fact_ids: List[int]) -> Set[int]:
+        """All facts reachable from fact_ids through shared variables."""
+        facts = set(fact_ids)
+        seen_vars: Set[str] = set()
+        frontier = list(facts)
+        while frontier:
+            new_vars = {var for var, in self._select(
+                "SELECT DISTINCT var FROM fact_vars WHERE fact_id IN ({})", frontier)}
+            new_vars -= seen_vars
+            if not new_vars:
+                break
+            seen_vars |= new_vars
+            frontier = [fact_id for fact_id, in self._select(
+                "SELECT DISTINCT fact_id FROM fact_vars WHERE var IN ({})", list(new_vars))
+                if fact_id not in facts]
+            facts.update(frontier)
+        return facts
+
+    def _select(self, query: str, params: List) -> Iterator[tuple]:
+        """Run an `IN ({})` query over params in batches."""
+        for start in range(0, len(params), self.BATCH):
+            batch = params[start:start + self.BATCH]
+            yield from self.db.execute(query.format(','.join('?' * len(batch))), batch)
+
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+#
+# Per-stage wall-clock spans for one run (the CLI, or a hook calling the
+# library), appended as JSONL to the project's _meta/benchmark/metrics.jsonl.
+# A run may carry a time budget; callers check over_budget() between stages
+# and fall back to cheaper work once it is spent, and stages that can stop
+# part way (compression) run against its deadline(). Spans, metrics_path()
+# and the environment settings live in arbiter_runtime.py, which
+# arbiter_client.py imports without importing this module.
+
+
+# ============================================================================
+# LIBRARY API
+# ============================================================================
+#
+# Entry points for callers that import arbiter instead of running it, such
+# as the PreCompact hook. Input is arbiter text (a string, or anything that
+# yields lines); results are plain structured values.
+
+class Finding(NamedTuple):
+    """A statement flagged by check(), with its 1-based source line."""
+    line: int
+    statement: str
+
+
+class CheckResult(NamedTuple):
+    statements: int
+    contradictions: List[Finding]
+
+    @property
+    def ok(self) -> bool:
+        return not self.contradictions
+
+
+class CompressResult(NamedTuple):
+    facts: List[Expr]
+    text: str
+    original: int
+    contradictions: List[Finding]
+    semantic: bool = True       # False when the time budget forced the cheap mode
+
+
+def _numbered(source: Union[str, Iterable]) -> List[Tuple[int, Expr]]:
+    if isinstance(source, str):
+        source = source.split('\n')
+    return list(iter_statements(source))
+
+
+def _contradictions(numbered: List[Tuple[int, Expr]], jobs: int) -> List[Finding]:
+    statements = [stmt for _, stmt in numbered]
+    return [Finding(line, format_expr(stmt))
+            for (line, stmt), bad in zip(numbered, check_contradictions(statements, jobs)) if bad]
+
+
+def check(source: Union[str, Iterable], jobs: int = 1) -> CheckResult:
+    """Parse arbiter text and report self-contradictory statements."""
+    numbered = _numbered(source)
+    return CheckResult(len(numbered), _contradictions(numbered, jobs))
+
+
+class ConsistencyResult(NamedTuple):
+    statements: int
+    core: List[Finding]         # a minimal inconsistent subset; empty when consistent
+
+    @property
+    def ok(self) -> bool:
+        return not self.core
+
+
+def check_consistency(source: Union[str, Iterable]) -> ConsistencyResult:
+    """Parse arbiter text and check that all of it can hold at once."""
+    numbered = _numbered(source)
+    core = unsat_core([stmt for _, stmt in numbered]) or []
+    return ConsistencyResult(len(numbered), [Finding(numbered[i][0], format_expr(numbered[i][1]))
+                                             for i in core])
+
+
+def equivalent(a: Union[str, Iterable], b: Union[str, Iterable]) -> bool:
+    """Do two arbiter texts have the same models? Raises ParseError on bad input."""
+    return bdd_equivalent([stmt for _, stmt in _numbered(a)], [stmt for _, stmt in _numbered(b)])
+
+
+class FactBase:
+    """
+    A fact set kept ready for repeated entailment queries: forward
+    chaining when it is Horn, otherwise one CNFEncoder holding the facts,
+    so each query is a single solve that reuses what earlier ones learned.
+    """
+
+    def __init__(self, statements: List[Expr]):
+        self.statements = statements
+        self._program = horn_program(statements)
+        if self._program is not None:
+            self.consistent = self._program.consistent
+        else:
+            self._encoder = CNFEncoder()
+            for stmt in statements:
+                self._encoder.assert_expr(stmt)
+            self.consistent = self._encoder.solver.solve()
+
+    def entails(self, expr: Expr) -> bool:
+        if not self.consistent:
+            return True
+        if self._program is not None:
+            entailed = self._program.entails(expr)
+            return implies_semantically(self.statements, expr) if entailed is None else entailed
+        return not self._encoder.solver.solve([self._encoder.literal(expr) ^ 1])
+
+
+def compress_text(source: Union[str, Iterable], jobs: int = 1,
+                  spans: Optional[Spans] = None, minimal: bool = False) -> CompressResult:
+    """
+    Parse, check and compress arbiter text. Raises ParseError on bad input.
+
+    With spans, each stage is timed into it, and once its budget is spent
+    the contradiction check is skipped and compression runs with
+    semantic=False. Semantic compression itself stops at the end of the
+    budget. minimal rewrites the result as a minimal cover (see
+    minimal_cover()) within what is left of the budget.
+    """
+    spans = spans or Spans('arbiter')
+    with spans.stage('parse'):
+        numbered = _numbered(source)
+
+    semantic = not spans.over_budget()
+    contradictions = []
+    if semantic:
+        with spans.stage('check'):
+            contradictions = _contradictions(numbered, jobs)
+        semantic = not spans.over_budget()
+
+    with spans.stage('compress'):
+        facts = compress([stmt for _, stmt in numbered], jobs, semantic, spans.deadline())
+    if minimal and semantic:
+        budget_ms = MINIMIZE_BUDGET_MS
+        if spans.budget_ms is not None:
+            budget_ms = min(budget_ms, spans.budget_ms - spans.elapsed_ms())
+        with spans.stage('minimize'):
+            facts = minimal_cover(facts, budget_ms)
+    with spans.stage('format'):
+        text = format_facts(facts)
+    return CompressResult(facts, text, len(numbered), contradictions, semantic)
+
+
+# ============================================================================
+# DAEMON
+# ============================================================================
+#
+# `arbiter.py serve` keeps this module loaded behind a Unix socket, so hooks
+# and agents skip interpreter startup, imports and cold caches. The
+# protocol is one JSON object per line each way: a request names an op and
+# its arguments, the response is the result object or {"error": ...}.
+# handle_request() is the whole protocol, which lets arbiter_client.py run
+# it in-process when no daemon is listening and get the same answers.
+# State is kept per project (the request's "project", normally its cwd):
+# recently queried fact bases with their solvers, on top of the
+# module-wide caches.
+
+DEFAULT_IDLE_TIMEOUT = 3600.0   # seconds without a request before serve() exits
+PROJECT_FACT_BASES = 8
+
+
+class Project:
+    """Resident state for one project: fact bases by source text, most recent last."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.bases: collections.OrderedDict = collections.OrderedDict()
+
+    def fact_base(self, text: str) -> FactBase:
+        base = self.bases.get(text)
+        if base is None:
+            base = self.bases[text] = FactBase([stmt for _, stmt in _numbered(text)])
+            if len(self.bases) > PROJECT_FACT_BASES:
+                self.bases.popitem(last=False)
+        else:
+            self.bases.move_to_end(text)
+        return base
+
+
+_PROJECTS: Dict[str, Project] = {}
+
+
+def handle_request(request: dict, spans: Optional[Spans] = None) -> dict:
+    """
+    Answer one protocol request. Ops, their arguments and results:
+
+        ping                                -> pid
+        parse     text                      -> statements, facts
+        check     text, jobs                -> statements, contradictions
+        core      text                      -> statements, consistent, core
+        compress  text, jobs, minimal,      -> text, reused, and unless
+                  previous, budget_ms,         reused: original, kept,
+                  timings                      semantic, contradictions
+        query     facts, expr               -> consistent, entailed
+
+    Every op also takes project (default "."). compress hands back
+    previous as is (reused) when it is equivalent to text; its stages are
+    timed into spans when given, else into a fresh Spans that is written
+    to the project's metrics log, or with timings returned instead as
+    timings: {"fields": {...}, "stages": [[stage, start_ms, ms], ...]}
+    so the caller can merge them into its own run (Spans.merge in
+    arbiter_client.py). Failures are returned as {"error": message}.
+    """
+    try:
+        op = request.get('op')
+        root = str(request.get('project', '.'))
+        project = _PROJECTS.setdefault(root, Project(root))
+        text = request.get('text', '')
+
+        if op == 'ping':
+            return {'pid': os.getpid()}
+        if op == 'parse':
+            statements = [stmt for _, stmt in _numbered(text)]
+            return {'statements': len(statements), 'facts': [format_expr(stmt) for stmt in statements]}
+        if op == 'check':
+            result = check(text, request.get('jobs', 1))
+            return {'statements': result.statements,
+                    'contradictions': [finding._asdict() for finding in result.contradictions]}
+        if op == 'core':
+            result = check_consistency(text)
+            return {'statements': result.statements, 'consistent': result.ok,
+                    'core': [finding._asdict() for finding in result.core]}
+        if op == 'compress':
+            return _handle_compress(request, project, spans)
+        if op == 'query':
+            base = project.fact_base(request.get('facts', ''))
+            return {'consistent': base.consistent, 'entailed': base.entails(parse(request['expr']))}
+        return {'error': f"Unknown op: {op!r}"}
+
+    except ParseError as e:
+        return {'error': f"Parse error: {e}"}
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def _handle_compress(request: dict, project: Project, spans: Optional[Spans]) -> dict:
+    own_spans = spans is None
+    if own_spans:
+        spans = Spans('arbiter', budget_ms=request.get('budget_ms'), command='compress')
+    text, previous = request.get('text', ''), request.get('previous')
+
+    response = None
+    if previous:
+        with spans.stage('compare_seed'):
+            reused = equivalent(previous, text)
+        spans.fields.update(seed_reused=reused)
+        if reused:
+            response = {'text': previous, 'reused': True}
+    if response is None:
+        result = compress_text(text, request.get('jobs', 1), spans, request.get('minimal', False))
+        spans.fields.update(facts=result.original, kept=len(result.facts), semantic=result.semantic)
+        response = {'text': result.text, 'reused': False, 'original': result.original,
+                    'kept': len(result.facts), 'semantic': result.semantic,
+                    'contradictions': [finding._asdict() for finding in result.contradictions]}
+
+    if own_spans and request.get('timings'):
+        response['timings'] = {'fields': spans.fields, 'stages': [
+            [name, round((start - spans.origin) * 1000, 3), round((end - start) * 1000, 3)]
+            for name, start, end in spans.spans]}
+    elif own_spans:
+        with contextlib.suppress(OSError):
+            spans.write(metrics_path(project.root))
+    return response
+
+
+def serve(path: Optional[Union[str, Path]] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+    """
+    Answer requests on a Unix socket until idle for idle_timeout seconds
+    (or interrupted). Connections are served on threads, requests one at a
+    time (pings excepted, so a busy daemon still answers them), and a
+    connection may carry any number of requests.
+    """
+    import signal
+    import socket
+    import socketserver
+    import sys
+    import threading
+
+    path = Path(path or socket_path())
+    path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(path))
+            except OSError:
+                path.unlink()       # left behind by a daemon that died
+            else:
+                raise RuntimeError(f"A daemon is already listening on {path}")
+
+    lock = threading.Lock()
+    last_request = time.monotonic()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            nonlocal last_request
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    response = {'error': "Invalid JSON"}
+                elif request.get('op') == 'ping':
+                    # Liveness must not queue behind a long request
+                    response = handle_request(request)
+                    last_request = time.monotonic()
+                else:
+                    with lock:
+                        response = handle_request(request)
+                        last_request = time.monotonic()
+                try:
+                    self.wfile.write(json.dumps(response).encode() + b'\n')
+                except OSError:
+                    return      # client gave up waiting (see arbiter_client's timeout)
+
+    server = socketserver.ThreadingUnixStreamServer(str(path), Handler)
+    server.daemon_threads = True
+    os.chmod(path, 0o600)
+
+    def watch_idle():
+        while time.monotonic() - last_request < idle_timeout:
+            time.sleep(min(idle_timeout, 60.0))
+        server.shutdown()
+
+    threading.Thread(target=watch_idle, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"arbiter daemon {os.getpid()} listening on {path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with contextlib.suppress(OSError):
+            path.unlink()
+
+
 # ============================================================================
 # CLI
 # ============================================================================
 
-def main():
-    """CLI entry point."""
+def compress_file(input_file: str, jobs: int = 1, minimal: bool = False,
+                  budget_ms: Optional[float] = None):
+    """
+    Validate and compress one file, printing the result (original CLI).
+
+    budget_ms defaults to BUDGET_ENV, else no budget; 0 also means none.
+    """
     import sys
 
-    if len(sys.argv) < 2:
-        print("Usage: arbiter.py <input_file>")
-        print("Reads arbiter syntax, validates, and compresses.")
+    spans = Spans('arbiter', command='compress')
+    if budget_ms is not None:
+        spans.budget_ms = budget_ms or None
+    with open(input_file) as f:
+        result = compress_text(f, jobs, spans, minimal)
+    print(f"Parsed {result.original} statements", file=sys.stderr)
+    if not result.semantic:
+        print("WARNING: Time budget exceeded, semantic checks skipped", file=sys.stderr)
+    elif spans.over_budget():
+        print("WARNING: Time budget exceeded, compression stopped early", file=sys.stderr)
+    for finding in result.contradictions:
+        print(f"WARNING: Contradiction detected: {finding.statement}", file=sys.stderr)
+    print(f"Compressed to {len(result.facts)} statements", file=sys.stderr)
+
+    with spans.stage('emit'):
+        print(result.text)
+    spans.fields.update(statements=result.original, kept=len(result.facts), semantic=result.semantic)
+    spans.write(metrics_path())
+
+
+def load_facts(path: Union[str, Path]) -> List[Expr]:
+    """Statements from an .arbc file or an arbiter text file."""
+    if Path(path).suffix == FactFile.SUFFIX:
+        with FactFile(path) as facts:
+            return facts.statements()
+    with open(path) as f:
+        return list(iter_parse(f))
+
+
+def cmd_add(args):
+    """Add statements from a file (text or .arbc) to the fact store."""
+    import sys
+
+    with FactStore(args.store) as store:
+        added = store.add(load_facts(args.input_file))
+        print(f"Added {added} new statements ({len(store)} stored)", file=sys.stderr)
+
+
+def cmd_compact(args):
+    """Recompress the parts of the fact store touched since the last compaction."""
+    import sys
+
+    with FactStore(args.store) as store:
+        examined, kept = store.compact(args.jobs)
+        print(f"Recompressed {examined} statements, kept {kept}", file=sys.stderr)
+
+
+def cmd_export(args):
+    """Print the compressed fact store."""
+    with FactStore(args.store) as store:
+        print(format_facts(store.export(), args.minimal))
+
+
+def cmd_equiv(args):
+    """Compare two files (text or .arbc) by meaning; exits 1 when they differ."""
+    import sys
+
+    same = bdd_equivalent(load_facts(args.first), load_facts(args.second))
+    print("equivalent" if same else "different")
+    if not same:
         sys.exit(1)
 
-    input_file = sys.argv[1]
 
-    try:
-        with open(input_file) as f:
-            text = f.read()
+def cmd_check(args):
+    """Check that a file's statements can all hold at once; exits 1 with a minimal conflict if not."""
+    import sys
 
-        # Parse
-        statements = parse_all(text)
-        print(f"Parsed {len(statements)} statements", file=sys.stderr)
+    spans = Spans('arbiter', command='check')
+    with spans.stage('check'), open(args.input_file) as f:
+        result = check_consistency(f)
+    spans.write(metrics_path())
+    if result.ok:
+        print(f"Consistent ({result.statements} statements)")
+        return
+    print(f"Inconsistent: these {len(result.core)} statements cannot all hold "
+          f"(removing any one of them resolves the conflict):")
+    for finding in result.core:
+        print(f"  line {finding.line}: {finding.statement}")
+    sys.exit(1)
+
+
+def cmd_pack(args):
+    """Write a text fact file as binary .arbc."""
+    import sys
 
-        # Check for contradictions
-        for stmt in statements:
-            if is_contradiction(stmt):
-                print(f"WARNING: Contradiction detected: {format_expr(stmt)}", file=sys.stderr)
+    output = args.output or str(Path(args.input_file).with_suffix(FactFile.SUFFIX))
+    statements = load_facts(args.input_file)
+    FactFile.write(output, statements)
+    print(f"Packed {len(statements)} statements into {output}", file=sys.stderr)
+
+
+def cmd_unpack(args):
+    """Print an .arbc file as arbiter text."""
+    with FactFile(args.input_file) as facts:
+        print(format_facts(facts.statements()))
+
+
+def cmd_serve(args):
+    """Run the arbiter daemon on a Unix socket (see arbiter_client.py)."""
+    serve(args.socket, args.idle_timeout)
+
+
+COMMANDS = {
+    'add': cmd_add,
+    'compact': cmd_compact,
+    'export': cmd_export,
+    'equiv': cmd_equiv,
+    'check': cmd_check,
+    'pack': cmd_pack,
+    'unpack': cmd_unpack,
+    'serve': cmd_serve,
+}
+
+
+def build_arg_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='arbiter.py',
+                                     description="Fact store commands for arbiter.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    add = sub.add_parser('add', help=cmd_add.__doc__)
+    add.add_argument('input_file')
+    compact = sub.add_parser('compact', help=cmd_compact.__doc__)
+    add_jobs_argument(compact)
+    export = sub.add_parser('export', help=cmd_export.__doc__)
+    add_minimal_argument(export)
+    for command in (add, compact, export):
+        command.add_argument('--store', default=str(store_path()),
+                             help="fact store database (default: %(default)s, in the project)")
+    equiv = sub.add_parser('equiv', help=cmd_equiv.__doc__)
+    equiv.add_argument('first')
+    equiv.add_argument('second')
+    sub.add_parser('check', help=cmd_check.__doc__).add_argument('input_file')
+    pack = sub.add_parser('pack', help=cmd_pack.__doc__)
+    pack.add_argument('input_file')
+    pack.add_argument('--output', '-o', help="output file (default: input with .arbc suffix)")
+    sub.add_parser('unpack', help=cmd_unpack.__doc__).add_argument('input_file')
+    serve_cmd = sub.add_parser('serve', help=cmd_serve.__doc__)
+    serve_cmd.add_argument('--socket', help=f"socket path (default: ${SOCKET_ENV} or {DEFAULT_SOCKET})")
+    serve_cmd.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT, metavar='SECONDS',
+                           help="exit after this long without a request (default: %(default)g)")
+    return parser
+
+
+def build_file_arg_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='arbiter.py',
+                                     description="Reads arbiter syntax, validates, and compresses.")
+    parser.add_argument('input_file')
+    add_jobs_argument(parser)
+    add_minimal_argument(parser)
+    parser.add_argument('--budget-ms', type=float, metavar='MS',
+                        help=f"time budget; 0 for none (default: ${BUDGET_ENV}, else none)")
+    return parser
+
+
+def add_jobs_argument(parser):
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help="worker processes for contradiction checks and compression "
+                             "(default: %(default)s)")
+
+
+def add_minimal_argument(parser):
+    parser.add_argument('--minimal', action='store_true',
+                        help="print a minimal equivalent set of clauses instead of the kept statements")
+
+
+def main(argv: Optional[List[str]] = None):
+    """CLI entry point."""
+    import sys
+
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv:
+        print("Usage: arbiter.py [--jobs N] [--minimal] [--budget-ms MS] <input_file>")
+        print("       arbiter.py {add,compact,export} [--store PATH] ...")
+        print("       arbiter.py check <input_file> | equiv <first> <second>")
+        print("       arbiter.py pack <input_file> [-o OUTPUT] | unpack <file.arbc>")
+        print("       arbiter.py serve [--socket PATH] [--idle-timeout SECONDS]")
+        print("       arbiter.py bench [--suite sat|nodes|ops|all] ...")
+        print("Reads arbiter syntax, validates, and compresses.")
+        sys.exit(1)
 
-        # Compress
-        compressed = compress(statements)
-        print(f"Compressed to {len(compressed)} statements", file=sys.stderr)
+    if argv[0] == 'bench':
+        # Benchmarks live in arbiter_bench.py next to this file
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        from arbiter_bench import main as bench_main
+        sys.exit(bench_main(argv[1:]))
 
-        # Output
-        print(format_facts(compressed))
+    try:
+        if argv[0] in COMMANDS:
+            args = build_arg_parser().parse_args(argv)
+            COMMANDS[args.command](args)
+        else:
+            args = build_file_arg_parser().parse_args(argv)
+            compress_file(args.input_file, args.jobs, args.minimal, args.budget_ms)
 
     except ParseError as e:
         print(f"Parse error: {e}", file=sys.stderr)
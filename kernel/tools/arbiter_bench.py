@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Arbiter Benchmarks
+
+Suites:
+    sat    CDCL backend behind is_contradiction / implies_semantically vs the
+           original truth-table enumeration on generated fact sets
+    nodes  Memory and dedup throughput of hash-consed AST nodes vs the
+           original frozen-dataclass nodes on 100k-statement inputs
+    ops    parse_all / load_arbc / is_contradiction / implies_semantically /
+           compress / format_facts on synthetic workloads varying variable count,
+           clause width, duplicate rate and component structure; results
+           can be written as JSON and compared against a stored baseline
+
+Usage:
+    arbiter_bench.py [--suite sat|nodes|ops|all] [--seed N] [--max-tt-vars N]
+                     [--repeat N] [--json PATH] [--baseline PATH]
+                     [--save-baseline] [--threshold RATIO] [--strict]
+    arbiter.py bench [same options]
+
+With --suite ops, timings are compared against the baseline after scaling
+both by a fixed calibration loop timed next to each workload, so a slower
+or busier machine does not read as a regression. Regressions are reported;
+with --strict the run also exits with status 1.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import arbiter
+from arbiter import (
+    Expr, Var, Not, And, Or, Implies,
+    get_variables, evaluate, is_contradiction, implies_semantically,
+    parse_all, compress, format_facts,
+)
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / '_meta' / 'benchmark' / 'arbiter-baseline.json'
+
+
+# ============================================================================
+# TRUTH-TABLE REFERENCE
+# ============================================================================
+# The pre-SAT implementation, kept here as the comparison baseline.
+
+def tt_is_contradiction(expr: Expr) -> bool:
+    variables = sorted(get_variables(expr))
+    for i in range(2 ** len(variables)):
+        assignment = {var: bool((i >> j) & 1) for j, var in enumerate(variables)}
+        if evaluate(expr, assignment):
+            return False
+    return True
+
+
+def tt_implies_semantically(facts: List[Expr], expr: Expr) -> bool:
+    all_vars = set()
+    for fact in facts:
+        all_vars |= get_variables(fact)
+    all_vars |= get_variables(expr)
+    variables = sorted(all_vars)
+    for i in range(2 ** len(variables)):
+        assignment = {var: bool((i >> j) & 1) for j, var in enumerate(variables)}
+        if all(evaluate(fact, assignment) for fact in facts):
+            if not evaluate(expr, assignment):
+                return False
+    return True
+
+
+# ============================================================================
+# LEGACY NODES
+# ============================================================================
+# The pre-interning AST: frozen dataclasses with recursive hashes.
+
+@dataclass(frozen=True, eq=True)
+class LegacyVar:
+    name: str
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+@dataclass(frozen=True, eq=True)
+class LegacyNot:
+    expr: object
+
+    def __hash__(self):
+        return hash(('not', self.expr))
+
+
+@dataclass(frozen=True, eq=True)
+class LegacyAnd:
+    left: object
+    right: object
+
+    def __hash__(self):
+        return hash(('and', self.left, self.right))
+
+
+@dataclass(frozen=True, eq=True)
+class LegacyOr:
+    left: object
+    right: object
+
+    def __hash__(self):
+        return hash(('or', self.left, self.right))
+
+
+@dataclass(frozen=True, eq=True)
+class LegacyImplies:
+    antecedent: object
+    consequent: object
+
+    def __hash__(self):
+        return hash(('implies', self.antecedent, self.consequent))
+
+
+LEGACY_NODES = SimpleNamespace(Var=LegacyVar, Not=LegacyNot, And=LegacyAnd,
+                               Or=LegacyOr, Implies=LegacyImplies)
+INTERNED_NODES = SimpleNamespace(Var=Var, Not=Not, And=And, Or=Or, Implies=Implies)
+
+
+# ============================================================================
+# FACT GENERATORS
+# ============================================================================
+
+def generate_facts(num_vars: int, num_facts: int, rng: random.Random,
+                   nodes: SimpleNamespace = INTERNED_NODES) -> List[Expr]:
+    """
+    Fact set shaped like PreCompact output: mostly atoms and Horn rules
+    (`a & b -> c`), with some disjunctions and negations mixed in.
+    """
+    names = [f"fact_{i}" for i in range(num_vars)]
+    facts: List[Expr] = []
+    for _ in range(num_facts):
+        kind = rng.random()
+        if kind < 0.3:
+            facts.append(nodes.Var(rng.choice(names)))
+        elif kind < 0.8:
+            body = rng.sample(names, rng.randint(1, min(3, num_vars)))
+            premise = nodes.Var(body[0])
+            for name in body[1:]:
+                premise = nodes.And(premise, nodes.Var(name))
+            facts.append(nodes.Implies(premise, nodes.Var(rng.choice(names))))
+        elif kind < 0.95:
+            a, b = rng.sample(names, 2) if num_vars > 1 else (names[0], names[0])
+            facts.append(nodes.Or(nodes.Var(a), nodes.Var(b)))
+        else:
+            facts.append(nodes.Not(nodes.Var(rng.choice(names))))
+    return facts
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def timed(fn: Callable[[], object]) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def conjoin(facts: List[Expr]) -> Expr:
+    result = facts[0]
+    for fact in facts[1:]:
+        result = And(result, fact)
+    return result
+
+
+def bench_case(num_vars: int, num_facts: int, rng: random.Random, max_tt_vars: int) -> dict:
+    facts = generate_facts(num_vars, num_facts, rng)
+    query = Var(f"fact_{rng.randrange(num_vars)}")
+    whole = conjoin(facts)
+
+    sat_contra, sat_contra_t = timed(lambda: is_contradiction(whole))
+    sat_impl, sat_impl_t = timed(lambda: implies_semantically(facts, query))
+
+    row = {
+        "vars": num_vars,
+        "facts": num_facts,
+        "sat_contradiction_s": sat_contra_t,
+        "sat_implies_s": sat_impl_t,
+        "tt_contradiction_s": None,
+        "tt_implies_s": None,
+    }
+    if num_vars <= max_tt_vars:
+        tt_contra, row["tt_contradiction_s"] = timed(lambda: tt_is_contradiction(whole))
+        tt_impl, row["tt_implies_s"] = timed(lambda: tt_implies_semantically(facts, query))
+        assert tt_contra == sat_contra and tt_impl == sat_impl, "backend disagreement"
+    return row
+
+
+def fmt(seconds) -> str:
+    if seconds is None:
+        return "skipped"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def generate_log(num_vars: int, num_facts: int, distinct: int, rng: random.Random,
+                 nodes: SimpleNamespace) -> List[Expr]:
+    """
+    Merged fact log: num_facts statements drawn from `distinct` different
+    ones, each built from scratch the way parsing a line would.
+    """
+    pool = generate_facts(num_vars, distinct, rng, LEGACY_NODES)
+
+    def build(expr):
+        if isinstance(expr, LegacyVar):
+            return nodes.Var(expr.name)
+        if isinstance(expr, LegacyNot):
+            return nodes.Not(build(expr.expr))
+        if isinstance(expr, LegacyImplies):
+            return nodes.Implies(build(expr.antecedent), build(expr.consequent))
+        op = nodes.And if isinstance(expr, LegacyAnd) else nodes.Or
+        return op(build(expr.left), build(expr.right))
+
+    return [build(rng.choice(pool)) for _ in range(num_facts)]
+
+
+def bench_nodes(nodes: SimpleNamespace, num_facts: int, distinct: int, seed: int) -> dict:
+    """Build a fact log with the given node classes, then dedup it."""
+    make = lambda: generate_log(1000, num_facts, distinct, random.Random(seed), nodes)
+
+    gc.collect()
+    tracemalloc.start()
+    facts = make()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del facts
+    gc.collect()
+    facts, build_t = timed(make)
+
+    def dedup():
+        seen = set()
+        return [f for f in facts if not (f in seen or seen.add(f))]
+
+    unique, dedup_t = timed(dedup)
+    return {"build_s": build_t, "dedup_s": dedup_t, "memory_bytes": memory, "unique": len(unique)}
+
+
+# ============================================================================
+# WORKLOADS
+# ============================================================================
+
+class Workload(NamedTuple):
+    name: str
+    num_vars: int
+    num_statements: int
+    clause_width: int       # literals per clause / rule
+    dup_rate: float         # chance a statement repeats an earlier one
+    components: int         # independent variable groups
+
+
+WORKLOADS = [
+    Workload('base',          200, 2000, 3, 0.2, 10),
+    Workload('vars-50',        50, 2000, 3, 0.2, 10),
+    Workload('vars-1000',    1000, 2000, 3, 0.2, 10),
+    Workload('width-2',       200, 2000, 2, 0.2, 10),
+    Workload('width-5',       200, 2000, 5, 0.2, 10),
+    Workload('dups-0',        200, 2000, 3, 0.0, 10),
+    Workload('dups-60',       200, 2000, 3, 0.6, 10),
+    Workload('components-1',  200, 2000, 3, 0.2, 1),
+    Workload('components-100', 200, 2000, 3, 0.2, 100),
+]
+
+
+def generate_workload(workload: Workload, rng: random.Random) -> str:
+    """
+    Arbiter text for a workload: variables split evenly across independent
+    components, each statement a clause (`a | !b | c`), a rule
+    (`a & b -> c`) or an atom drawn from a single component.
+    """
+    groups = [[f"c{g}_v{i}" for i in range(g, workload.num_vars, workload.components)]
+              for g in range(workload.components)]
+    groups = [group for group in groups if group]
+    lines: List[str] = []
+    for _ in range(workload.num_statements):
+        if lines and rng.random() < workload.dup_rate:
+            lines.append(rng.choice(lines))
+            continue
+        names = rng.choice(groups)
+        width = min(workload.clause_width, len(names))
+        picked = rng.sample(names, width)
+        kind = rng.random()
+        if kind < 0.2 or width == 1:
+            lines.append(rng.choice(("", "!")) + picked[0])
+        elif kind < 0.6:
+            lines.append(" | ".join(rng.choice(("", "!")) + name for name in picked))
+        else:
+            lines.append(" & ".join(picked[:-1]) + " -> " + picked[-1])
+    return "\n".join(lines)
+
+
+def clear_caches():
+    """Drop arbiter's memo tables so every timing starts cold."""
+    arbiter._COMPRESSED.clear()
+    # Every functools cache, so ones added later are cleared too
+    for value in vars(arbiter).values():
+        if callable(getattr(value, 'cache_clear', None)):
+            value.cache_clear()
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    """Fastest of `repeat` cold runs, with the garbage collector off while timing (as timeit does)."""
+    best = float("inf")
+    for _ in range(repeat):
+        clear_caches()
+        gc.collect()
+        gc.disable()
+        try:
+            best = min(best, timed(fn)[1])
+        finally:
+            gc.enable()
+    return best
+
+
+def calibration_loop():
+    """Fixed pure-Python work (dict and integer ops), independent of arbiter's code."""
+    table: Dict[int, int] = {}
+    for i in range(100_000):
+        table[i & 1023] = table.get(i & 1023, 0) + i
+    return table
+
+
+def load_arbc(path: Path) -> List[Expr]:
+    with arbiter.FactFile(path) as facts:
+        return facts.statements()
+
+
+def bench_workload(workload: Workload, seed: int, repeat: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    text = generate_workload(workload, rng)
+    statements = parse_all(text)
+    compressed = compress(statements)
+    unique = list(dict.fromkeys(statements))
+    queries = [Var(name) for name in rng.sample(sorted(set().union(*map(get_variables, unique))), 20)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        packed = Path(tmp) / "facts.arbc"
+        arbiter.FactFile.write(packed, statements)
+        load = best_of(repeat, lambda: load_arbc(packed))
+
+    return {
+        "calibration": best_of(repeat, calibration_loop),
+        "parse_all": best_of(repeat, lambda: parse_all(text)),
+        "load_arbc": load,
+        "is_contradiction": best_of(repeat, lambda: [is_contradiction(s) for s in unique]),
+        "implies_semantically": best_of(repeat, lambda: [implies_semantically(unique, q) for q in queries]),
+        "compress": best_of(repeat, lambda: compress(statements)),
+        "format_facts": best_of(repeat, lambda: format_facts(compressed)),
+    }
+
+
+# ============================================================================
+# BASELINES
+# ============================================================================
+
+# A timing regresses when, scaled by calibration, it is this much slower
+# than the baseline...
+DEFAULT_THRESHOLD = 1.25
+# ...and the difference is larger than scheduler and timer noise
+NOISE_FLOOR_S = 5e-3
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Descriptions of every timing that regressed against baseline. Each
+    baseline timing is first scaled by how much slower the calibration
+    loop ran next to this workload than next to the baseline's.
+    """
+    regressions = []
+    for name, ops in results["workloads"].items():
+        base_ops = baseline.get("workloads", {}).get(name, {})
+        speed = 1.0
+        if ops.get("calibration") and base_ops.get("calibration"):
+            speed = ops["calibration"] / base_ops["calibration"]
+        for op, seconds in ops.items():
+            base = base_ops.get(op)
+            if op == "calibration" or not base:
+                continue
+            expected = base * speed
+            if seconds > expected * threshold and seconds - expected > NOISE_FLOOR_S:
+                regressions.append(f"{name}/{op}: {fmt(base)} -> {fmt(seconds)} "
+                                   f"({seconds / expected:.2f}x after calibration {speed:.2f}x)")
+    return regressions
+
+
+def run_ops_suite(args) -> int:
+    results = {
+        "meta": {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "workloads": {},
+    }
+    ops = ("parse_all", "load_arbc", "is_contradiction", "implies_semantically", "compress",
+           "format_facts")
+
+    print(f"{'workload':>15} | " + " ".join(f"{op[:12]:>12}" for op in ops))
+    print("-" * (18 + 13 * len(ops)))
+    for workload in WORKLOADS:
+        row = bench_workload(workload, args.seed, args.repeat)
+        results["workloads"][workload.name] = row
+        print(f"{workload.name:>15} | " + " ".join(f"{fmt(row[op]):>12}" for op in ops))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    print(f"\nBaseline {args.baseline}: ", end="")
+    if not regressions:
+        print(f"no regressions (threshold {args.threshold:g}x)")
+        return 0
+    print(f"{len(regressions)} regression(s)")
+    for line in regressions:
+        print(f"  {line}")
+    return 1 if args.strict else 0
+
+
+def run_sat_suite(args):
+    rng = random.Random(args.seed)
+    cases = [(8, 20), (12, 40), (16, 60), (30, 200), (100, 1000), (500, 5000)]
+
+    print(f"{'vars':>5} {'facts':>6} | {'contra tt':>10} {'contra sat':>10} | {'impl tt':>10} {'impl sat':>10}")
+    print("-" * 62)
+    for num_vars, num_facts in cases:
+        row = bench_case(num_vars, num_facts, rng, args.max_tt_vars)
+        print(f"{row['vars']:>5} {row['facts']:>6} | "
+              f"{fmt(row['tt_contradiction_s']):>10} {fmt(row['sat_contradiction_s']):>10} | "
+              f"{fmt(row['tt_implies_s']):>10} {fmt(row['sat_implies_s']):>10}")
+
+
+def run_nodes_suite(args):
+    num_facts = 100_000
+    print(f"{'nodes':>9} {'distinct':>8} | {'build':>9} {'dedup':>9} {'memory':>10} {'unique':>7}")
+    print("-" * 61)
+    for distinct in (1_000, 10_000, 100_000):
+        for label, nodes in (("legacy", LEGACY_NODES), ("interned", INTERNED_NODES)):
+            row = bench_nodes(nodes, num_facts, distinct, args.seed)
+            print(f"{label:>9} {distinct:>8} | {fmt(row['build_s']):>9} {fmt(row['dedup_s']):>9} "
+                  f"{row['memory_bytes'] / 2**20:>8.1f}MB {row['unique']:>7}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="arbiter_bench.py", description="Benchmark arbiter")
+    parser.add_argument("--suite", choices=("sat", "nodes", "ops", "all"), default="all")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-tt-vars", type=int, default=16,
+                        help="largest variable count to run the truth-table baseline on")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="ops suite: runs per timing, best kept (default: %(default)s)")
+    parser.add_argument("--json", metavar="PATH", help="ops suite: write results as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE,
+                        help="ops suite: baseline to compare against (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="ops suite: store this run as the baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="ops suite: slowdown ratio counted as a regression (default: %(default)s)")
+    parser.add_argument("--strict", action="store_true",
+                        help="ops suite: exit with status 1 when any timing regressed")
+    args = parser.parse_args(argv)
+
+    suites = [("sat", run_sat_suite), ("nodes", run_nodes_suite), ("ops", run_ops_suite)]
+    status = 0
+    selected = [(name, run) for name, run in suites if args.suite in (name, "all")]
+    for i, (name, run) in enumerate(selected):
+        if i:
+            print()
+        status = run(args) or status
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
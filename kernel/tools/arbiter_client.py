@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Arbiter Client
+
+Sends requests to a running `arbiter.py serve` daemon, and runs them
+in-process (importing arbiter.py from this directory) when no daemon is
+listening, so callers get the same answers either way. Only the standard
+library is imported up front (with arbiter_runtime.py, whose Spans callers
+can time their runs with), which keeps start-up cheap when the daemon is
+up. See arbiter.handle_request() for the ops and their arguments.
+
+Usage:
+    arbiter_client.py {ping,parse,check,core,compress,query} [input_file]
+                      [--expr EXPR] [--minimal] [--project DIR] [--socket PATH]
+"""
+
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import List, Optional, Union
+
+# arbiter_runtime.py sits next to this file, which the PreCompact hook
+# loads by path without putting its directory on sys.path
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+from arbiter_runtime import DEFAULT_SOCKET, SOCKET_ENV, socket_path
+
+REQUEST_TIMEOUT = 30.0
+
+
+def daemon_request(request: dict, path: Optional[Union[str, Path]] = None,
+                   timeout: float = REQUEST_TIMEOUT) -> Optional[dict]:
+    """
+    The daemon's response, or None if it is unavailable: not listening,
+    not answering within timeout seconds, or gone mid-request.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path or socket_path()))
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+        # An empty reply means the daemon went away mid-request
+        return json.loads(line) if line else None
+    except (OSError, ValueError):     # socket.timeout is an OSError
+        return None
+
+
+def local_request(request: dict) -> dict:
+    """Answer request in this process."""
+    import arbiter
+    return arbiter.handle_request(request)
+
+
+def request(request: dict, path: Optional[Union[str, Path]] = None,
+            timeout: float = REQUEST_TIMEOUT) -> dict:
+    """Answer request through the daemon if it answers within timeout, else in-process."""
+    response = daemon_request(request, path, timeout)
+    return response if response is not None else local_request(request)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the arbiter daemon (or arbiter in-process).")
+    parser.add_argument('op', choices=('ping', 'parse', 'check', 'core', 'compress', 'query'))
+    parser.add_argument('input_file', nargs='?',
+                        help="arbiter text; the facts for query (default: stdin)")
+    parser.add_argument('--expr', help="query: the statement to test")
+    parser.add_argument('--minimal', action='store_true', help="compress: print a minimal cover")
+    parser.add_argument('--project', default=os.getcwd(), help="project the request belongs to")
+    parser.add_argument('--socket', help=f"daemon socket (default: ${SOCKET_ENV} or {DEFAULT_SOCKET})")
+    args = parser.parse_args(argv)
+
+    req = {'op': args.op, 'project': args.project}
+    if args.op != 'ping':
+        if args.input_file:
+            with open(args.input_file) as f:
+                text = f.read()
+        else:
+            text = sys.stdin.read()
+        if args.op == 'query':
+            if not args.expr:
+                parser.error("query needs --expr")
+            req.update(facts=text, expr=args.expr)
+        else:
+            req.update(text=text, minimal=args.minimal)
+
+    response = request(req, args.socket)
+    print(json.dumps(response, indent=2))
+    return 1 if 'error' in response else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
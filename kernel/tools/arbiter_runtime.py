@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Arbiter Runtime
+
+Settings and run timing shared by arbiter.py and arbiter_client.py: the
+environment variables both read, the daemon socket and metrics log
+locations, and Spans. Only the standard library is imported, so the
+client can time a run without paying for arbiter.py's import.
+
+Per-stage wall-clock spans for one run (the CLI, a hook calling the
+library, or a daemon request) are appended as JSONL to the project's
+_meta/benchmark/metrics.jsonl. A run may carry a time budget; callers
+check over_budget() between stages and fall back to cheaper work once it
+is spent, and stages that can stop part way (compression) run against
+its deadline().
+"""
+
+import contextlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+SOCKET_ENV = 'ARBITER_SOCKET'        # daemon socket path
+DEFAULT_SOCKET = Path.home() / '.claude' / 'run' / 'arbiter.sock'
+METRICS_ENV = 'ARBITER_METRICS'      # explicit metrics file
+BUDGET_ENV = 'ARBITER_BUDGET_MS'     # time budget per run, in milliseconds
+
+
+def socket_path() -> Path:
+    return Path(os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET)
+
+
+def metrics_path(cwd: Union[str, Path] = '.') -> Optional[Path]:
+    """ARBITER_METRICS, else _meta/benchmark/metrics.jsonl under cwd if that directory exists."""
+    if os.environ.get(METRICS_ENV):
+        return Path(os.environ[METRICS_ENV])
+    path = Path(cwd) / '_meta' / 'benchmark' / 'metrics.jsonl'
+    return path if path.parent.is_dir() else None
+
+
+class Spans:
+    """Timings of the stages of one run, with an optional time budget."""
+
+    def __init__(self, component: str, budget_ms: Optional[float] = None,
+                 origin: Optional[float] = None, **fields):
+        """origin is the run's start as time.perf_counter(); defaults to now."""
+        if budget_ms is None and os.environ.get(BUDGET_ENV):
+            budget_ms = float(os.environ[BUDGET_ENV])
+        self.component = component
+        self.budget_ms = budget_ms
+        self.fields = fields
+        self.origin = time.perf_counter() if origin is None else origin
+        self.started = time.time() - (time.perf_counter() - self.origin)
+        self.spans: List[Tuple[str, float, float]] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def add(self, name: str, start: float, end: float):
+        """Record a stage timed by the caller with time.perf_counter()."""
+        self.spans.append((name, start, end))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.origin) * 1000
+
+    def over_budget(self) -> bool:
+        return self.budget_ms is not None and self.elapsed_ms() >= self.budget_ms
+
+    def deadline(self) -> Optional[float]:
+        """End of the budget as a time.perf_counter() value, or None without one."""
+        return None if self.budget_ms is None else self.origin + self.budget_ms / 1000
+
+    def records(self) -> List[dict]:
+        run = f"{self.component}-{os.getpid()}-{int(self.started * 1000)}"
+        base = {'type': 'span', 'component': self.component, 'run': run, **self.fields}
+        records = [dict(base, stage=name, start_ms=round((start - self.origin) * 1000, 3),
+                        ms=round((end - start) * 1000, 3))
+                   for name, start, end in self.spans]
+        records.append(dict(base, stage='total', start_ms=0.0, ms=round(self.elapsed_ms(), 3),
+                            budget_ms=self.budget_ms,
+                            ts=time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started))))
+        return records
+
+    def write(self, path: Optional[Path]):
+        """Append this run's spans to path (no-op for None)."""
+        if path is None:
+            return
+        lines = ''.join(json.dumps(record) + '\n' for record in self.records())
+        with open(path, 'a') as f:
+            f.write(lines)
+
+    def merge(self, timings: dict, sent: float):
+        """
+        Fold in the timings a daemon returned for a request sent at sent
+        (time.perf_counter()): its stages, shifted onto this run's clock,
+        and its fields.
+        """
+        for name, start_ms, ms in timings.get('stages', ()):
+            start = sent + start_ms / 1000
+            self.add(name, start, start + ms / 1000)
+        self.fields.update(timings.get('fields', {}))
@@ -0,0 +1,78 @@
+"""Shared fixtures: make kernel/tools and the hook scripts importable."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+TOOLS = ROOT / 'kernel' / 'tools'
+HOOKS = ROOT / 'kernel' / 'hooks' / 'scripts'
+
+sys.path.insert(0, str(TOOLS))
+
+
+def load_script(path: Path, name: str):
+    """Import a hyphenated script file as a module."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def arbiter():
+    import arbiter as module
+    return module
+
+
+@pytest.fixture(autouse=True)
+def metrics_file(monkeypatch, tmp_path):
+    """Send arbiter spans to a scratch file, not the repo's metrics log."""
+    path = tmp_path / 'metrics.jsonl'
+    monkeypatch.setenv('ARBITER_METRICS', str(path))
+    return path
+
+
+class Clock:
+    """A stand-in for time.perf_counter() that advances by step seconds per read."""
+
+    def __init__(self, step=1e-3):
+        self.now, self.step, self.reads = 0.0, step, 0
+
+    def __call__(self):
+        self.now += self.step
+        self.reads += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace time.perf_counter() with a Clock, so deadlines pass after a set number of checks."""
+    import time
+    fake = Clock()
+    monkeypatch.setattr(time, 'perf_counter', fake)
+    return fake
+
+
+def random_formula(r, names, depth=3):
+    """A random expression over names, using every connective."""
+    import arbiter
+    if depth == 0 or r.random() < .2:
+        leaf = arbiter.Var(r.choice(names))
+        return arbiter.Not(leaf) if r.random() < .3 else leaf
+    kind = r.choice((arbiter.Not, arbiter.And, arbiter.Or, arbiter.Implies, arbiter.Iff))
+    if kind is arbiter.Not:
+        return arbiter.Not(random_formula(r, names, depth - 1))
+    return kind(random_formula(r, names, depth - 1), random_formula(r, names, depth - 1))
+
+
+def truth_table(statements, names):
+    """Assignments over names (as dicts) that satisfy every statement."""
+    import itertools
+    import arbiter
+    assignments = (dict(zip(names, values))
+                   for values in itertools.product((False, True), repeat=len(names)))
+    return [assignment for assignment in assignments
+            if all(arbiter.evaluate(stmt, assignment) for stmt in statements)]
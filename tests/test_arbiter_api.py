@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+TEXT = '# decisions\na -> b\na\n\nb -> c\nq & !q\na -> c\nx | y\n'
+
+
+def sources(text):
+    """The same arbiter text as each kind of source the library accepts."""
+    return [text, text.split('\n'), io.StringIO(text), io.BytesIO(text.encode()),
+            (line for line in text.splitlines(keepends=True))]
+
+
+def test_every_source_gives_the_same_result(arbiter):
+    for call in (arbiter.check, arbiter.check_consistency, arbiter.compress_text):
+        results = [call(source) for source in sources(TEXT)]
+        assert all(result == results[0] for result in results)
+    consistent = TEXT.replace('q & !q\n', '')
+    assert all(arbiter.equivalent(source, 'x | y\nc & a & b\n') for source in sources(consistent))
+    assert not any(arbiter.equivalent(source, 'x & y\nc & a & b\n') for source in sources(consistent))
+
+
+def test_check_reports_contradictions_by_line(arbiter):
+    result = arbiter.check(TEXT)
+    assert result == arbiter.CheckResult(6, [arbiter.Finding(6, 'q & !q')])
+    assert not result.ok
+    assert arbiter.check('a\n# only a comment\n').ok
+    assert arbiter.check('').ok and arbiter.check([]).statements == 0
+
+
+def test_check_consistency_reports_a_core(arbiter):
+    result = arbiter.check_consistency(TEXT)
+    assert not result.ok and result.statements == 6
+    assert result.core == [arbiter.Finding(6, 'q & !q')]
+    assert arbiter.check_consistency(TEXT.replace('q & !q', 'q')).ok
+
+
+def test_compress_text_result(arbiter):
+    result = arbiter.compress_text(TEXT.replace('q & !q\n', ''))
+    assert result.original == 5 and result.contradictions == [] and result.semantic
+    assert result.text == arbiter.format_facts(result.facts) == 'a -> b\na\nb -> c\nx | y'
+    assert arbiter.parse_all(result.text) == result.facts
+    assert arbiter.equivalent(result.text, TEXT.replace('q & !q\n', ''))
+
+    # Contradictions are reported, and compression still runs
+    result = arbiter.compress_text(TEXT)
+    assert result.contradictions == [arbiter.Finding(6, 'q & !q')] and result.original == 6
+
+
+@pytest.mark.parametrize('call', ['check', 'check_consistency', 'compress_text'])
+def test_bad_input_raises_parse_error(arbiter, call):
+    for source in sources('a\nb -> \nc\n'):
+        with pytest.raises(arbiter.ParseError, match=r'^Line 2: '):
+            getattr(arbiter, call)(source)
+
+
+def test_fact_base_answers_like_implies_semantically(arbiter):
+    queries = arbiter.parse_all('c\na & c\n!a\nx\nx | y\nz\nb -> c\n')
+    for text in ('a -> b\nb -> c\na\n', 'a -> b\nb -> c\na\nx | y\n', 'a\n!a\nb\n'):
+        statements = arbiter.parse_all(text)
+        facts = arbiter.FactBase(statements)
+        assert facts.consistent == arbiter.consistent(statements)
+        assert [facts.entails(query) for query in queries] == \
+            [arbiter.implies_semantically(statements, query) for query in queries]
+    assert not facts.consistent and facts.entails(arbiter.parse('z'))
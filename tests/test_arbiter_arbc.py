@@ -0,0 +1,67 @@
+import struct
+
+import pytest
+
+TEXT = 'a & b -> c\n!(a | d)\nc <-> d\n'
+
+
+@pytest.fixture
+def arbc(arbiter, tmp_path):
+    path = tmp_path / 'facts.arbc'
+    arbiter.FactFile.write(path, arbiter.parse_all(TEXT))
+    return path
+
+
+def patch_node(arbiter, path, index, op=None, a=None, b=None):
+    """Overwrite fields of node index in an .arbc file."""
+    data = bytearray(path.read_bytes())
+    header = arbiter.FactFile.HEADER
+    _, _, _, names, name_bytes, nodes, _ = header.unpack_from(data)
+    offset = header.size + 4 * (names + 1) + -name_bytes // 4 * -4 + 12 * (index % nodes)
+    old = struct.unpack_from('<3I', data, offset)
+    new = [old[k] if value is None else value for k, value in enumerate((op, a, b))]
+    struct.pack_into('<3I', data, offset, *new)
+    path.write_bytes(bytes(data))
+
+
+def test_round_trip(arbiter, arbc):
+    with arbiter.FactFile(arbc) as facts:
+        assert facts.statements() == arbiter.parse_all(TEXT)
+        assert [facts.statement(i) for i in range(len(facts))] == arbiter.parse_all(TEXT)
+
+
+def test_self_reference_is_rejected(arbiter, arbc):
+    with arbiter.FactFile(arbc) as facts:
+        last = len(facts.nodes) // 3 - 1
+        count = len(facts)
+    patch_node(arbiter, arbc, last, a=last)
+    with arbiter.FactFile(arbc) as facts:
+        with pytest.raises(ValueError, match='refers forward'):
+            facts.statement(count - 1)
+        with pytest.raises(ValueError, match='Corrupt'):
+            facts.statements()
+
+
+@pytest.mark.parametrize('fields', [{'op': 9}, {'a': 1000}, {'op': 0, 'a': 1000}])
+def test_bad_nodes_are_rejected(arbiter, arbc, fields):
+    patch_node(arbiter, arbc, -1, **fields)
+    with arbiter.FactFile(arbc) as facts:
+        with pytest.raises(ValueError, match='Corrupt'):
+            facts.statements()
+        with pytest.raises(ValueError, match='Corrupt'):
+            facts.statement(len(facts) - 1)
+
+
+def test_truncated_file_is_rejected(arbiter, arbc):
+    data = arbc.read_bytes()
+    for size in (0, 10, len(data) - 4):
+        arbc.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            arbiter.FactFile(arbc)
+
+
+def test_unpack_reports_corrupt_file(arbiter, arbc, capsys):
+    patch_node(arbiter, arbc, -1, b=1000)
+    with pytest.raises(SystemExit):
+        arbiter.main(['unpack', str(arbc)])
+    assert 'Corrupt arbiter fact file' in capsys.readouterr().err
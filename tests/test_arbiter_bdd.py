@@ -0,0 +1,53 @@
+import random
+
+from conftest import random_formula, truth_table
+
+NAMES = ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+def formula_sets(count, seed, names=NAMES):
+    r = random.Random(seed)
+    return [[random_formula(r, names) for _ in range(r.randint(1, 4))] for _ in range(count)]
+
+
+def variables_of(arbiter, statements):
+    return sorted(set().union(*(arbiter.get_variables(stmt) for stmt in statements)))
+
+
+def test_compiled_facts_match_truth_table(arbiter):
+    for statements in formula_sets(200, seed=1):
+        bdd = arbiter.BDD(NAMES)
+        f = bdd.compile_facts(statements)
+        models = truth_table(statements, NAMES)
+        assert bdd.count(f) == len(models), statements
+        for assignment in truth_table([], NAMES):
+            assert bdd.evaluate(f, assignment) == (assignment in models), statements
+
+
+def test_count_models_matches_truth_table(arbiter):
+    # Some sets span several variable components
+    for statements in formula_sets(200, seed=2, names=['a', 'b', 'c', 'x', 'y', 'z', 'w']):
+        names = variables_of(arbiter, statements)
+        assert arbiter.count_models(statements) == len(truth_table(statements, names)), statements
+
+
+def test_equivalence_matches_truth_table(arbiter):
+    r = random.Random(3)
+    for a, b in zip(formula_sets(300, seed=4, names=NAMES[:3]), formula_sets(300, seed=5, names=NAMES[:3])):
+        # Mix in pairs that are equivalent by construction
+        if r.random() < .3:
+            b = [arbiter.Not(arbiter.Not(stmt)) for stmt in reversed(a)]
+        expected = truth_table(a, NAMES[:3]) == truth_table(b, NAMES[:3])
+        assert arbiter.bdd_equivalent(a, b) == expected, (a, b)
+
+
+def test_reordering_keeps_the_function(arbiter):
+    statements = [stmt for group in formula_sets(6, seed=6) for stmt in group]
+    bdd = arbiter.BDD(NAMES, auto_reorder=False)
+    f = bdd.ref(bdd.compile_facts(statements))
+    before = {tuple(assignment.values()): bdd.evaluate(f, assignment)
+              for assignment in truth_table([], NAMES)}
+    count = bdd.count(f)
+    bdd.reorder()
+    assert bdd.count(f) == count
+    assert all(bdd.evaluate(f, dict(zip(NAMES, values))) == value for values, value in before.items())
@@ -0,0 +1,56 @@
+import json
+import random
+import time
+
+
+def random_text(clauses, variables, seed=0, prefix='v'):
+    r = random.Random(seed)
+    return '\n'.join(' | '.join(('!' if r.random() < .5 else '') + f'{prefix}{v}'
+                                for v in r.sample(range(variables), 3))
+                     for _ in range(clauses))
+
+
+def test_compress_stops_at_the_budget(arbiter, clock):
+    spans = arbiter.Spans('test', budget_ms=300)
+    result = arbiter.compress_text(random_text(700, 250), spans=spans)
+    # One millisecond per clock read: compression ran until the budget was
+    # spent and gave up within a few deadline checks of it
+    assert result.semantic and spans.over_budget()
+    assert clock.reads <= 300 + 20
+    assert result.original == 700 and len(result.facts) <= 700
+
+
+def test_parallel_compress_stops_at_the_budget(arbiter):
+    text = '\n'.join(random_text(350, 120, seed, prefix=f'g{seed}v') for seed in range(4))
+    statements = list(dict.fromkeys(arbiter.parse_all(text)))
+    assert len(arbiter.partition(statements)) > 1
+    # Workers handed a spent deadline keep every statement they have not examined
+    facts = arbiter.compress(statements, jobs=4, deadline=time.perf_counter() - 1)
+    assert facts == arbiter.compress(statements, semantic=False)
+    assert all(arbiter._compress_component_cached(tuple(statements[i] for i in component)) is None
+               for component in arbiter.partition(statements))
+
+
+def test_cut_short_components_are_not_cached(arbiter):
+    statements = arbiter.parse_all(random_text(300, 100, seed=1))
+    component = tuple(dict.fromkeys(statements))
+    arbiter.compress(statements, deadline=0.0)
+    assert arbiter._compress_component_cached(component) is None
+
+
+def test_cli_budget_only_when_asked(arbiter, tmp_path, metrics_file, monkeypatch, capsys):
+    path = tmp_path / 'facts.txt'
+    path.write_text('a\na -> b\n')
+
+    def budget(*options):
+        arbiter.main([*options, str(path)])
+        lines = metrics_file.read_text().splitlines()
+        return json.loads(lines[-1])['budget_ms']
+
+    monkeypatch.delenv('ARBITER_BUDGET_MS', raising=False)
+    assert budget() is None
+    assert budget('--budget-ms', '250') == 250
+    monkeypatch.setenv('ARBITER_BUDGET_MS', '400')
+    assert budget() == 400
+    assert budget('--budget-ms', '0') is None
+    assert capsys.readouterr().out == 'a\na -> b\n' * 4
@@ -0,0 +1,45 @@
+import random
+
+
+def mixed_facts(arbiter, size, seed=0):
+    """A consistent non-Horn component: 3- and 2-clauses and rules, then some of them conjoined."""
+    r = random.Random(seed)
+    variables = size // 2
+    lines = []
+    for _ in range(size):
+        kind, picked = r.random(), [f'v{v}' for v in r.sample(range(variables), 3)]
+        if kind < .6:
+            lines.append(' | '.join(r.choice(('', '!')) + name for name in picked))
+        elif kind < .8:
+            lines.append(f'{picked[0]} & {picked[1]} -> {picked[2]}')
+        else:
+            lines.append(' | '.join(r.choice(('', '!')) + name for name in picked[:2]))
+    # Entailed by the statements before them, and not syntactically subsumed
+    lines += [f'({r.choice(lines)}) & ({r.choice(lines)})' for _ in range(size // 20)]
+    return list(dict.fromkeys(arbiter.parse_all('\n'.join(lines))))
+
+
+def solver_only(arbiter, monkeypatch):
+    monkeypatch.setattr(arbiter.Countermodels, 'refutes', lambda self, index: False)
+    monkeypatch.setattr(arbiter.Countermodels, 'adopt', lambda self, model, index: None)
+
+
+def test_countermodels_keep_the_solver_result(arbiter, monkeypatch):
+    statements = mixed_facts(arbiter, 300, seed=1)
+    assert arbiter.consistent(statements) and len(arbiter.partition(statements)) == 1
+    kept = arbiter.compress_component(statements)
+    solver_only(arbiter, monkeypatch)
+    assert kept == arbiter.compress_component(statements)
+    assert len(kept) <= len(statements) - 300 // 20
+
+
+def test_large_component_compresses_without_a_solve_per_statement(arbiter, monkeypatch):
+    statements = mixed_facts(arbiter, 600)
+    assert arbiter.consistent(statements) and len(arbiter.partition(statements)) == 1
+    solves = []
+    entailed = arbiter.FactSolver.entailed
+    monkeypatch.setattr(arbiter.FactSolver, 'entailed',
+                        lambda self, index, active: solves.append(index) or entailed(self, index, active))
+    kept = arbiter.compress_component(statements)
+    assert len(solves) < len(statements) // 4
+    assert len(kept) <= len(statements) - 600 // 20
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from conftest import random_formula, truth_table
+
+NAMES = ['a', 'b', 'c', 'd']
+
+
+def test_consistent_input(arbiter, tmp_path, capsys):
+    result = arbiter.check_consistency('a -> b\na\n\n# note\nb | c\n')
+    assert result.ok and result.core == [] and result.statements == 3
+
+    path = tmp_path / 'facts.txt'
+    path.write_text('a -> b\na\n')
+    arbiter.main(['check', str(path)])
+    assert capsys.readouterr().out == 'Consistent (2 statements)\n'
+
+
+def test_core_is_minimal(arbiter):
+    r = random.Random(1)
+    checked = 0
+    while checked < 100:
+        statements = [random_formula(r, NAMES, depth=2) for _ in range(r.randint(2, 8))]
+        core = arbiter.unsat_core(statements)
+        if core is None:
+            assert truth_table(statements, NAMES)
+            continue
+        checked += 1
+        subset = [statements[i] for i in core]
+        assert core == sorted(set(core))
+        assert not truth_table(subset, NAMES)
+        for dropped in range(len(subset)):
+            assert truth_table(subset[:dropped] + subset[dropped + 1:], NAMES), (statements, core)
+
+
+def test_core_reports_source_lines(arbiter, tmp_path, capsys):
+    text = '# decisions\nuse_pytest\n\nuse_pytest -> !use_unittest\n  \n# later\nx | y\nuse_unittest\n'
+    result = arbiter.check_consistency(text)
+    assert not result.ok and result.statements == 4
+    assert result.core == [arbiter.Finding(2, 'use_pytest'),
+                           arbiter.Finding(4, 'use_pytest -> !use_unittest'),
+                           arbiter.Finding(8, 'use_unittest')]
+
+    path = tmp_path / 'facts.txt'
+    path.write_text(text)
+    with pytest.raises(SystemExit) as exit:
+        arbiter.main(['check', str(path)])
+    assert exit.value.code == 1
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].startswith('Inconsistent: these 3 statements cannot all hold')
+    assert out[1:] == ['  line 2: use_pytest', '  line 4: use_pytest -> !use_unittest',
+                       '  line 8: use_unittest']
+
+
+def test_large_input_finds_the_buried_conflict(arbiter, tmp_path, capsys):
+    # A long implication chain, unrelated clauses on both sides, and one clash at its end
+    r = random.Random(2)
+    lines = [f'n{i} | !n{r.randrange(2000)} | m{r.randrange(500)}' for i in range(2000)]
+    lines += ['p0'] + [f'p{i} -> p{i + 1}' for i in range(300)] + [f'!p300 | q{i}' for i in range(50)]
+    lines += [f'n{i} | m{i}' for i in range(1000)] + ['!p300']
+    result = arbiter.check_consistency('\n'.join(lines))
+    assert result.statements == len(lines)
+    assert [finding.line for finding in result.core] == \
+        [2001 + i for i in range(301)] + [len(lines)]
+
+    path = tmp_path / 'facts.txt'
+    path.write_text('\n'.join(lines) + '\n')
+    with pytest.raises(SystemExit):
+        arbiter.main(['check', str(path)])
+    assert capsys.readouterr().out.count('\n  line ') == 302
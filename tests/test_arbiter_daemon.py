@@ -0,0 +1,75 @@
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import arbiter_client
+import arbiter_runtime
+
+from conftest import TOOLS
+
+
+def start_daemon(arbiter, monkeypatch, tmp_path, slow_ops=()):
+    """serve() on a thread, with the ops in slow_ops taking a second each."""
+    handle = arbiter.handle_request
+
+    def handle_request(request, spans=None):
+        if request.get('op') in slow_ops:
+            time.sleep(1.0)
+        return handle(request, spans)
+
+    monkeypatch.setattr(arbiter, 'handle_request', handle_request)
+    monkeypatch.setattr(signal, 'signal', lambda *args: None)   # main thread only
+    path = tmp_path / 'arbiter.sock'
+    thread = threading.Thread(target=arbiter.serve, args=(path, 2.0), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if path.exists():
+            break
+        time.sleep(0.01)
+    return path
+
+
+def test_ping_is_answered_while_busy(arbiter, monkeypatch, tmp_path):
+    path = start_daemon(arbiter, monkeypatch, tmp_path, slow_ops=('compress',))
+    busy = threading.Thread(target=arbiter_client.daemon_request,
+                            args=({'op': 'compress', 'text': 'a'}, path))
+    busy.start()
+    time.sleep(0.2)
+    start = time.perf_counter()
+    response = arbiter_client.daemon_request({'op': 'ping'}, path, timeout=0.5)
+    assert time.perf_counter() - start < 0.5
+    assert response['pid']
+    busy.join()
+
+
+def test_timeout_counts_as_unavailable(arbiter, monkeypatch, tmp_path):
+    path = start_daemon(arbiter, monkeypatch, tmp_path, slow_ops=('parse',))
+    assert arbiter_client.daemon_request({'op': 'parse', 'text': 'a'}, path, timeout=0.2) is None
+    response = arbiter_client.request({'op': 'parse', 'text': 'a & b'}, path, timeout=0.2)
+    assert response['statements'] == 1
+
+
+def test_missing_socket_falls_back_in_process(tmp_path):
+    assert arbiter_client.daemon_request({'op': 'ping'}, tmp_path / 'none.sock') is None
+    assert arbiter_client.request({'op': 'parse', 'text': 'a\nb'}, tmp_path / 'none.sock')['statements'] == 2
+
+
+def test_compress_returns_timings(arbiter):
+    response = arbiter.handle_request({'op': 'compress', 'text': 'a\na -> b\n', 'timings': True})
+    spans = arbiter_runtime.Spans('test')
+    spans.merge(response['timings'], spans.origin)
+    assert spans.spans and spans.fields['facts'] == 2
+
+
+def test_client_shares_runtime_without_importing_arbiter(arbiter):
+    assert arbiter.Spans is arbiter_runtime.Spans
+    assert arbiter.socket_path is arbiter_client.socket_path is arbiter_runtime.socket_path
+    # Loaded by path, as the hook does, with the tools directory not on sys.path
+    script = ('import importlib.util, sys\n'
+              f'spec = importlib.util.spec_from_file_location("arbiter_client", {str(TOOLS / "arbiter_client.py")!r})\n'
+              'spec.loader.exec_module(importlib.util.module_from_spec(spec))\n'
+              'print(sorted(name for name in sys.modules if name.startswith("arbiter")))')
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "['arbiter_runtime']"
@@ -0,0 +1,17 @@
+def test_queries_reuse_the_partition(arbiter, monkeypatch):
+    facts = arbiter.parse_all('a -> b\nb -> c\na\nx | y\n!y\np <-> q\n')
+    calls = []
+    partition = arbiter.partition
+    monkeypatch.setattr(arbiter, 'partition', lambda statements: calls.append(1) or partition(statements))
+    arbiter._fact_components.cache_clear()
+
+    answers = [arbiter.implies_semantically(facts, arbiter.parse(query))
+               for query in ('c', 'x', 'q', 'p -> q', 'new', 'c & x', 'c & z')]
+    assert answers == [True, True, False, True, False, True, False]
+    assert len(calls) == 1
+
+
+def test_inconsistent_component_entails_everything(arbiter):
+    facts = arbiter.parse_all('a\n!a\nb -> c\n')
+    assert arbiter.implies_semantically(facts, arbiter.parse('z'))
+    assert arbiter.implies_semantically(facts, arbiter.parse('!c'))
@@ -0,0 +1,40 @@
+import random
+
+
+def interleaved_text(groups=6, clauses=80, seed=0):
+    """Clauses over disjoint variable groups, shuffled together, with contradictions and repeats."""
+    r = random.Random(seed)
+    lines = [' | '.join(('!' if r.random() < .5 else '') + f'g{g}v{v}' for v in r.sample(range(30), 3))
+             for g in range(groups) for _ in range(clauses)]
+    lines += [f'c{k} & !c{k}' for k in range(3)] + r.sample(lines, 20)
+    r.shuffle(lines)
+    return '\n'.join(lines) + '\n'
+
+
+def test_jobs_do_not_change_the_result(arbiter, tmp_path, capsys, monkeypatch):
+    text = interleaved_text()
+    statements = arbiter.parse_all(text)
+    assert len(set(statements)) >= arbiter.PARALLEL_MIN_STATEMENTS
+    assert len(arbiter.partition(list(dict.fromkeys(statements)))) > 1
+
+    parallel = []
+    compress_parallel = arbiter._compress_components_parallel
+    monkeypatch.setattr(arbiter, '_compress_components_parallel',
+                        lambda *args: parallel.append(args[1]) or compress_parallel(*args))
+
+    results = []
+    for jobs in (1, 4, 2):
+        arbiter._COMPRESSED.clear()
+        results.append(arbiter.compress_text(text, jobs=jobs))
+    assert results[0].contradictions and results[0].facts != statements
+    assert results[1] == results[0] and results[2] == results[0]
+    assert parallel == [4, 2]
+
+    path = tmp_path / 'facts.txt'
+    path.write_text(text)
+    outputs = []
+    for jobs in ('1', '4'):
+        arbiter._COMPRESSED.clear()
+        arbiter.main(['--jobs', jobs, str(path)])
+        outputs.append(capsys.readouterr())
+    assert outputs[0].out and outputs[0] == outputs[1]
@@ -0,0 +1,96 @@
+import random
+import time
+
+
+def random_facts(arbiter, clauses=200, variables=60, seed=0):
+    r = random.Random(seed)
+    lines = []
+    for _ in range(clauses):
+        picked = r.sample(range(variables), 3)
+        lines.append(' | '.join(('!' if r.random() < .5 else '') + f'v{v}' for v in picked))
+    lines.append('v0 <-> v1')
+    return arbiter.parse_all('\n'.join(lines))
+
+
+def test_budgeted_minimal_cover_stops_at_the_deadline(arbiter, clock):
+    statements = random_facts(arbiter)
+    cover = arbiter.minimal_cover(statements, budget_ms=500)
+    # One millisecond per clock read: the deadline is checked often enough
+    # that it passes only a few reads before the search gives up
+    assert clock.reads <= 500 + 10
+    assert 0 < len(cover) <= len(statements)
+
+
+def test_expired_bdd_deadline_raises(arbiter):
+    bdd = arbiter.BDD(deadline=time.perf_counter() - 1)
+    try:
+        bdd.compile_facts(random_facts(arbiter, clauses=400))
+    except arbiter.BDDTimeout:
+        return
+    raise AssertionError('expected BDDTimeout')
+
+
+def test_small_component_is_minimized(arbiter):
+    statements = arbiter.parse_all('a -> b\nb -> c\na -> c\n')
+    cover = arbiter.minimal_cover(statements)
+    assert len(cover) == 2
+    assert arbiter.bdd_equivalent(statements, cover)
+
+
+def random_horn(arbiter, size, seed=0):
+    r = random.Random(seed)
+    variables = size // 2
+    lines = []
+    for _ in range(size):
+        body = [f'x{v}' for v in r.sample(range(variables), r.choice([0, 0, 1, 1, 2, 3]))]
+        head = f'x{r.randrange(variables)}'
+        if not body:
+            lines.append(head)
+        elif r.random() < .15:
+            # Goal clauses over an atom nothing derives, so most sets stay consistent
+            lines.append(' | '.join('!' + name for name in body + [f'y{r.randrange(variables)}']))
+        else:
+            lines.append(' & '.join(body) + ' -> ' + head)
+    return list(dict.fromkeys(arbiter.parse_all('\n'.join(lines))))
+
+
+class CountingIndex(dict):
+    """A clause index that counts the clauses its lookups hand out."""
+    visits = 0
+
+    def get(self, key, default=None):
+        found = dict.get(self, key, default)
+        CountingIndex.visits += len(found or ())
+        return found
+
+    def __getitem__(self, key):
+        found = dict.__getitem__(self, key)
+        CountingIndex.visits += len(found)
+        return found
+
+
+def test_compress_horn_scales_linearly(arbiter, monkeypatch):
+    init = arbiter.HornSupport.__init__
+
+    def counting_init(self, clauses):
+        init(self, clauses)
+        self.watches, self.by_head = CountingIndex(self.watches), CountingIndex(self.by_head)
+
+    monkeypatch.setattr(arbiter.HornSupport, '__init__', counting_init)
+
+    def visits(size):
+        # First consistent set: inconsistent ones return before the pass
+        statements = next(facts for facts in (random_horn(arbiter, size, seed) for seed in range(100))
+                          if arbiter.HornProgram(c for s in facts for c in arbiter.horn_clauses(s)).consistent)
+        CountingIndex.visits = 0
+        arbiter.compress_horn(statements)
+        return CountingIndex.visits
+
+    small, large = visits(500), visits(4000)
+    assert 0 < small and large < 16 * small      # 8x the input, far from 64x
+
+
+def test_compress_horn_drops_only_entailed_statements(arbiter):
+    statements = arbiter.parse_all('a\na -> b\nb\nb -> c\na -> c\nc -> a\n')
+    kept = arbiter.compress_horn(list(dict.fromkeys(statements)))
+    assert [arbiter.format_expr(stmt) for stmt in kept] == ['a', 'a -> b', 'b -> c']
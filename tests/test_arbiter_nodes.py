@@ -0,0 +1,34 @@
+import copy
+import gc
+import pickle
+import weakref
+
+
+def test_structurally_equal_nodes_are_one_object(arbiter):
+    first = arbiter.parse_all('(a & !b) -> (c <-> d | e)\n')[0]
+    second = arbiter.Implies(arbiter.And(arbiter.Var('a'), arbiter.Not(arbiter.Var('b'))),
+                             arbiter.Iff(arbiter.Var('c'), arbiter.Or(arbiter.Var('d'), arbiter.Var('e'))))
+    assert first is second and first.id == second.id
+    assert first.antecedent.left is arbiter.Var('a')
+    assert copy.deepcopy(first) is first
+    assert pickle.loads(pickle.dumps(first)) is first
+
+    # Same children under another connective, or in another order, is another node
+    assert arbiter.Or(arbiter.Var('a'), arbiter.Var('b')) is not arbiter.And(arbiter.Var('a'), arbiter.Var('b'))
+    assert arbiter.And(arbiter.Var('b'), arbiter.Var('a')).id != arbiter.And(arbiter.Var('a'), arbiter.Var('b')).id
+
+
+def test_dead_nodes_leave_the_intern_table(arbiter):
+    node = arbiter.And(arbiter.Var('intern_gc_a'), arbiter.Not(arbiter.Var('intern_gc_b')))
+    keys = [('var', 'intern_gc_a'), ('var', 'intern_gc_b'), ('not', node.right.expr.id),
+            ('and', node.left.id, node.right.id)]
+    assert all(arbiter._NODES[key]() is not None for key in keys)
+    old_id, ref = node.id, weakref.ref(node)
+
+    del node
+    gc.collect()
+    assert ref() is None
+    assert not any(key in arbiter._NODES for key in keys)
+
+    # Built again, it is a new node with a fresh id
+    assert arbiter.And(arbiter.Var('intern_gc_a'), arbiter.Not(arbiter.Var('intern_gc_b'))).id != old_id
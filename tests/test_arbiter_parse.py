@@ -0,0 +1,44 @@
+import io
+import mmap
+
+import pytest
+
+TEXT = '# facts\na -> b\n\nb & c\r\na -> b\n  !(a | d) <-> e  \n# end\nb & c\n'
+LINES = [2, 4, 5, 6, 8]
+
+
+@pytest.fixture
+def facts_file(tmp_path):
+    path = tmp_path / 'facts.txt'
+    path.write_bytes(TEXT.encode())
+    return path
+
+
+def test_streaming_matches_parse_all(arbiter, facts_file, monkeypatch):
+    expected = arbiter.parse_all(TEXT)
+    assert len(expected) == len(LINES)
+
+    with open(facts_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        from_mmap = list(arbiter.iter_statements(mapped))
+    sources = [TEXT.split('\n'), io.StringIO(TEXT), io.BytesIO(TEXT.encode())]
+    for numbered in [list(arbiter.iter_statements(source)) for source in sources] + [from_mmap]:
+        assert [line for line, _ in numbered] == LINES
+        assert [stmt for _, stmt in numbered] == expected
+    assert list(arbiter.iter_parse(io.StringIO(TEXT))) == expected
+
+    # Repeated lines still come out right when the line cache overflows
+    monkeypatch.setattr(arbiter, 'LINE_CACHE_SIZE', 1)
+    assert list(arbiter.iter_statements(TEXT.split('\n'))) == list(zip(LINES, expected))
+
+
+def test_bad_line_is_reported_with_its_number(arbiter):
+    text = 'a\n\n# note\nb -> c\na & & b\nd\n'
+    with pytest.raises(arbiter.ParseError, match=r'^Line 5: '):
+        arbiter.parse_all(text)
+
+    # Statements before the bad line have already been streamed
+    stream, seen = arbiter.iter_statements(io.StringIO(text)), []
+    with pytest.raises(arbiter.ParseError, match=r'^Line 5: '):
+        for numbered in stream:
+            seen.append(numbered)
+    assert seen == list(zip([1, 4], arbiter.parse_all('a\nb -> c\n')))
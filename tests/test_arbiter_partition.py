@@ -0,0 +1,50 @@
+import itertools
+import random
+
+from conftest import random_formula, truth_table
+
+GROUPS = (('a', 'b', 'c'), ('d', 'e', 'f'), ('g', 'h'))
+
+
+def test_partition_splits_by_shared_variables(arbiter):
+    # d | x joins the a and x components after both have started
+    statements = arbiter.parse_all('a -> b\nx\nc\nb & y\nd | x\nd -> a\nc <-> z\n')
+    assert arbiter.partition(statements) == [[0, 1, 3, 4, 5], [2, 6]]
+
+    owner, components = arbiter._fact_components(tuple(statements))
+    assert [indices for indices, _ in components] == [[0, 1, 3, 4, 5], [2, 6]]
+    assert components[1][1] == frozenset(arbiter.parse_all('c\nc <-> z\n'))
+    assert owner == {'a': 0, 'b': 0, 'x': 0, 'y': 0, 'd': 0, 'c': 1, 'z': 1}
+
+
+def bridged_facts(arbiter, r):
+    """Random statements per group, some of them bridging two groups."""
+    statements = []
+    for _ in range(6):
+        names = list(r.choice(GROUPS))
+        if r.random() < .2:
+            names += r.choice(GROUPS)[:1]
+        statements.append(random_formula(r, names, depth=2))
+    return list(dict.fromkeys(statements))
+
+
+def test_partitioned_results_match_the_whole_set(arbiter):
+    r = random.Random(7)
+    names = [name for group in GROUPS for name in group]
+    for _ in range(150):
+        statements = bridged_facts(arbiter, r)
+        components = arbiter.partition(statements)
+        assert sorted(i for component in components for i in component) == list(range(len(statements)))
+        variables = [set().union(*(arbiter._variables(statements[i]) for i in component))
+                     for component in components]
+        assert not any(first & second for first, second in itertools.combinations(variables, 2))
+
+        models = truth_table(statements, names)
+        assert arbiter.consistent(statements) == bool(models)
+        query = random_formula(r, names, depth=2)
+        assert arbiter.implies_semantically(statements, query) == all(
+            arbiter.evaluate(query, model) for model in models)
+        if models:
+            kept = arbiter.compress(statements)
+            assert kept == arbiter.compress_component(statements)
+            assert truth_table(kept, names) == models
@@ -0,0 +1,97 @@
+import itertools
+import random
+
+import pytest
+
+from conftest import random_formula, truth_table
+
+NAMES = ['a', 'b', 'c', 'd', 'e']
+
+
+def formula_sets(count, seed):
+    r = random.Random(seed)
+    return [[random_formula(r, NAMES) for _ in range(r.randint(1, 4))] for _ in range(count)]
+
+
+def test_satisfiable_matches_truth_table(arbiter, monkeypatch):
+    monkeypatch.setattr(arbiter, 'ENUMERATION_MAX_VARS', 0)
+    for statements in formula_sets(300, seed=1):
+        expected = bool(truth_table(statements, NAMES))
+        assert arbiter.satisfiable(statements) == expected, statements
+        assert arbiter.enumerate_satisfiable(statements) == expected, statements
+
+
+def test_models_satisfy_every_statement(arbiter):
+    for statements in formula_sets(300, seed=2):
+        encoder = arbiter.CNFEncoder()
+        sat = all([encoder.assert_expr(stmt) for stmt in statements]) and encoder.solver.solve()
+        assert sat == bool(truth_table(statements, NAMES)), statements
+        if sat:
+            model = {name: encoder.solver.value(2 * v) for name, v in encoder.var_ids.items()}
+            assert all(arbiter.evaluate(stmt, model) for stmt in statements), statements
+
+
+def test_assumptions_on_one_solver_match_truth_table(arbiter):
+    for statements in formula_sets(60, seed=3):
+        encoder = arbiter.CNFEncoder()
+        if not all([encoder.assert_expr(stmt) for stmt in statements]):
+            assert not truth_table(statements, NAMES)
+            continue
+        models = truth_table(statements, NAMES)
+        names = {v: name for name, v in encoder.var_ids.items()}
+        for a, b in itertools.combinations(NAMES, 2):
+            for pa, pb in itertools.product((False, True), repeat=2):
+                assumptions = [2 * encoder.var(a) + (not pa), 2 * encoder.var(b) + (not pb)]
+                expected = any(m[a] == pa and m[b] == pb for m in models)
+                assert encoder.solver.solve(assumptions) == expected
+                assert set(encoder.solver.failed) <= set(assumptions)
+                if not expected:
+                    # The failed assumptions alone already contradict the statements
+                    failed = {names[lit >> 1]: not lit & 1 for lit in encoder.solver.failed}
+                    assert not any(all(m[n] == value for n, value in failed.items()) for m in models)
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_random_3sat_matches_brute_force(arbiter, seed):
+    r = random.Random(seed)
+    variables = 10
+    clauses = [[2 * v + r.randint(0, 1) for v in r.sample(range(1, variables + 1), 3)]
+               for _ in range(43)]
+    solver = arbiter.SATSolver()
+    for _ in range(variables):
+        solver.new_var()
+    added = all([solver.add_clause(clause) for clause in clauses])
+    expected = any(all(any(bits[(lit >> 1) - 1] != lit & 1 for lit in clause) for clause in clauses)
+                   for bits in itertools.product((0, 1), repeat=variables))
+    assert (added and solver.solve()) == expected
+    if expected:
+        assert all(any(solver.value(lit) for lit in clause) for clause in clauses)
+
+
+def test_thousands_of_statements_over_few_variables(arbiter, tmp_path, capsys):
+    # Enumerated, not solved: must not nest one closure per statement
+    r = random.Random(4)
+    planted = {name: r.random() < .5 for name in 'abcdefgh'}
+    lines = []
+    while len(lines) < 3000:
+        literals = [(name, r.random() < .5) for name in r.sample('abcdefgh', 3)]
+        if any(planted[name] == positive for name, positive in literals):
+            lines.append(' | '.join(('' if positive else '!') + name for name, positive in literals))
+    statements = arbiter.parse_all('\n'.join(lines))
+    models = truth_table(statements, list('abcdefgh'))
+    assert planted in models
+    assert arbiter.satisfiable(statements)
+    assert arbiter.consistent(statements) and arbiter.unsat_core(statements) is None
+    for name in 'abcd':
+        query = arbiter.Var(name) if planted[name] else arbiter.Not(arbiter.Var(name))
+        assert arbiter.implies_semantically(statements, query) == \
+            all(model[name] == planted[name] for model in models)
+
+    clashing = statements + arbiter.parse_all('a\n!a\n')
+    assert not arbiter.satisfiable(clashing)
+    assert arbiter.unsat_core(clashing) == [3000, 3001]
+
+    path = tmp_path / 'facts.txt'
+    path.write_text('\n'.join(lines) + '\n')
+    arbiter.main(['check', str(path)])
+    assert capsys.readouterr().out == 'Consistent (3000 statements)\n'
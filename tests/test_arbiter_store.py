@@ -0,0 +1,37 @@
+FIRST = 'a -> b\nb -> c\na\na -> c\nx | y\n'
+SECOND = '!x\ny\nx | y | z\n'
+
+
+def test_compaction_stays_incremental_across_batches(arbiter, tmp_path, monkeypatch):
+    compressed = []
+    compress = arbiter.compress
+    monkeypatch.setattr(arbiter, 'compress',
+                        lambda statements, jobs=1: compressed.append(statements) or compress(statements, jobs))
+    path = tmp_path / 'facts.db'
+
+    with arbiter.FactStore(path) as store:
+        assert store.add(arbiter.parse_all(FIRST)) == 5
+        assert store.compact() == (5, 4)
+        first = store.export()
+    assert first == arbiter.parse_all('a -> b\nb -> c\na\nx | y\n')
+
+    # A new session: only the component the new facts touch is recompressed
+    with arbiter.FactStore(path) as store:
+        assert store.add(arbiter.parse_all(SECOND + 'a\n')) == 3
+        assert len(store) == 8
+        assert store.compact() == (4, 2)
+        assert set(compressed[-1]) == set(arbiter.parse_all('x | y\n' + SECOND))
+        assert store.compact() == (0, 0)
+        second = store.export()
+    assert len(compressed) == 2
+    assert second == arbiter.parse_all('a -> b\nb -> c\na\n!x\ny\n')
+    assert arbiter.bdd_equivalent(second, arbiter.parse_all(FIRST + SECOND))
+
+
+def test_store_defaults_to_the_project(arbiter, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with arbiter.FactStore() as store:
+        store.add(arbiter.parse_all(FIRST))
+    assert arbiter.store_path().resolve() == tmp_path.resolve() / '_meta' / 'arbiter.db'
+    assert (tmp_path / '_meta' / 'arbiter.db').is_file()
+    assert not (arbiter.Path(arbiter.__file__).parent / 'arbiter.db').exists()
@@ -0,0 +1,421 @@
+import asyncio
+import hashlib
+import io
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import ROOT, load_script
+
+# The server imports requests at module level
+requests = pytest.importorskip('requests')
+
+
+@pytest.fixture(scope='module')
+def docs():
+    return load_script(ROOT / 'claude-docs-server.py', 'claude_docs_server')
+
+
+class EchoServer:
+    def handle_request(self, request):
+        return {"method": request["method"]}
+
+
+def run(docs, monkeypatch, capsys, *messages):
+    lines = ''.join((m if isinstance(m, str) else json.dumps(m)) + '\n' for m in messages)
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(lines))
+    asyncio.run(docs.serve(EchoServer(), max_in_flight=2))
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize('method', [None, 7, ['tools/list']])
+def test_non_string_method_is_invalid_request(docs, monkeypatch, capsys, method):
+    responses = run(docs, monkeypatch, capsys,
+                    {"jsonrpc": "2.0", "id": 1, "method": method},
+                    {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+    by_id = {response["id"]: response for response in responses}
+    assert by_id[1]["error"]["code"] == -32600
+    assert by_id[2]["result"] == {"method": "tools/list"}
+
+
+def test_malformed_messages_do_not_end_the_loop(docs, monkeypatch, capsys):
+    responses = run(docs, monkeypatch, capsys,
+                    'not json', '[1, 2]', {"method": "tools/list", "id": {"x": 1}},
+                    {"method": "notifications/cancelled", "params": {"requestId": [1]}},
+                    {"method": "notifications/cancelled", "params": "x"},
+                    {"jsonrpc": "2.0", "id": 3, "method": "tools/list"})
+    assert responses[-1] == {"jsonrpc": "2.0", "id": 3, "result": {"method": "tools/list"}}
+    assert [r["error"]["code"] for r in responses[1:3]] == [-32600, -32600]
+
+
+@pytest.mark.parametrize('request_id, expected', [(1.5, 1.5), ('a', 'a'), (None, None)])
+def test_numeric_and_string_ids_are_accepted(docs, monkeypatch, capsys, request_id, expected):
+    responses = run(docs, monkeypatch, capsys, {"jsonrpc": "2.0", "id": request_id, "method": "x"})
+    assert responses == [{"jsonrpc": "2.0", "id": expected, "result": {"method": "x"}}]
+    assert docs.is_request_id(request_id)
+
+
+@pytest.mark.parametrize('request_id', [True, [1], {"x": 1}])
+def test_invalid_id_is_answered_with_a_null_id(docs, monkeypatch, capsys, request_id):
+    responses = run(docs, monkeypatch, capsys, {"jsonrpc": "2.0", "id": request_id, "method": "x"})
+    assert responses == [docs.invalid_request({"id": request_id})]
+    assert responses[0]["id"] is None
+
+
+class BlockingServer:
+    """Requests block until released; notes which lines were read meanwhile."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def handle_request(self, request):
+        self.release.wait(5)
+        return {"method": request["method"]}
+
+
+class Lines(io.StringIO):
+    def __init__(self, server, *messages):
+        super().__init__(''.join(json.dumps(m) + '\n' for m in messages))
+        self.server, self.read_blocked = server, []
+
+    def readline(self):
+        self.read_blocked.append(not self.server.release.is_set())
+        return super().readline()
+
+
+def test_cancelled_request_keeps_its_slot_until_its_worker_finishes(docs, monkeypatch, capsys):
+    server = BlockingServer()
+    stdin = Lines(server,
+                  {"jsonrpc": "2.0", "id": 1, "method": "slow"},
+                  {"method": "notifications/cancelled", "params": {"requestId": 1}},
+                  {"jsonrpc": "2.0", "id": 2, "method": "slow"},
+                  {"jsonrpc": "2.0", "id": 3, "method": "slow"})
+    monkeypatch.setattr(sys, 'stdin', stdin)
+    timer = threading.Timer(0.3, server.release.set)
+    timer.start()
+    asyncio.run(docs.serve(server, max_in_flight=2))
+    timer.join()
+
+    # Request 1 and 2 hold both slots, so request 3 is read only once they finish
+    assert stdin.read_blocked[:3] == [True, True, True]
+    assert stdin.read_blocked[3:] == [False, False]
+    responses = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(response["id"] for response in responses) == [2, 3]
+
+
+class Site(BaseHTTPRequestHandler):
+    """Local stand-in for the docs site: canned pages with ETags, honouring If-None-Match."""
+
+    def do_GET(self):
+        site = self.server
+        site.log.append((self.path, self.headers.get('If-None-Match')))
+        body = site.pages.get(self.path.lstrip('/'))
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Site)
+    server.pages, server.log = {'hooks': '<h1>Hooks</h1><p>PreCompact runs first</p>'}, []
+    server.url = 'http://127.0.0.1:%d/' % server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fresh_page_is_served_from_disk(docs, site, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=3600)
+    html = cache.get('hooks', site.url + 'hooks')
+    assert 'PreCompact' in html
+    assert cache.get('hooks', site.url + 'hooks') == html
+    assert site.log == [('/hooks', None)]
+
+
+def test_expired_page_is_revalidated_with_its_etag(docs, site, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=0)
+    url = site.url + 'hooks'
+    first = cache.get('hooks', url)
+    etag = cache.meta('hooks')['etag']
+    fetched_at = cache.meta('hooks')['fetched_at']
+
+    assert cache.get('hooks', url) == first
+    assert site.log[1] == ('/hooks', etag)
+    assert cache.meta('hooks')['fetched_at'] > fetched_at
+
+    site.pages['hooks'] = '<h1>Hooks</h1><p>SessionStart runs first</p>'
+    assert 'SessionStart' in cache.get('hooks', url)
+    assert site.log[2] == ('/hooks', etag)
+    assert cache.meta('hooks')['etag'] != etag
+
+
+def test_stale_copy_is_served_when_the_network_fails(docs, site, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=0, timeout=2)
+    url = site.url + 'hooks'
+    html = cache.get('hooks', url)
+    site.shutdown()
+    site.server_close()
+    assert cache.get('hooks', url) == html
+    with pytest.raises(docs.requests.RequestException):
+        cache.get('memory', site.url + 'memory')
+
+
+def test_cached_copy_of_another_url_is_not_reused(docs, site, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=3600)
+    cache.get('hooks', site.url + 'hooks')
+    site.pages['v2/hooks'] = '<h1>Hooks v2</h1>'
+    assert cache.get('hooks', site.url + 'v2/hooks') == '<h1>Hooks v2</h1>'
+    assert site.log[-1] == ('/v2/hooks', None)
+
+
+PAGES = {
+    'hooks': [['Hooks', 'PreCompact hooks run before the transcript is compacted'],
+              ['Matchers', 'Matchers select which tools trigger a hook']],
+    'memory': [['', 'CLAUDE.md files hold project memory'], ['Imports', 'Memory files can import others']],
+}
+
+
+def test_saved_index_loads_without_tokenizing(docs, tmp_path, monkeypatch):
+    built = docs.DocsIndex(tmp_path / 'index.json')
+    for page, sections in PAGES.items():
+        built.update(page, page + '-digest', sections)
+    built.save()
+
+    monkeypatch.setattr(docs, 'terms', lambda text: pytest.fail('re-tokenized while loading'))
+    loaded = docs.DocsIndex(tmp_path / 'index.json')
+    monkeypatch.undo()
+    assert loaded.state() == built.state()
+    assert loaded.sections == built.sections and loaded.texts == built.texts
+    for query in ('hook', 'memory imports', 'compacted transcript', 'nothing'):
+        assert loaded.search(query) == built.search(query)
+
+    # A loaded index still updates in place
+    loaded.update('hooks', 'hooks-v2', [['Hooks', 'SessionStart hooks run first']])
+    assert [chunk.page for chunk in loaded.search('hook')] == ['hooks']
+    assert loaded.search('matchers') == []
+
+
+def test_index_from_an_older_version_is_rebuilt(docs, tmp_path):
+    path = tmp_path / 'index.json'
+    path.write_text(json.dumps({'version': 3, 'digests': {'hooks': 'd'}, 'sections': PAGES}))
+    index = docs.DocsIndex(path)
+    assert index.digests == {} and not index.is_current('hooks', 'd')
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path, site):
+    """Point the server at the local site and a scratch cache, with no snapshot configured."""
+    monkeypatch.setenv('CLAUDE_DOCS_BASE_URL', site.url)
+    monkeypatch.setenv('CLAUDE_DOCS_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.delenv('CLAUDE_DOCS_SNAPSHOT', raising=False)
+    return tmp_path
+
+
+def build(docs, site, path):
+    names = docs.ClaudeDocsServer(snapshot='').pages
+    site.pages.update({name: f'<h1>{name}</h1><p>About {name} and hooks</p>' for name in names})
+    docs.build_snapshot(['--output', str(path)])
+    site.log.clear()
+
+
+def test_built_snapshot_serves_offline(docs, site, env):
+    path = env / 'docs.snapshot'
+    build(docs, site, path)
+    snapshot = docs.Snapshot(path)
+    assert snapshot.manifest['base_url'] == site.url and 'hooks' in snapshot
+    assert snapshot.sections('memory') == [['memory', 'About memory and hooks']]
+
+    server = docs.ClaudeDocsServer(snapshot=path)
+    site.shutdown()
+    text = server._fetch_docs({'page': 'memory'})['content'][0]['text']
+    assert 'About memory and hooks' in text
+    assert [chunk.page for chunk in server.index.search('memory')] == ['memory']
+    assert site.log == []
+
+
+def test_snapshot_is_only_used_when_configured(docs, site, env, monkeypatch):
+    # build-snapshot's default output is not picked up by the server on its own
+    path = env / 'docs.snapshot'
+    monkeypatch.setattr(docs, 'DEFAULT_SNAPSHOT', path)
+    build(docs, site, path)
+    assert docs.ClaudeDocsServer().snapshot is None
+
+    monkeypatch.setenv('CLAUDE_DOCS_SNAPSHOT', str(path))
+    assert docs.ClaudeDocsServer().snapshot is not None
+    assert docs.ClaudeDocsServer(snapshot='').snapshot is None
+
+
+def test_unusable_snapshot_is_ignored(docs, site, env, capsys):
+    path = env / 'docs.snapshot'
+    build(docs, site, path)
+    data = path.read_bytes()
+    for broken in (b'', data[:5], data[:40], data[:len(data) // 2], b'NOTASNAP' + data[8:]):
+        path.write_bytes(broken)
+        server = docs.ClaudeDocsServer(snapshot=path)
+        assert server.snapshot is None and isinstance(server.index, docs.DocsIndex)
+        assert 'Ignoring docs snapshot' in capsys.readouterr().err
+    missing = docs.ClaudeDocsServer(snapshot=env / 'missing.snapshot')
+    assert missing.snapshot is None
+
+    # Page blobs are read lazily: a damaged one fails only its own requests
+    path.write_bytes(data)
+    entries = docs.Snapshot(path)._entries
+    name, (offset, length) = max(entries.items(), key=lambda entry: entry[1][0])
+    path.write_bytes(data[:offset] + bytes(length) + data[offset + length:])
+    server = docs.ClaudeDocsServer(snapshot=path)
+    page = name[len('page:'):]
+    assert server.snapshot is not None
+    assert server._fetch_docs({'page': page})['error'].startswith(f'Failed to fetch {page}')
+    other = next(p for p in server.pages if p != page)
+    assert 'content' in server._fetch_docs({'page': other})
+
+
+def test_extractor_strips_scripts_and_splits_sections(docs):
+    html = ('<html><head><title>Hooks</title><style>p { color: red }</style>'
+            '<script>var x = "<h2>not a heading</h2>";</script></head><body>'
+            '<p>Intro&nbsp;text &amp; more</p><div>next</div><ul><li>one</li><li>two</li></ul>'
+            '<h2>Hook <code>events</code></h2><p>Run <b>before</b>   compaction&#33;</p>'
+            '<noscript>enable js</noscript><svg><text>icon</text></svg>'
+            '<h3>Empty</h3><h3>Matchers</h3><p>a<br>b</p></body></html>')
+    assert docs.extract_sections(html) == [
+        ['', 'Hooks Intro text & more next one two'],
+        ['Hook events', 'Run before compaction!'],
+        ['Empty', ''],
+        ['Matchers', 'a b'],
+    ]
+    assert docs.sections_text(docs.extract_sections(html)) == \
+        'Hooks Intro text & more next one two Hook events Run before compaction! Empty Matchers a b'
+
+
+def test_fresh_pages_are_searched_without_reading_the_cache(docs, site, env, monkeypatch):
+    site.pages.update({'hooks': '<h1>Hooks</h1><p>PreCompact hooks</p>',
+                       'memory': '<h1>Memory</h1><p>CLAUDE.md memory</p>'})
+    server = docs.ClaudeDocsServer(ttl=3600)
+    assert 'Hooks' in server._search_docs({'query': 'hooks', 'pages': ['hooks', 'memory']})['content'][0]['text']
+    assert len(site.log) == 2
+
+    reads = []
+    meta = docs.PageCache.meta
+    monkeypatch.setattr(docs.PageCache, 'meta', lambda self, page: reads.append(page) or meta(self, page))
+    for fresh in (server, docs.ClaudeDocsServer(ttl=3600)):     # the fetch times are saved too
+        fresh._search_docs({'query': 'memory', 'pages': ['hooks', 'memory']})
+    assert reads == [] and len(site.log) == 2
+
+    # Once expired, a 304 only renews the fetch time: nothing is re-indexed
+    expired = docs.ClaudeDocsServer(ttl=0)
+    monkeypatch.setattr(docs.DocsIndex, 'update', lambda *args: pytest.fail('re-indexed'))
+    before = dict(expired.index.fetched)
+    expired._search_docs({'query': 'memory', 'pages': ['hooks', 'memory']})
+    assert [etag is not None for _, etag in site.log[2:]] == [True, True]
+    assert all(expired.index.fetched[page][1] > before[page][1] for page in ('hooks', 'memory'))
+
+
+class StubResponse:
+    def __init__(self, status_code, text='', etag=None):
+        self.status_code, self.text = status_code, text
+        self.headers = {'ETag': etag} if etag else {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
+
+
+class StubSession:
+    """Stands in for the cache's requests session: canned pages with ETags, no network."""
+
+    def __init__(self, pages, first=None):
+        self.pages, self.calls, self.answered, self.lock = pages, [], [], threading.Lock()
+        # The fetch of page `first` waits until every other fetch has answered
+        self.first, self.others_done = first, threading.Event()
+
+    def get(self, url, headers, timeout):
+        page = url.rsplit('/', 1)[-1]
+        with self.lock:
+            self.calls.append((page, headers.get('If-None-Match')))
+        try:
+            if page == self.first:
+                assert self.others_done.wait(5)
+            return self.respond(page, headers)
+        finally:
+            with self.lock:
+                self.answered.append(page)
+                if len(self.answered) == len(self.pages) - (self.first is not None):
+                    self.others_done.set()
+
+    def respond(self, page, headers):
+        body = self.pages[page]
+        if isinstance(body, Exception):
+            raise body
+        if body is None:
+            return StubResponse(404)
+        etag = '"%d"' % len(body)
+        if headers.get('If-None-Match') == etag:
+            return StubResponse(304)
+        return StubResponse(200, body, etag)
+
+
+def test_get_many_keeps_the_request_order(docs, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=3600)
+    cache.session = StubSession({page: f'<h1>{page}</h1>' for page in 'abcd'}, first='a')
+    urls = {page: f'https://docs.example/{page}' for page in 'cabd'}
+    results = cache.get_many(urls)
+    # a answers last, yet keeps its place
+    assert cache.session.answered[-1] == 'a'
+    assert list(results) == list('cabd')
+    assert results == {page: f'<h1>{page}</h1>' for page in 'cabd'}
+
+
+def test_get_many_revalidates_expired_pages_with_their_etags(docs, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=3600)
+    cache.session = session = StubSession({'hooks': '<h1>Hooks</h1>', 'memory': '<h1>Memory</h1>'})
+    urls = {page: f'https://docs.example/{page}' for page in ('hooks', 'memory')}
+    first = cache.get_many(urls)
+    assert sorted(session.calls) == [('hooks', None), ('memory', None)]
+
+    # Fresh: served from disk
+    assert cache.get_many(urls) == first and len(session.calls) == 2
+
+    # Expired: conditional GETs, answered 304 for the page that did not change
+    cache.ttl = 0
+    session.pages['memory'] = '<h1>Memory</h1><p>Imports</p>'
+    fetched_at = cache.meta('hooks')['fetched_at']
+    assert cache.get_many(urls) == {'hooks': '<h1>Hooks</h1>', 'memory': '<h1>Memory</h1><p>Imports</p>'}
+    assert sorted(session.calls[2:]) == [('hooks', '"14"'), ('memory', '"15"')]
+    assert cache.meta('hooks')['fetched_at'] >= fetched_at
+    assert cache.meta('memory')['etag'] == '"29"'
+
+
+def test_get_many_leaves_out_failed_pages(docs, tmp_path):
+    cache = docs.PageCache(tmp_path, ttl=0)
+    pages = {'hooks': '<h1>Hooks</h1>', 'memory': '<h1>Memory</h1>', 'gone': None,
+             'down': requests.ConnectionError('refused')}
+    cache.session = StubSession(pages)
+    urls = {page: f'https://docs.example/{page}' for page in ('gone', 'hooks', 'down', 'memory')}
+    assert cache.get_many(urls) == {'hooks': '<h1>Hooks</h1>', 'memory': '<h1>Memory</h1>'}
+    assert cache.meta('gone') is None and cache.meta('down') is None
+
+    # A page whose fetch fails later is still served from its stale copy
+    pages['hooks'] = requests.Timeout('slow')
+    assert cache.get_many(urls) == {'hooks': '<h1>Hooks</h1>', 'memory': '<h1>Memory</h1>'}
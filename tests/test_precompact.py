@@ -0,0 +1,152 @@
+import io
+import json
+
+import pytest
+
+from conftest import HOOKS, load_script
+
+
+@pytest.fixture(scope='module')
+def hook():
+    return load_script(HOOKS / 'precompact-arbiter.py', 'precompact_arbiter')
+
+
+def facts_of(hook, *records, cwd='/work'):
+    extractor = hook.FactExtractor(cwd=cwd)
+    for record in records:
+        extractor.feed(record)
+    return extractor.facts()
+
+
+def said(text):
+    return {'message': {'role': 'user', 'content': text}}
+
+
+def tool(name, **tool_input):
+    return {'message': {'role': 'assistant',
+                        'content': [{'type': 'tool_use', 'name': name, 'input': tool_input}]}}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("What's going on with the tests?", []),
+    ("We're going to use pytest.", ['decided_pytest']),
+    ("We decided on Postgres", ['decided_postgresql']),
+    ("Let's use C++ instead of Rust", ['decided_cpp', 'rejected_rust']),
+    ("They chose to use C#.", ['decided_csharp']),
+    ("Please don't use Node.js here", ['rejected_node']),
+    ("Switched to Next.js instead of vite", ['decided_nextjs', 'rejected_vite']),
+    ("I'm going to use the same approach", []),
+    ("avoid using it, and never use them", []),
+])
+def test_decisions(hook, text, expected):
+    assert facts_of(hook, said(text)) == expected
+
+
+def test_tool_use(hook):
+    facts = facts_of(hook,
+                     tool('Edit', file_path='/work/src/app.py'),
+                     tool('Read', file_path='/elsewhere/package.json'),
+                     tool('Bash', command='CI=1 npm test && pytest -q | tee log'))
+    assert facts == ['used_edit', 'use_python', 'touched_src_app_py',
+                     'used_read', 'use_node', 'used_bash', 'use_npm', 'use_pytest']
+
+
+def test_malformed_records_are_skipped(hook):
+    lines = [b'not json\n', b'[1]\n', b'\n', b'{"message": "x"}\n', b'{"message": {"content": 7}}\n']
+    assert facts_of(hook, *hook.iter_records(lines)) == []
+
+
+def write_lines(path, *records, mode='a'):
+    with open(path, mode) as f:
+        f.write(''.join(json.dumps(record) + '\n' for record in records))
+
+
+def test_checkpoint_reads_only_appended_lines(hook, tmp_path):
+    transcript, checkpoint = tmp_path / 'session.jsonl', tmp_path / 'session.checkpoint.json'
+    write_lines(transcript, said("We're going to use pytest."), mode='w')
+    assert hook.extract_facts_from_transcript(str(transcript), checkpoint) == 'decided_pytest'
+    first = json.loads(checkpoint.read_text())
+    assert first['offset'] == transcript.stat().st_size
+
+    # A line still being written is left for the next run
+    write_lines(transcript, tool('Bash', command='cargo build'))
+    with open(transcript, 'a') as f:
+        f.write('{"message": {"content": "never use ja')
+    assert hook.extract_facts_from_transcript(str(transcript), checkpoint) == \
+        'decided_pytest\nused_bash\nuse_cargo'
+    second = json.loads(checkpoint.read_text())
+    assert first['offset'] < second['offset'] < transcript.stat().st_size
+
+    with open(transcript, 'a') as f:
+        f.write('va"}}\n')
+    assert hook.extract_facts_from_transcript(str(transcript), checkpoint).endswith('rejected_java')
+    assert json.loads(checkpoint.read_text())['offset'] == transcript.stat().st_size
+
+
+def test_checkpoint_only_scans_from_its_offset(hook, tmp_path, monkeypatch):
+    transcript, checkpoint = tmp_path / 'session.jsonl', tmp_path / 'session.checkpoint.json'
+    write_lines(transcript, *[said('nothing to see') for _ in range(50)], mode='w')
+    hook.extract_facts_from_transcript(str(transcript), checkpoint)
+    stored = json.loads(checkpoint.read_text())['offset']
+    write_lines(transcript, said('We decided on Go'))
+
+    offsets = []
+    scan = hook.scan_transcript
+    monkeypatch.setattr(hook, 'scan_transcript',
+                        lambda path, offset: offsets.append(offset) or scan(path, offset))
+    assert hook.extract_facts_from_transcript(str(transcript), checkpoint) == 'decided_go'
+    assert offsets == [stored]
+
+
+def test_checkpoint_resets_for_truncated_or_other_transcripts(hook, tmp_path):
+    transcript, checkpoint = tmp_path / 'session.jsonl', tmp_path / 'session.checkpoint.json'
+    write_lines(transcript, said("We're going to use pytest."), said('We decided on Go'), mode='w')
+    hook.extract_facts_from_transcript(str(transcript), checkpoint)
+
+    write_lines(transcript, said('Use Rust instead of Go'), mode='w')
+    assert hook.extract_facts_from_transcript(str(transcript), checkpoint) == 'decided_rust\nrejected_go'
+
+    other = tmp_path / 'other.jsonl'
+    write_lines(other, said("We're going to use pytest."), mode='w')
+    assert hook.load_checkpoint(checkpoint, str(other)) == \
+        {'transcript_path': str(other), 'offset': 0, 'facts': []}
+    assert hook.extract_facts_from_transcript(str(other), checkpoint) == 'decided_pytest'
+
+
+def test_corrupt_checkpoint_starts_over(hook, tmp_path):
+    transcript, checkpoint = tmp_path / 'session.jsonl', tmp_path / 'session.checkpoint.json'
+    write_lines(transcript, said('We decided on Go'), mode='w')
+    checkpoint.write_text('{"offset": ')
+    assert hook.extract_facts_from_transcript(str(transcript), checkpoint) == 'decided_go'
+
+
+def run_hook(hook, monkeypatch, tmp_path, capsys, *records):
+    """Run the hook's main() on a transcript of records; returns (exit code, systemMessage)."""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('ARBITER_SOCKET', str(tmp_path / 'no-daemon.sock'))
+    transcript = tmp_path / 'session.jsonl'
+    write_lines(transcript, *records, mode='w')
+    event = {'session_id': 's1', 'transcript_path': str(transcript), 'cwd': str(tmp_path),
+             'hook_event_name': 'PreCompact'}
+    monkeypatch.setattr('sys.stdin', io.StringIO(json.dumps(event)))
+    with pytest.raises(SystemExit) as exit:
+        hook.main()
+    out = capsys.readouterr().out
+    return exit.value.code, json.loads(out)['systemMessage'] if out else None
+
+
+@pytest.mark.parametrize('value', ['', 'soon'])
+def test_unusable_budget_falls_back_to_the_default(hook, monkeypatch, tmp_path, capsys, value):
+    monkeypatch.setenv('ARBITER_BUDGET_MS', value)
+    code, message = run_hook(hook, monkeypatch, tmp_path, capsys, said('We decided on Go'))
+    assert code == 0 and 'decided_go' in message
+    assert hook.budget_ms() == hook.DEFAULT_BUDGET_MS
+
+
+def test_failed_compression_still_emits_the_facts(hook, arbiter, monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(arbiter, 'handle_request', lambda request, spans=None: {'error': 'boom'})
+    code, message = run_hook(hook, monkeypatch, tmp_path, capsys,
+                             said('We decided on Go'), tool('Bash', command='cargo build'))
+    assert code == 0
+    assert 'decided_go\nused_bash\nuse_cargo' in message
+    assert 'Compression failed' in (tmp_path / '.claude' / 'logs' / 'arbiter' / 's1.log').read_text()